@@ -0,0 +1,13 @@
+"""
+MySQL backend with an in-process connection pool.
+
+Set ENGINE to 'api.db.mysql_pool' and optionally
+'POOL': {'MAX_SIZE': 10, 'MAX_AGE': 1800} in the DATABASES entry.
+"""
+from django.db.backends.mysql import base
+
+from ..pool import PooledConnectionMixin
+
+
+class DatabaseWrapper(PooledConnectionMixin, base.DatabaseWrapper):
+    pass
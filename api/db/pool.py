@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of raw DB-API connections for one database alias.
+
+    Connections are handed out most-recently-used first, so a busy process
+    keeps reusing a few warm connections and the rest age out. A connection
+    older than `max_age` seconds, or one that fails a ping, is closed instead
+    of being reused.
+    """
+
+    def __init__(self, max_size, max_age):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._idle = []  # [(connection, created_at)]
+        self._lock = threading.Lock()
+
+    def _expired(self, created_at):
+        return self.max_age is not None and time.monotonic() - created_at >= self.max_age
+
+    @staticmethod
+    def _discard(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def acquire(self, create, is_usable):
+        """Return (connection, created_at), reusing an idle connection when possible."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, created_at = self._idle.pop()
+            if not self._expired(created_at) and is_usable(connection):
+                return connection, created_at
+            self._discard(connection)
+        return create(), time.monotonic()
+
+    def release(self, connection, created_at, reset):
+        """Give a connection back. `reset` must leave it with no open transaction."""
+        if self._expired(created_at):
+            self._discard(connection)
+            return
+        try:
+            reset(connection)
+        except Exception:
+            self._discard(connection)
+            return
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((connection, created_at))
+                return
+        self._discard(connection)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._discard(connection)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict):
+    """
+    The pool for `alias` in this process. Keyed by pid as well, so workers
+    forked after the pool was created never share a socket with their parent.
+    """
+    key = (os.getpid(), alias)
+    with _pools_lock:
+        if key not in _pools:
+            options = settings_dict.get('POOL') or {}
+            _pools[key] = ConnectionPool(
+                max_size=options.get('MAX_SIZE', 10),
+                max_age=options.get('MAX_AGE', 1800),
+            )
+        return _pools[key]
+
+
+class PooledConnectionMixin:
+    """
+    DatabaseWrapper mixin that checks raw connections out of a ConnectionPool
+    in connect() and returns them in close(), instead of opening and closing
+    a socket each time. Useful where Django closes connections often: with
+    CONN_MAX_AGE = 0, and in worker threads that call connection.close()
+    after each task.
+    """
+
+    _pool_created_at = None
+
+    def get_pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        connection, self._pool_created_at = self.get_pool().acquire(
+            lambda: super(PooledConnectionMixin, self).get_new_connection(conn_params),
+            self._ping,
+        )
+        return connection
+
+    @staticmethod
+    def _ping(connection):
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute('SELECT 1')
+            finally:
+                cursor.close()
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _reset(connection):
+        connection.rollback()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # Django keeps a reference until the atomic block exits; don't
+                # let another thread check the connection out before then
+                return self.connection.close()
+            self.get_pool().release(self.connection, self._pool_created_at, self._reset)
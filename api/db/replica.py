@@ -0,0 +1,98 @@
+"""
+Read-replica routing for report endpoints.
+
+Views that subclass ReportReplicaMixin (or code wrapped in reports_db())
+read from the `reports` database alias when it is configured. Writes always
+go to `default`. Once a request has written, its remaining reads go to
+`default` too, and ReplicaPinningMiddleware keeps the client on `default`
+for REPORTS_DB_LAG_TOLERANCE seconds, so a report opened right after a sale
+sees that sale even if the replica is behind.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPORTS_DB = 'reports'
+PIN_COOKIE = 'pin_primary_db'
+
+_use_reports = contextvars.ContextVar('use_reports_db', default=False)
+_pinned = contextvars.ContextVar('pinned_to_primary', default=False)
+_wrote = contextvars.ContextVar('wrote_to_primary', default=False)
+
+
+def reports_db_enabled():
+    return REPORTS_DB in settings.DATABASES
+
+
+@contextmanager
+def reports_db():
+    """Send reads in this block (or decorated function) to the reports replica."""
+    token = _use_reports.set(True)
+    try:
+        yield
+    finally:
+        _use_reports.reset(token)
+
+
+class ReportReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_reports.get() and not (_pinned.get() or _wrote.get()) and reports_db_enabled():
+            return REPORTS_DB
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Also called for select_for_update() reads
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication
+        if db == REPORTS_DB:
+            return False
+        return None
+
+
+class ReportReplicaMixin:
+    """APIView mixin: run the whole request with reports_db() active."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with reports_db():
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaPinningMiddleware:
+    """
+    Keeps a client on the primary for REPORTS_DB_LAG_TOLERANCE seconds after
+    any request of theirs that wrote, using a short-lived cookie.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            pinned = float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            pinned = False
+
+        pinned_token = _pinned.set(pinned)
+        wrote_token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _wrote.get() and reports_db_enabled():
+                lag = settings.REPORTS_DB_LAG_TOLERANCE
+                response.set_cookie(
+                    PIN_COOKIE, str(time.time() + lag), max_age=lag,
+                    httponly=True, samesite='Lax',
+                )
+            return response
+        finally:
+            _pinned.reset(pinned_token)
+            _wrote.reset(wrote_token)
@@ -0,0 +1,70 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+from api.db.pool import PooledConnectionMixin
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure per-request database latency with a fresh connection per request '
+        '(CONN_MAX_AGE = 0) against the configured persistent connection'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Simulated requests per mode')
+        parser.add_argument('--queries', type=int, default=5, help='Queries per simulated request')
+        parser.add_argument('--database', default='default', help='Database alias to benchmark')
+
+    def _run(self, connection, conn_max_age, requests, queries):
+        """Time `requests` request cycles, sending the same signals the handler does."""
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            request_started.send(sender=self.__class__)
+            with connection.cursor() as cursor:
+                for _ in range(queries):
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+            request_finished.send(sender=self.__class__)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        connection.close()
+        timings.sort()
+        return {
+            'mean': statistics.mean(timings),
+            'p50': timings[len(timings) // 2],
+            'p95': timings[int(len(timings) * 0.95) - 1],
+        }
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        configured_max_age = connection.settings_dict['CONN_MAX_AGE']
+        pooled = isinstance(connection, PooledConnectionMixin)
+
+        self.stdout.write(
+            f"{connection.vendor} ({connection.settings_dict['ENGINE']}), "
+            f"{options['requests']} requests x {options['queries']} queries, "
+            f"health checks {'on' if connection.settings_dict['CONN_HEALTH_CHECKS'] else 'off'}"
+        )
+
+        modes = [
+            ('per-request' + (' (pooled)' if pooled else ''), 0),
+            # None keeps the connection for the whole run when CONN_MAX_AGE is 0
+            (f"persistent (CONN_MAX_AGE={configured_max_age or None})", configured_max_age or None),
+        ]
+        try:
+            for label, conn_max_age in modes:
+                result = self._run(connection, conn_max_age, options['requests'], options['queries'])
+                self.stdout.write(
+                    f"{label:<40} mean {result['mean']:.3f} ms  "
+                    f"p50 {result['p50']:.3f} ms  p95 {result['p95']:.3f} ms"
+                )
+        finally:
+            connection.settings_dict['CONN_MAX_AGE'] = configured_max_age
@@ -0,0 +1,95 @@
+import gzip
+import json
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import resolve, reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.middleware import brotli
+from api.models import Branch
+from api.renderers import FastJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare stock JSONRenderer and FastJSONRenderer encode times, and raw, gzip '
+        'and brotli sizes, on payloads produced by the real catalogue and report views'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', type=int, default=None, help='Branch id (defaults to the first branch)')
+        parser.add_argument('--days', type=int, default=30, help='Report period, ending today')
+        parser.add_argument('--repeat', type=int, default=20, help='Encodes per payload and renderer')
+        parser.add_argument(
+            '--file', action='append', default=[],
+            help='Also benchmark a saved JSON response (can be given more than once)',
+        )
+
+    def _fixtures(self, branch_id, start, end):
+        """(label, url name, query params) of the payloads to render."""
+        return [
+            ('frame catalogue', 'frame-list-create', {'branch_id': branch_id, 'status': 'all'}),
+            ('lens catalogue', 'lens-list-create', {'branch_id': branch_id, 'status': 'all'}),
+            ('invoice tracking', 'invoice-tracking-report', {
+                'branch_id': branch_id, 'start_date': start, 'end_date': end,
+            }),
+            ('lens sale report', 'report-lens-sale', {'date_start': start, 'date_end': end}),
+        ]
+
+    def _fetch(self, user, url_name, params):
+        """Run the view and return the unrendered response data."""
+        path = reverse(url_name)
+        request = APIRequestFactory().get(path, params)
+        force_authenticate(request, user=user)
+        match = resolve(path)
+        response = match.func(request, *match.args, **match.kwargs)
+        if response.status_code != 200:
+            raise CommandError(f"{path} returned {response.status_code}: {response.data}")
+        return response.data
+
+    @staticmethod
+    def _time(renderer, data, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = renderer.render(data)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return output, best * 1000
+
+    def handle(self, *args, **options):
+        branch = Branch.objects.filter(id=options['branch']).first() if options['branch'] else Branch.objects.first()
+        if branch is None:
+            raise CommandError('No branch found.')
+        user = get_user_model().objects.filter(is_superuser=True).first() or get_user_model().objects.first()
+
+        end = timezone.localdate()
+        start = end - timedelta(days=options['days'])
+        payloads = [
+            (label, self._fetch(user, url_name, params))
+            for label, url_name, params in self._fixtures(branch.id, start.isoformat(), end.isoformat())
+        ]
+        for path in options['file']:
+            with open(path) as fp:
+                payloads.append((path, json.load(fp)))
+
+        self.stdout.write(
+            f"orjson {'installed' if orjson else 'missing (stdlib fallback)'}, "
+            f"brotli {'installed' if brotli else 'missing'}; best of {options['repeat']} encodes"
+        )
+        stock, fast = JSONRenderer(), FastJSONRenderer()
+        for label, data in payloads:
+            stock_output, stock_ms = self._time(stock, data, options['repeat'])
+            fast_output, fast_ms = self._time(fast, data, options['repeat'])
+            sizes = f"raw {len(fast_output)} B, gzip {len(gzip.compress(fast_output, 6))} B"
+            if brotli:
+                sizes += f", br {len(brotli.compress(fast_output, quality=5))} B"
+            self.stdout.write(
+                f"{label:<20} stdlib {stock_ms:.2f} ms, fast {fast_ms:.2f} ms, "
+                f"{'same output' if stock_output == fast_output else 'OUTPUT DIFFERS'}; {sizes}"
+            )
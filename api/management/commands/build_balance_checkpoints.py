@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Branch, CashBalanceCheckpoint
+from api.services.beforebalance_service import build_checkpoints
+
+
+class Command(BaseCommand):
+    help = 'Create the monthly running cash total checkpoints used by get_before_balance'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--branch',
+            type=int,
+            help='Only this branch id (defaults to all branches)',
+            default=None,
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Delete the existing checkpoints first and rebuild them from scratch',
+        )
+
+    def handle(self, *args, **options):
+        branches = Branch.objects.all()
+        if options['branch'] is not None:
+            branches = branches.filter(id=options['branch'])
+            if not branches.exists():
+                raise CommandError(f"Branch {options['branch']} not found.")
+
+        for branch in branches:
+            if options['rebuild']:
+                CashBalanceCheckpoint.objects.filter(branch_id=branch.id).delete()
+            created = build_checkpoints(branch.id)
+            self.stdout.write(f"{branch.branch_name} (ID: {branch.id}): {created} checkpoint(s) created")
+
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from api.models import (
+    Appointment, Branch, ChannelPayment, Expense, FrameStockHistory, Invoice, LensStockHistory,
+    Order, OrderPayment, OrderProgress, SolderingPayment,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Print the database plan (EXPLAIN) of the date-range filters the reports run, '
+        'to check they use the composite indexes rather than scanning the table.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', type=int, default=None, help='Branch id (defaults to the first branch)')
+        parser.add_argument('--days', type=int, default=30, help='Report period, ending today')
+        parser.add_argument('--only', action='append', default=[], help='Explain only queries whose name contains this')
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Run the queries and show actual row counts and timings (MySQL 8.0.18+, PostgreSQL)',
+        )
+
+    def _queries(self, branch_id, start, end):
+        period = (start, end)
+        latest_progress = OrderProgress.objects.filter(
+            order=OuterRef('pk')
+        ).order_by('-changed_at').values('progress_status')[:1]
+
+        return [
+            ('order payments by branch and date', OrderPayment.all_objects.filter(
+                branch_id=branch_id, payment_date__range=period, is_edited=False,
+            )),
+            ('channel payments by branch and date', ChannelPayment.all_objects.filter(
+                branch_id=branch_id, payment_date__range=period, is_edited=False,
+            )),
+            ('soldering payments by branch and date', SolderingPayment.objects.filter(
+                branch_id=branch_id, payment_date__range=period,
+            )),
+            ('invoices by type and date', Invoice.all_objects.filter(
+                invoice_type='factory', invoice_date__range=period, order__branch_id=branch_id,
+            )),
+            ('orders by branch and date', Order.objects.filter(
+                branch_id=branch_id, order_date__range=period,
+            )),
+            ('latest progress per order', Order.objects.filter(
+                branch_id=branch_id, invoice__invoice_type='factory',
+            ).annotate(last_status=Subquery(latest_progress))),
+            ('expenses by branch and date', Expense.objects.filter(
+                branch_id=branch_id, created_at__range=period,
+            )),
+            ('appointments by branch and date', Appointment.objects.filter(
+                branch_id=branch_id, created_at__range=period,
+            )),
+            ('frame stock history by branch and date', FrameStockHistory.objects.filter(
+                branch_id=branch_id, timestamp__range=period,
+            )),
+            ('lens stock history by branch and date', LensStockHistory.objects.filter(
+                branch_id=branch_id, timestamp__range=period,
+            )),
+        ]
+
+    def handle(self, *args, **options):
+        if options['branch']:
+            branch = Branch.objects.filter(pk=options['branch']).first()
+        else:
+            branch = Branch.objects.order_by('pk').first()
+        if branch is None:
+            raise CommandError('No branch found.')
+
+        end = timezone.now()
+        start = end - timedelta(days=options['days'])
+        explain_options = {'analyze': True} if options['analyze'] else {}
+
+        self.stdout.write(f"Branch {branch.pk} ({branch.branch_name}), last {options['days']} days, {connection.vendor}")
+        for name, queryset in self._queries(branch.pk, start, end):
+            if options['only'] and not any(part in name for part in options['only']):
+                continue
+            try:
+                plan = queryset.explain(**explain_options)
+            except ValueError as e:
+                raise CommandError(f"{connection.vendor}: {e}")
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}"))
+            self.stdout.write(plan)
@@ -1,11 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
 from api.services.finance_summary_service import DailyFinanceSummaryService
 from api.models import Branch
 from datetime import datetime
 import json
 
 class Command(BaseCommand):
-    help = 'Generate daily finance summary for all branches using current date'
+    help = (
+        'Generate daily finance summary for all branches using current date, '
+        'or recompute the cash in hand records of a date range with --from/--to'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -14,61 +19,136 @@ class Command(BaseCommand):
             help='Date for the summary in YYYY-MM-DD format (defaults to today)',
             default=None
         )
+        parser.add_argument(
+            '--from',
+            dest='from_date',
+            type=str,
+            help='Recompute DailyCashInHandRecord from this date (YYYY-MM-DD), chaining balances forward',
+            default=None
+        )
+        parser.add_argument(
+            '--to',
+            dest='to_date',
+            type=str,
+            help='Last date to recompute with --from (defaults to today)',
+            default=None
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Number of branches processed in parallel (default 1)',
+            default=1
+        )
+
+    def _parse_date(self, value):
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError("Invalid date format. Use YYYY-MM-DD.")
+
+    def _run_for_branches(self, branches, task, workers):
+        """Run `task(branch)` for every branch, returning (branch, result, error) in branch order."""
+        def run(branch):
+            try:
+                return branch, task(branch), None
+            except Exception as e:
+                return branch, None, e
+            finally:
+                if workers > 1:
+                    # Each worker thread holds its own DB connection
+                    connection.close()
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(run, branches))
+        return [run(branch) for branch in branches]
 
     def handle(self, *args, **options):
         date_str = options['date']
+        workers = max(1, options['workers'])
 
         try:
+            # Get all branches
+            branches = list(Branch.objects.all())
+
+            if not branches:
+                self.stdout.write(
+                    self.style.WARNING('No branches found in the database')
+                )
+                return
+
+            if options['from_date']:
+                self._recompute(branches, options, workers)
+                return
+
             # Parse date if provided
             date = None
             if date_str:
-                try:
-                    date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                    self.stdout.write(
-                        self.style.SUCCESS(f'Generating finance summary for all branches on date {date}')
-                    )
-                except ValueError:
-                    raise CommandError("Invalid date format. Use YYYY-MM-DD.")
+                date = self._parse_date(date_str)
+                self.stdout.write(
+                    self.style.SUCCESS(f'Generating finance summary for all branches on date {date}')
+                )
             else:
                 date = datetime.now().date()
                 self.stdout.write(
                     self.style.SUCCESS(f'Generating finance summary for all branches on current date {date}')
                 )
 
-            # Get all branches
-            branches = Branch.objects.all()
-            
-            if not branches:
+            self.stdout.write(f'Found {len(branches)} branches to process')
+
+            # Get the finance summary for each branch
+            results = self._run_for_branches(
+                branches,
+                lambda branch: DailyFinanceSummaryService.get_summary(branch_id=branch.id, date=date),
+                workers,
+            )
+            for branch, summary, error in results:
                 self.stdout.write(
-                    self.style.WARNING('No branches found in the database')
+                    self.style.SUCCESS(f'\nProcessing branch: {branch.branch_name} (ID: {branch.id})')
                 )
-                return
-
-            self.stdout.write(f'Found {branches.count()} branches to process')
-
-            # Process each branch
-            for branch in branches:
-                try:
-                    self.stdout.write(
-                        self.style.SUCCESS(f'\nProcessing branch: {branch.branch_name} (ID: {branch.id})')
-                    )
-                    
-                    # Get the finance summary for this branch
-                    summary = DailyFinanceSummaryService.get_summary(branch_id=branch.id, date=date)
-                    
-                    # Pretty print the summary
-                    self.stdout.write(f'Finance Summary for {branch.branch_name}:')
-                    self.stdout.write(json.dumps(summary, indent=2, default=str))
-                    
-                except Exception as e:
+                if error is not None:
                     self.stdout.write(
-                        self.style.ERROR(f'Error processing branch {branch.branch_name} (ID: {branch.id}): {str(e)}')
+                        self.style.ERROR(f'Error processing branch {branch.branch_name} (ID: {branch.id}): {str(error)}')
                     )
                     continue
 
+                # Pretty print the summary
+                self.stdout.write(f'Finance Summary for {branch.branch_name}:')
+                self.stdout.write(json.dumps(summary, indent=2, default=str))
+
             self.stdout.write(
-                self.style.SUCCESS(f'\nCompleted processing all {branches.count()} branches')
+                self.style.SUCCESS(f'\nCompleted processing all {len(branches)} branches')
             )
 
+        except CommandError:
+            raise
         except Exception as e:
-            raise CommandError(f'Error generating finance summaries: {str(e)}')
\ No newline at end of file
+            raise CommandError(f'Error generating finance summaries: {str(e)}')
+
+    def _recompute(self, branches, options, workers):
+        from_date = self._parse_date(options['from_date'])
+        to_date = self._parse_date(options['to_date']) if options['to_date'] else datetime.now().date()
+        if to_date < from_date:
+            raise CommandError("--to must be on or after --from.")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Recomputing cash in hand for {len(branches)} branches from {from_date} to {to_date} '
+                f'with {workers} worker(s)'
+            )
+        )
+
+        results = self._run_for_branches(
+            branches,
+            lambda branch: DailyFinanceSummaryService.recompute_range(branch.id, from_date, to_date),
+            workers,
+        )
+        for branch, days, error in results:
+            if error is not None:
+                self.stdout.write(
+                    self.style.ERROR(f'Error processing branch {branch.branch_name} (ID: {branch.id}): {str(error)}')
+                )
+            else:
+                self.stdout.write(f'{branch.branch_name} (ID: {branch.id}): {days} days written')
+
+        self.stdout.write(self.style.SUCCESS('Recompute finished'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from api.models import FrameImage, OrderImage
+from api.services.image_uploard_service import ImageProcessingService
+
+
+class Command(BaseCommand):
+    help = 'Process FrameImage/OrderImage uploads still pending (e.g. after a worker restart)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--include-failed',
+            action='store_true',
+            help='Also retry images whose previous processing attempt failed',
+        )
+
+    def handle(self, *args, **options):
+        statuses = ['pending']
+        if options['include_failed']:
+            statuses.append('failed')
+
+        for model in (FrameImage, OrderImage):
+            pks = list(
+                model.objects.filter(processing_status__in=statuses).values_list('pk', flat=True)
+            )
+            self.stdout.write(f"{model.__name__}: {len(pks)} image(s) to process")
+
+            for pk in pks:
+                ImageProcessingService.process(model._meta.label, pk)
+
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,281 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.urls import resolve, reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Branch, ExpenseSubCategory, Frame, FrameStock, Invoice, Lens, LensStock, Order, Patient
+
+# A query count above the baseline, or a median this much slower, is a regression
+SLOWDOWN_TOLERANCE = 1.2
+
+
+class QueryCounter:
+    """Database execute wrapper counting queries, with none of the debug cursor's overhead."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the hot API endpoints (order create/update, invoice search, finance summary, '
+        'reports, catalogue lists) against the current database, count their queries, and '
+        'write the results as JSON for comparing runs. Writes are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', type=int, default=None, help='Branch id (defaults to the first seeded benchmark branch)')
+        parser.add_argument('--days', type=int, default=30, help='Report period, ending today')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per endpoint, after one warm-up run')
+        parser.add_argument('--only', action='append', default=[], help='Run only benchmarks whose name contains this')
+        parser.add_argument('--output', default=None, help='Results file (default: benchmark-<timestamp>.json)')
+        parser.add_argument('--compare', default=None, help='Earlier results file to compare against')
+
+    # --- fixtures -----------------------------------------------------------
+
+    def _context(self, branch):
+        """Rows the request payloads are built from, all from `branch`."""
+        frame_stock = FrameStock.objects.filter(branch=branch, qty__gt=5).order_by('pk').first()
+        lens_stock = LensStock.objects.filter(branch=branch, qty__gt=5).order_by('pk').first()
+        patient = Patient.objects.filter(orders__branch=branch).order_by('pk').first()
+        order = (
+            Order.objects.filter(branch=branch, status='pending', on_hold=False, invoice__invoice_type='factory')
+            .order_by('-pk').first()
+        )
+        invoice = Invoice.objects.filter(order__branch=branch).order_by('-pk').first()
+        expense_category = ExpenseSubCategory.objects.order_by('pk').first()
+        if not all([frame_stock, lens_stock, patient, order, invoice, expense_category]):
+            raise CommandError(f"Branch {branch.pk} lacks stock, orders or invoices; run seed_benchmark_data first.")
+        return {
+            'frame': Frame.objects.get(pk=frame_stock.frame_id),
+            'lens': Lens.objects.get(pk=lens_stock.lens_id),
+            'patient': patient,
+            'order': order,
+            'invoice': invoice,
+            'expense_category': expense_category,
+        }
+
+    def _order_create_payload(self, branch, user, ctx):
+        frame, lens = ctx['frame'], ctx['lens']
+        total = int(frame.price + lens.price * 2)
+        return {
+            'patient_id': ctx['patient'].pk,
+            'order': {
+                'branch_id': branch.pk, 'sub_total': total, 'discount': 0, 'total_price': total,
+                'status': 'pending', 'sales_staff_code': user.pk, 'on_hold': False,
+                'invoice_type': 'factory', 'progress_status': 'received_from_customer',
+            },
+            'order_items': [
+                {'frame': frame.pk, 'quantity': 1, 'price_per_unit': int(frame.price), 'subtotal': int(frame.price)},
+                {'lens': lens.pk, 'quantity': 2, 'price_per_unit': int(lens.price), 'subtotal': int(lens.price * 2)},
+            ],
+            'order_payments': [{'amount': total // 2, 'payment_method': 'cash', 'transaction_status': 'success'}],
+        }
+
+    def _order_update_payload(self, user, order, expense_category):
+        """
+        The order as it stands, with a new remark, so no stock moves. Amounts
+        go as whole numbers: the update service mixes them with Decimals.
+        """
+        return {
+            'admin_id': user.pk,
+            'user_id': user.pk,
+            'order': {
+                'sub_total': int(order.sub_total), 'discount': int(order.discount or 0), 'total_price': int(order.total_price),
+                'status': order.status, 'on_hold': order.on_hold, 'order_remark': 'benchmark',
+                # Where a refund would be booked; the update defaults to ids 1 and 2
+                'main_category': expense_category.main_category_id, 'sub_category': expense_category.pk,
+            },
+            'order_items': [
+                {
+                    'id': item.pk, 'frame': item.frame_id, 'lens': item.lens_id, 'hearing_item': item.hearing_item_id,
+                    'quantity': item.quantity, 'price_per_unit': int(item.price_per_unit), 'subtotal': int(item.subtotal),
+                    'is_non_stock': item.is_non_stock,
+                }
+                for item in order.order_items.all()
+            ],
+            'order_payments': [
+                {'id': payment.pk, 'amount': int(payment.amount), 'payment_method': payment.payment_method}
+                for payment in order.orderpayment_set.all()
+            ],
+        }
+
+    def _cases(self, branch, user, ctx, start, end):
+        """(name, method, url name, url kwargs, query params or body) per benchmark."""
+        period = {'branch_id': branch.pk, 'start_date': start, 'end_date': end}
+        store_period = {'branch_id': branch.pk, 'date_start': start, 'date_end': end}
+        return [
+            ('order create', 'post', 'order-create', {}, self._order_create_payload(branch, user, ctx)),
+            ('order update', 'put', 'order-update', {'pk': ctx['order'].pk}, self._order_update_payload(user, ctx['order'], ctx['expense_category'])),
+            ('factory invoice search', 'get', 'factory-invoice-search', {}, {'branch_id': branch.pk}),
+            ('factory invoice search by name', 'get', 'factory-invoice-search', {}, {'patient_name': ctx['patient'].name[:4]}),
+            ('normal invoice search', 'get', 'normal-invoice-search', {}, period),
+            ('invoice number search', 'get', 'invoice-number-mini-search', {}, {'invoice_number': ctx['invoice'].invoice_number}),
+            ('invoice report', 'get', 'invoice-report', {}, {'branch_id': branch.pk, 'payment_date': end}),
+            ('invoice tracking report', 'get', 'invoice-tracking-report', {}, period),
+            ('finance summary', 'get', 'daily-finance-summary', {}, {'branch': branch.pk, 'date': end}),
+            ('daily summary', 'post', 'daily-summary', {}, {'branch_id': branch.pk, 'date': end}),
+            ('earning report', 'get', 'earning-report', {}, period),
+            ('payment summary report', 'get', 'payment-summary-report', {}, period),
+            ('payment bank report', 'get', 'payment-summary-report-detail', {}, {}),
+            ('frame sale report', 'get', 'report-frame-sale', {}, store_period),
+            ('lens sale report', 'get', 'report-lens-sale', {}, store_period),
+            ('factory order report', 'get', 'factory-order-report', {}, period),
+            ('normal order report', 'get', 'normal-order-report', {}, period),
+            ('city sales report', 'get', 'city-sales-report', {}, period),
+            ('employee history report', 'get', 'employee-history-report', {}, period),
+            ('expense report', 'get', 'expense-report', {}, period),
+            ('channel list', 'get', 'channel-list', {}, {'branch_id': branch.pk, 'date': end}),
+            ('frame catalogue', 'get', 'frame-list-create', {}, {'branch_id': branch.pk, 'status': 'all'}),
+            ('frame catalogue paginated', 'get', 'frame-paginated-list', {}, {'branch_id': branch.pk}),
+            ('lens catalogue', 'get', 'lens-list-create', {}, {'branch_id': branch.pk, 'status': 'all'}),
+            ('patient search', 'get', 'patient-list', {}, {'name': ctx['patient'].name[:4]}),
+            ('refraction list', 'get', 'refraction-list', {}, {'branch_id': branch.pk}),
+        ]
+
+    # --- running ------------------------------------------------------------
+
+    def _call(self, user, method, url_name, url_kwargs, data):
+        """One request through the view; returns (status, rendered response, queries)."""
+        path = reverse(url_name, kwargs=url_kwargs)
+        factory = APIRequestFactory()
+        if method == 'get':
+            request = factory.get(path, data)
+        else:
+            request = getattr(factory, method)(path, data, format='json')
+        force_authenticate(request, user=user)
+        match = resolve(path)
+
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            # Leave the database as it was for the next run
+            with transaction.atomic():
+                response = match.func(request, *match.args, **match.kwargs)
+                transaction.set_rollback(True)
+            response.render()
+        return response, counter.count
+
+    def _run(self, user, case, repeat):
+        name, method, url_name, url_kwargs, data = case
+        self._call(user, method, url_name, url_kwargs, data)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response, queries = self._call(user, method, url_name, url_kwargs, data)
+            timings.append((time.perf_counter() - started) * 1000)
+        return {
+            'method': method.upper(),
+            'path': reverse(url_name, kwargs=url_kwargs),
+            'status': response.status_code,
+            'queries': queries,
+            'bytes': len(response.content),
+            'min_ms': round(min(timings), 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'max_ms': round(max(timings), 3),
+            'error': response.content.decode(errors='replace')[:200] if response.status_code >= 400 else None,
+        }
+
+    @staticmethod
+    def _git_revision():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def _compare(self, results, baseline_path):
+        with open(baseline_path) as fp:
+            baseline = json.load(fp)['results']
+
+        self.stdout.write(f"\nCompared with {baseline_path}:")
+        regressions = 0
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                self.stdout.write(f"  {name:<32} new")
+                continue
+            ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else 1
+            regressed = result['queries'] > before['queries'] or ratio > SLOWDOWN_TOLERANCE
+            regressions += regressed
+            line = (
+                f"  {name:<32} median {before['median_ms']:>9.2f} -> {result['median_ms']:>9.2f} ms ({ratio:>5.2f}x)  "
+                f"queries {before['queries']:>4} -> {result['queries']:>4}"
+            )
+            self.stdout.write(self.style.ERROR(line) if regressed else line)
+        if regressions:
+            self.stdout.write(self.style.WARNING(f"{regressions} benchmark(s) slower or issuing more queries"))
+
+    def handle(self, *args, **options):
+        if options['branch']:
+            branch = Branch.objects.filter(pk=options['branch']).first()
+        else:
+            branch = (
+                Branch.objects.filter(branch_name__endswith=' Benchmark').order_by('pk').first()
+                or Branch.objects.order_by('pk').first()
+            )
+        if branch is None:
+            raise CommandError('No branch found.')
+        user = get_user_model().objects.filter(is_superuser=True, is_active=True).order_by('pk').first()
+        if user is None:
+            raise CommandError('The benchmarks run as a superuser; create one first.')
+
+        end = timezone.localdate()
+        start = end - timedelta(days=options['days'])
+        cases = self._cases(branch, user, self._context(branch), start.isoformat(), end.isoformat())
+        if options['only']:
+            cases = [case for case in cases if any(word in case[0] for word in options['only'])]
+
+        self.stdout.write(
+            f"{branch.branch_name} (id {branch.pk}), {start} to {end}, "
+            f"{connections['default'].vendor}, median of {options['repeat']} runs"
+        )
+        results = {}
+        for case in cases:
+            result = results[case[0]] = self._run(user, case, options['repeat'])
+            line = (
+                f"{case[0]:<32} {result['status']}  {result['median_ms']:>9.2f} ms  "
+                f"{result['queries']:>4} queries  {result['bytes']:>9} B"
+            )
+            if result['status'] >= 400:
+                line = self.style.ERROR(f"{line}  {result['error']}")
+            self.stdout.write(line)
+
+        output = options['output'] or f"benchmark-{timezone.now():%Y%m%d-%H%M%S}.json"
+        with open(output, 'w') as fp:
+            json.dump({
+                'meta': {
+                    'started_at': timezone.now().isoformat(),
+                    'revision': self._git_revision(),
+                    'database': connections['default'].vendor,
+                    'branch_id': branch.pk,
+                    'start_date': start.isoformat(),
+                    'end_date': end.isoformat(),
+                    'repeat': options['repeat'],
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                },
+                'results': results,
+            }, fp, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+        if options['compare']:
+            self._compare(results, options['compare'])
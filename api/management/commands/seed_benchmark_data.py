@@ -0,0 +1,552 @@
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from api.models import (
+    Appointment, AppointmentInvoiceCounter, BankAccount, Branch, Brand, ChannelPayment, Code,
+    Coating, Color, CustomUser, Doctor, DoctorBranchChannelFees, Expense, ExpenseMainCategory,
+    ExpenseSubCategory, Frame, FrameStock, FrameStockHistory, HearingItem, HearingItemStock,
+    Invoice, Lens, LensPower, LensStock, LensStockHistory, LenseType, Order, OrderItem,
+    OrderPayment, OrderProgress, OtherIncome, OtherIncomeCategory, Patient, PaymentMethodBanks,
+    Power, Refraction, RefractionDetails, SafeTransaction, Schedule, UserBranch,
+)
+from api.services.lens_uniqueness_service import LensUniquenessService
+from api.services.reference_data_cache import ReferenceDataCache
+
+BRANCH_NAME = 'B{:02d} Benchmark'
+CATALOGUE_PREFIX = 'Bench'
+
+FIRST_NAMES = [
+    'Nimal', 'Kamal', 'Sunil', 'Chamari', 'Dilani', 'Ruwan', 'Saman', 'Kumari', 'Nadeesha', 'Tharindu',
+    'Ishara', 'Pradeep', 'Anura', 'Malini', 'Gayan', 'Harsha', 'Sanduni', 'Lahiru', 'Priyanka', 'Asanka',
+]
+LAST_NAMES = [
+    'Perera', 'Fernando', 'Silva', 'Jayasinghe', 'Bandara', 'Wickramasinghe', 'Rathnayake',
+    'Gunawardena', 'Herath', 'Dissanayake', 'Senanayake', 'Kumara', 'Weerasinghe', 'Rajapaksha',
+]
+CITIES = [
+    'colombo', 'kandy', 'galle', 'matara', 'kurunegala', 'negombo', 'gampaha', 'kalutara',
+    'ratnapura', 'badulla', 'anuradhapura', 'jaffna', 'trincomalee', 'batticaloa',
+]
+EXPENSE_CATEGORIES = {
+    'Utilities': ['Electricity', 'Water', 'Telephone'],
+    'Staff': ['Salary Advance', 'Meals', 'Transport'],
+    'Office': ['Stationery', 'Cleaning', 'Repairs'],
+}
+PAYMENT_METHODS = ['cash', 'cash', 'cash', 'credit_card', 'online_transfer']
+
+# Share of orders per invoice type; frame-only orders also get a factory invoice
+ORDER_MIX = [('factory', 0.45), ('frame_only', 0.15), ('normal', 0.25), ('manual', 0.05), ('hearing', 0.10)]
+
+
+@contextmanager
+def backdated(*fields):
+    """
+    Let the listed auto_now/auto_now_add fields keep the value set on the
+    instance, so bulk-created rows can be spread over the seeded period.
+    """
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _field(model, name):
+    return model._meta.get_field(name)
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed new benchmark branches with a realistic, reproducible volume of patients, '
+        'refractions, orders, invoices, payments, appointments, stock, stock history and expenses'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--branches', type=int, default=3, help='Benchmark branches to add')
+        parser.add_argument('--days', type=int, default=180, help='Days of history, ending today')
+        parser.add_argument('--orders-per-day', type=int, default=20, help='Orders per branch and day')
+        parser.add_argument('--appointments-per-day', type=int, default=10, help='Appointments per branch and day')
+        parser.add_argument('--expenses-per-day', type=int, default=3, help='Expenses per branch and day')
+        parser.add_argument('--patients', type=int, default=3000, help='Patients per branch')
+        parser.add_argument('--frames', type=int, default=400, help='Frames in the shared benchmark catalogue')
+        parser.add_argument('--lenses', type=int, default=200, help='Lenses in the shared benchmark catalogue')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT')
+        parser.add_argument('--force', action='store_true', help='Required when DEBUG is off')
+
+    # --- helpers ------------------------------------------------------------
+
+    def _insert(self, model, objs):
+        """bulk_create that leaves the primary keys on `objs`, also on MySQL."""
+        if not objs:
+            return objs
+        manager = model._base_manager
+        if connection.features.can_return_rows_from_bulk_insert:
+            return manager.bulk_create(objs, batch_size=self.batch_size)
+
+        # Auto-increment ids of one bulk insert come out in insertion order
+        last_id = manager.aggregate(last=Max('pk'))['last'] or 0
+        manager.bulk_create(objs, batch_size=self.batch_size)
+        ids = list(manager.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True))
+        if len(ids) != len(objs):
+            raise CommandError(f"{model.__name__}: other rows were inserted while seeding; run it on an idle database.")
+        for obj, pk in zip(objs, ids):
+            obj.pk = pk
+        return objs
+
+    def _moment(self, day, start_hour=9, end_hour=18):
+        """A random aware datetime within opening hours on `day`."""
+        seconds = self.rng.randint(start_hour * 3600, end_hour * 3600 - 1)
+        naive = datetime.combine(day, time()) + timedelta(seconds=seconds)
+        return timezone.make_aware(naive)
+
+    def _money(self, low, high, step=50):
+        return Decimal(self.rng.randrange(low, high, step))
+
+    @staticmethod
+    def _named(model, name):
+        """First row of `model` with this name, created if missing (names aren't unique)."""
+        return model.objects.filter(name=name).order_by('pk').first() or model.objects.create(name=name)
+
+    def _free_branch_numbers(self, count):
+        """Branch numbers whose 3-letter invoice prefix is not used by any branch yet."""
+        used = {name[:3].upper() for name in Branch.objects.values_list('branch_name', flat=True)}
+        numbers = [n for n in range(1, 100) if BRANCH_NAME.format(n)[:3].upper() not in used]
+        if len(numbers) < count:
+            raise CommandError(f"Only {len(numbers)} free benchmark branch numbers left.")
+        return numbers[:count]
+
+    # --- shared catalogue ---------------------------------------------------
+
+    def _catalogue(self, frame_count, lens_count):
+        """Benchmark brands, frames, lenses and hearing items, created on the first run only."""
+        frame_brands = list(Brand.objects.filter(name__startswith=f'{CATALOGUE_PREFIX} Frame '))
+        if frame_brands:
+            self.stdout.write('Reusing the existing benchmark catalogue')
+        else:
+            frame_brands = self._insert(Brand, [
+                Brand(name=f'{CATALOGUE_PREFIX} Frame {n}', brand_type='frame') for n in range(1, 11)
+            ])
+            lens_brands = self._insert(Brand, [
+                Brand(name=f'{CATALOGUE_PREFIX} Lens {n}', brand_type='lens') for n in range(1, 5)
+            ])
+            colors = self._insert(Color, [Color(name=f'{CATALOGUE_PREFIX} Color {n}') for n in range(1, 13)])
+            codes_per_brand = max(1, frame_count // (len(frame_brands) * len(colors)) + 1)
+            codes = self._insert(Code, [
+                Code(brand=brand, name=f'{CATALOGUE_PREFIX}-{brand.pk}-{n:03d}')
+                for brand in frame_brands for n in range(1, codes_per_brand + 1)
+            ])
+            combinations = [(code, color) for code in codes for color in colors]
+            self._insert(Frame, [
+                Frame(
+                    brand_id=code.brand_id, code=code, color=color,
+                    brand_type=self.rng.choice(['branded', 'non_branded']),
+                    price=self._money(3000, 45000, 500),
+                    size=self.rng.choice(['48-18-140', '52-18-145', '54-17-140', '56-16-145']),
+                    species=self.rng.choice(['metal', 'plastic', 'rimless', 'half rim']),
+                )
+                for code, color in self.rng.sample(combinations, min(frame_count, len(combinations)))
+            ])
+
+            types = [self._named(LenseType, name) for name in ('Single Vision', 'Bifocal', 'Progressive')]
+            coatings = [self._named(Coating, name) for name in ('Clear', 'Blue Cut', 'Photochromic', 'Anti Glare')]
+            sph, cyl = (self._named(Power, name) for name in ('SPH', 'CYL'))
+            lenses, powers, seen = [], [], set()
+            while len(lenses) < lens_count:
+                lens_powers = [(None, sph.pk, Decimal(self.rng.randrange(-800, 625, 25)) / 100)]
+                if self.rng.random() < 0.5:
+                    lens_powers.append((None, cyl.pk, Decimal(self.rng.randrange(-400, 0, 25)) / 100))
+                lens = Lens(
+                    type=self.rng.choice(types), coating=self.rng.choice(coatings),
+                    brand=self.rng.choice(lens_brands), price=self._money(2500, 30000, 500),
+                    power_fingerprint=LensUniquenessService.get_fingerprint(lens_powers),
+                )
+                key = (lens.type.pk, lens.coating.pk, lens.brand.pk, lens.power_fingerprint)
+                if key in seen:
+                    continue
+                seen.add(key)
+                lenses.append(lens)
+                powers.append(lens_powers)
+            self._insert(Lens, lenses)
+            self._insert(LensPower, [
+                LensPower(lens=lens, side=side, power_id=power_id, value=value)
+                for lens, lens_powers in zip(lenses, powers) for side, power_id, value in lens_powers
+            ])
+            self._insert(HearingItem, [
+                HearingItem(
+                    name=f'{CATALOGUE_PREFIX} Hearing Aid {n}', price=self._money(40000, 250000, 5000),
+                    warranty='2 years', code=f'BH{n:02d}',
+                )
+                for n in range(1, 9)
+            ])
+
+        return {
+            'frames': list(Frame.objects.filter(brand__name__startswith=f'{CATALOGUE_PREFIX} Frame ').order_by('pk')),
+            'lenses': list(Lens.objects.filter(brand__name__startswith=f'{CATALOGUE_PREFIX} Lens ').order_by('pk')),
+            'hearing_items': list(HearingItem.objects.filter(name__startswith=f'{CATALOGUE_PREFIX} Hearing ').order_by('pk')),
+        }
+
+    def _reference_rows(self):
+        """Doctors and expense/income categories, shared by all benchmark branches."""
+        doctors = list(Doctor.objects.filter(name__startswith=f'{CATALOGUE_PREFIX} Dr').order_by('pk'))
+        if not doctors:
+            doctors = self._insert(Doctor, [
+                Doctor(name=f'{CATALOGUE_PREFIX} Dr {name}', specialization='Eye Surgeon')
+                for name in ('Perera', 'Silva', 'Fernando', 'Bandara')
+            ])
+
+        sub_categories = []
+        for main_name, sub_names in EXPENSE_CATEGORIES.items():
+            main = ExpenseMainCategory.objects.get_or_create(name=main_name)[0]
+            sub_categories += [
+                ExpenseSubCategory.objects.get_or_create(main_category=main, name=name)[0] for name in sub_names
+            ]
+        income_categories = [
+            OtherIncomeCategory.objects.get_or_create(name=name)[0] for name in ('Repairs', 'Scrap Sales')
+        ]
+        return doctors, sub_categories, income_categories
+
+    # --- per branch ---------------------------------------------------------
+
+    def _branch(self, number, catalogue, doctors, sub_categories, income_categories, options):
+        rng = self.rng
+        today = timezone.localdate()
+        days = [today - timedelta(days=offset) for offset in range(options['days'] - 1, -1, -1)]
+        start = self._moment(days[0], 8, 9)
+
+        branch = Branch.objects.create(
+            branch_name=BRANCH_NAME.format(number), location=rng.choice(CITIES).title(),
+            contact_one=f'011{number:07d}',
+        )
+        prefix = branch.branch_name[:3].upper()
+        BankAccount.objects.create(branch=branch, bank_name='Bench Bank', account_number=f'{number:04d}000001')
+        # Reports expect a bank on card payments only
+        banks = self._insert(PaymentMethodBanks, [
+            PaymentMethodBanks(name=f'{name} {prefix}', account_no=f'{number:04d}{n}', payment_method='credit_card', branch=branch)
+            for n, name in enumerate(['Visa', 'Master'])
+        ])
+
+        # Nobody logs in as these users; run_benchmarks authenticates directly
+        password = make_password(None)
+        staff = self._insert(CustomUser, [
+            CustomUser(
+                username=f'bench_{prefix.lower()}_{n}', mobile=f'{prefix}-bench-{n}',
+                user_code=f'{prefix}{n}', password=password, first_name=rng.choice(FIRST_NAMES),
+            )
+            for n in range(1, 6)
+        ])
+        self._insert(UserBranch, [UserBranch(user=user, branch=branch) for user in staff])
+
+        # Stock and its history
+        frame_stocks = {
+            frame.pk: FrameStock(branch=branch, frame=frame, qty=rng.randint(20, 80), limit=5)
+            for frame in catalogue['frames']
+        }
+        for stock in frame_stocks.values():
+            stock.initial_count = stock.qty
+        lens_stocks = {
+            lens.pk: LensStock(branch=branch, lens=lens, qty=rng.randint(30, 120), limit=10, created_at=start, updated_at=start)
+            for lens in catalogue['lenses']
+        }
+        for stock in lens_stocks.values():
+            stock.initial_count = stock.qty
+        self._insert(FrameStock, list(frame_stocks.values()))
+        with backdated(_field(LensStock, 'created_at'), _field(LensStock, 'updated_at')):
+            self._insert(LensStock, list(lens_stocks.values()))
+        self._insert(HearingItemStock, [
+            HearingItemStock(branch=branch, hearing_item=item, initial_count=50, qty=50, limit=2)
+            for item in catalogue['hearing_items']
+        ])
+
+        frame_history = [
+            FrameStockHistory(frame_id=frame_id, branch=branch, action='add', quantity_changed=stock.qty, timestamp=start)
+            for frame_id, stock in frame_stocks.items()
+        ]
+        lens_history = [
+            LensStockHistory(lens_id=lens_id, branch=branch, action='add', quantity_changed=stock.qty, timestamp=start)
+            for lens_id, stock in lens_stocks.items()
+        ]
+        for day in days[::7]:
+            for frame_id in rng.sample(list(frame_stocks), min(10, len(frame_stocks))):
+                frame_history.append(FrameStockHistory(
+                    frame_id=frame_id, branch=branch, action=rng.choice(['add', 'remove']),
+                    quantity_changed=rng.randint(1, 5), timestamp=self._moment(day),
+                ))
+            for lens_id in rng.sample(list(lens_stocks), min(10, len(lens_stocks))):
+                lens_history.append(LensStockHistory(
+                    lens_id=lens_id, branch=branch, action=rng.choice(['add', 'remove']),
+                    quantity_changed=rng.randint(1, 5), timestamp=self._moment(day),
+                ))
+
+        # Patients, and a refraction with details for most of them
+        patients = self._insert(Patient, [
+            Patient(
+                name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                date_of_birth=today - timedelta(days=rng.randint(5 * 365, 85 * 365)),
+                phone_number=f'07{rng.randint(10000000, 99999999)}',
+                nic=f'{rng.randint(100000000, 999999999)}V', city=rng.choice(CITIES),
+                address=f'{rng.randint(1, 400)}, Main Street',
+            )
+            for _ in range(options['patients'])
+        ])
+        refracted = rng.sample(patients, int(len(patients) * 0.8))
+        refractions = [
+            Refraction(patient=patient, branch=branch, refraction_number=str(n).zfill(3), created_at=self._moment(rng.choice(days)))
+            for n, patient in enumerate(refracted, start=1)
+        ]
+        with backdated(_field(Refraction, 'created_at')):
+            self._insert(Refraction, refractions)
+        self._insert(RefractionDetails, [
+            RefractionDetails(
+                refraction=refraction, patient=refraction.patient,
+                right_eye_dist_sph=f'{rng.randrange(-800, 625, 25) / 100:+.2f}',
+                left_eye_dist_sph=f'{rng.randrange(-800, 625, 25) / 100:+.2f}',
+                right_eye_dist_cyl=f'{rng.randrange(-400, 0, 25) / 100:+.2f}',
+                left_eye_dist_cyl=f'{rng.randrange(-400, 0, 25) / 100:+.2f}',
+                right_eye_dist_axis=str(rng.randrange(0, 180, 5)),
+                left_eye_dist_axis=str(rng.randrange(0, 180, 5)),
+            )
+            for refraction in refractions
+        ])
+        refraction_by_patient = {refraction.patient_id: refraction for refraction in refractions}
+
+        # Orders, with their items, invoices, payments and progress
+        invoice_numbers = dict.fromkeys(['factory', 'manual', 'normal', 'hearing'], 0)
+        orders, order_plans = [], []
+        kinds, weights = zip(*ORDER_MIX)
+        # Chronological, so invoice numbers grow with the date like Invoice.save() hands them out
+        for day in days:
+            for _ in range(options['orders_per_day']):
+                kind = rng.choices(kinds, weights)[0]
+                placed_at = self._moment(day)
+                patient = rng.choice(refracted if kind == 'factory' else patients)
+                items = []
+                if kind in ('factory', 'normal', 'frame_only', 'manual'):
+                    frame = rng.choice(catalogue['frames'])
+                    items.append(('frame', frame, 1, frame.price))
+                if kind in ('factory', 'normal', 'manual'):
+                    lens = rng.choice(catalogue['lenses'])
+                    items.append(('lens', lens, 2, lens.price))
+                if kind == 'hearing':
+                    hearing_item = rng.choice(catalogue['hearing_items'])
+                    items.append(('hearing_item', hearing_item, 1, hearing_item.price))
+
+                sub_total = sum(price * quantity for _, _, quantity, price in items)
+                discount = self._money(0, 1500, 100) if rng.random() < 0.3 else Decimal('0.00')
+                if (today - day).days > 14:
+                    status = 'completed'
+                else:
+                    status = rng.choice(['pending', 'processing', 'completed'])
+                orders.append(Order(
+                    customer=patient, branch=branch, order_date=placed_at, order_updated_date=placed_at,
+                    user_date=day, status=status, sub_total=sub_total, discount=discount,
+                    total_price=sub_total - discount, sales_staff_code=rng.choice(staff),
+                    refraction=refraction_by_patient.get(patient.pk) if kind == 'factory' else None,
+                    is_frame_only=kind == 'frame_only', urgent=rng.random() < 0.05,
+                    fitting_status_updated_date=placed_at,
+                ))
+                order_plans.append((kind, placed_at, items))
+
+        with backdated(_field(Order, 'order_date'), _field(Order, 'order_updated_date')):
+            self._insert(Order, orders)
+
+        order_items, invoices, payments, progress = [], [], [], []
+        daily_factory_numbers = {}
+        for order, (kind, placed_at, items) in zip(orders, order_plans):
+            for item_kind, item, quantity, price in items:
+                order_items.append(OrderItem(
+                    order=order, quantity=quantity, price_per_unit=price, subtotal=price * quantity,
+                    created_at=placed_at,
+                    user=order.sales_staff_code, **{item_kind: item},
+                ))
+
+            invoice_type = 'factory' if kind == 'frame_only' else kind
+            invoice_numbers[invoice_type] += 1
+            number = invoice_numbers[invoice_type]
+            if invoice_type == 'normal':
+                invoice_number = f'{prefix}N{number:03d}'
+            elif invoice_type == 'hearing':
+                invoice_number = f'{prefix}H{number:03d}'
+            else:
+                # Invoice.save() format: branch prefix, 5-digit counter, day of month.
+                # Manual invoices carry an extra M so they never collide with factory ones.
+                invoice_number = f"{prefix}{'M' if invoice_type == 'manual' else ''}{number:05d}{placed_at.strftime('%d')}"
+            daily_invoice_no = None
+            if invoice_type == 'factory':
+                daily_invoice_no = daily_factory_numbers[placed_at.date()] = daily_factory_numbers.get(placed_at.date(), 0) + 1
+            invoices.append(Invoice(
+                order=order, invoice_type=invoice_type, invoice_number=invoice_number,
+                daily_invoice_no=daily_invoice_no, invoice_date=placed_at,
+            ))
+
+            # Mostly paid in full on the day, some advances settled later
+            paid = Decimal('0.00')
+            instalments = [order.total_price]
+            if rng.random() < 0.35:
+                advance = (order.total_price / 2).quantize(Decimal('1'))
+                instalments = [advance, order.total_price - advance]
+                if rng.random() < 0.3:
+                    instalments = [advance]
+            for n, amount in enumerate(instalments):
+                paid_at = placed_at if n == 0 else min(placed_at + timedelta(days=rng.randint(3, 14)), timezone.now())
+                method = rng.choice(PAYMENT_METHODS)
+                paid += amount
+                payments.append(OrderPayment(
+                    order=order, branch=branch, payment_date=paid_at, amount=amount, payment_method=method,
+                    transaction_status='success', is_partial=paid < order.total_price,
+                    is_final_payment=paid == order.total_price, user=order.sales_staff_code,
+                    payment_method_bank=rng.choice(banks) if method == 'credit_card' else None,
+                    paid_branch=branch,
+                ))
+            order.total_payment = paid
+
+            if invoice_type == 'factory':
+                steps = ['received_from_customer', 'issue_to_factory', 'received_from_factory', 'issue_to_customer']
+                reached = 4 if order.status == 'completed' else rng.randint(1, 3)
+                progress += [
+                    OrderProgress(order=order, progress_status=step, changed_at=placed_at + timedelta(days=n * 2))
+                    for n, step in enumerate(steps[:reached])
+                ]
+
+        Order.all_objects.bulk_update(orders, ['total_payment'], batch_size=self.batch_size)
+        self._insert(OrderItem, order_items)
+        with backdated(_field(Invoice, 'invoice_date')):
+            self._insert(Invoice, invoices)
+        self._insert(OrderPayment, payments)
+        with backdated(_field(OrderProgress, 'changed_at')):
+            self._insert(OrderProgress, progress)
+
+        # Sold stock leaves the shelves
+        for order_item in order_items:
+            if order_item.frame_id:
+                frame_history.append(FrameStockHistory(
+                    frame_id=order_item.frame_id, branch=branch, action='remove',
+                    quantity_changed=order_item.quantity, timestamp=order_item.created_at,
+                ))
+                frame_stocks[order_item.frame_id].qty -= order_item.quantity
+            elif order_item.lens_id:
+                lens_history.append(LensStockHistory(
+                    lens_id=order_item.lens_id, branch=branch, action='remove',
+                    quantity_changed=order_item.quantity, timestamp=order_item.created_at,
+                ))
+                lens_stocks[order_item.lens_id].qty -= order_item.quantity
+        for stocks in (frame_stocks, lens_stocks):
+            for stock in stocks.values():
+                # Restocked whenever it ran out
+                stock.qty = max(stock.qty, stock.limit)
+        FrameStock.objects.bulk_update(list(frame_stocks.values()), ['qty'], batch_size=self.batch_size)
+        LensStock.objects.bulk_update(list(lens_stocks.values()), ['qty'], batch_size=self.batch_size)
+        with backdated(_field(FrameStockHistory, 'timestamp')):
+            self._insert(FrameStockHistory, frame_history)
+        with backdated(_field(LensStockHistory, 'timestamp')):
+            self._insert(LensStockHistory, lens_history)
+
+        # Channelling: one session per doctor and day, appointments numbered per session
+        fees = {
+            doctor.pk: DoctorBranchChannelFees(
+                doctor=doctor, branch=branch, doctor_fees=self._money(1500, 3000, 250), branch_fees=self._money(500, 1000, 100),
+            )
+            for doctor in doctors
+        }
+        self._insert(DoctorBranchChannelFees, list(fees.values()))
+        schedules = [
+            Schedule(doctor=doctor, branch=branch, date=day, start_time=time(16, 0), status='Booked')
+            for day in days for doctor in doctors
+        ]
+        self._insert(Schedule, schedules)
+        appointments, channel_numbers = [], {}
+        for n in range(options['appointments_per_day'] * len(days)):
+            schedule = schedules[(n * len(schedules)) // (options['appointments_per_day'] * len(days))]
+            key = (schedule.doctor_id, schedule.date)
+            channel_numbers[key] = channel_numbers.get(key, 0) + 1
+            fee = fees[schedule.doctor_id]
+            booked_at = self._moment(schedule.date, 8, 16)
+            appointments.append(Appointment(
+                doctor_id=schedule.doctor_id, patient=rng.choice(patients), schedule=schedule,
+                date=schedule.date, time=time(16, 0), amount=fee.doctor_fees + fee.branch_fees,
+                doctor_fees=fee.doctor_fees, branch_fees=fee.branch_fees, branch=branch,
+                channel_no=channel_numbers[key], invoice_number=n + 1,
+                status='Completed' if schedule.date < today else 'Confirmed',
+                is_arrived=schedule.date < today, created_at=booked_at, updated_at=booked_at,
+            ))
+        with backdated(_field(Appointment, 'created_at'), _field(Appointment, 'updated_at')):
+            self._insert(Appointment, appointments)
+        AppointmentInvoiceCounter.objects.create(branch=branch, last_invoice_number=len(appointments))
+        channel_payments = []
+        for appointment in appointments:
+            method = rng.choice(PAYMENT_METHODS)
+            channel_payments.append(ChannelPayment(
+                appointment=appointment, branch=branch, payment_date=appointment.created_at, amount=appointment.amount,
+                payment_method=method, is_final=True, created_at=appointment.created_at,
+                updated_at=appointment.created_at,
+                payment_method_bank=rng.choice(banks) if method == 'credit_card' else None,
+            ))
+        with backdated(_field(ChannelPayment, 'created_at'), _field(ChannelPayment, 'updated_at')):
+            self._insert(ChannelPayment, channel_payments)
+
+        # Expenses, safe movements and other income
+        expenses = []
+        for day in days:
+            for _ in range(options['expenses_per_day']):
+                sub_category = rng.choice(sub_categories)
+                source = rng.choice(['cash', 'cash', 'safe', 'bank'])
+                expenses.append(Expense(
+                    branch=branch, main_category_id=sub_category.main_category_id, sub_category=sub_category,
+                    amount=self._money(200, 8000), paid_source=source, paid_from_safe=source == 'safe',
+                    note=sub_category.name, created_at=self._moment(day),
+                ))
+        with backdated(_field(Expense, 'created_at')):
+            self._insert(Expense, expenses)
+        with backdated(_field(SafeTransaction, 'date'), _field(SafeTransaction, 'created_at')):
+            self._insert(SafeTransaction, [
+                SafeTransaction(
+                    branch=branch, transaction_type='expense', amount=expense.amount, expense=expense,
+                    reason=expense.note, date=timezone.localtime(expense.created_at).date(), created_at=expense.created_at,
+                )
+                for expense in expenses if expense.paid_source == 'safe'
+            ])
+        with backdated(_field(OtherIncome, 'date'), _field(OtherIncome, 'created_at'), _field(OtherIncome, 'updated_at')):
+            self._insert(OtherIncome, [
+                OtherIncome(
+                    branch=branch, category=rng.choice(income_categories), amount=self._money(500, 5000),
+                    date=moment, created_at=moment, updated_at=moment,
+                )
+                for moment in (self._moment(day) for day in days[::3])
+            ])
+
+        return {
+            'branch': branch.branch_name, 'patients': len(patients), 'refractions': len(refractions),
+            'orders': len(orders), 'order items': len(order_items), 'payments': len(payments),
+            'appointments': len(appointments), 'expenses': len(expenses),
+        }
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('DEBUG is off; pass --force if this really is a benchmark database.')
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        with transaction.atomic():
+            catalogue = self._catalogue(options['frames'], options['lenses'])
+            doctors, sub_categories, income_categories = self._reference_rows()
+            for number in self._free_branch_numbers(options['branches']):
+                counts = self._branch(number, catalogue, doctors, sub_categories, income_categories, options)
+                self.stdout.write(', '.join(f'{value} {label}' if label != 'branch' else value for label, value in counts.items()))
+
+        # Bulk inserts send no post_save signals
+        for model in ReferenceDataCache.MODELS:
+            ReferenceDataCache.bump(model)
+        self.stdout.write(self.style.SUCCESS(f"Seeded {options['branches']} benchmark branch(es) with seed {options['seed']}."))
@@ -3,7 +3,7 @@ from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
 from api.models import Patient
-from api.services.send_sms_service import SMSService
+from api.services.sms_outbox_service import SMSOutboxService
 
 
 class Command(BaseCommand):
@@ -30,11 +30,9 @@ class Command(BaseCommand):
         ]
 
         try:
-            results = SMSService.send_sms_by_template_type('birthday', recipients)
-            sent = sum(1 for r in results if r.get('status') == 'sent')
-            failed = len(results) - sent
+            outbox_ids = SMSOutboxService.enqueue_by_template_type('birthday', recipients)
             self.stdout.write(self.style.SUCCESS(
-                f"Done. Sent: {sent}, Failed/Error: {failed}. All attempts logged to SMSLog."
+                f"Done. Queued: {len(outbox_ids)}. Sent by send_sms_outbox, attempts logged to SMSLog."
             ))
         except ValidationError as e:
             self.stdout.write(self.style.ERROR(f"No active birthday SMS template found: {e}"))
@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.services.sms_outbox_service import SMSOutboxService
+
+
+class Command(BaseCommand):
+    help = 'Send queued SMS from the outbox, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'SMS_OUTBOX_BATCH_SIZE', 50),
+            help='Rows claimed per batch',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=getattr(settings, 'SMS_OUTBOX_CONCURRENCY', 4),
+            help='Maximum SMS requests in flight at once',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=getattr(settings, 'SMS_OUTBOX_MAX_ATTEMPTS', 5),
+            help='Attempts before a message is marked failed',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the outbox instead of exiting once it is drained',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds between polls with --loop',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            totals = SMSOutboxService.drain(
+                batch_size=max(1, options['batch_size']),
+                concurrency=max(1, options['concurrency']),
+                max_attempts=max(1, options['max_attempts']),
+            )
+            if totals['sent'] or totals['failed'] or not options['loop']:
+                self.stdout.write(f"Sent: {totals['sent']}, Failed: {totals['failed']}")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -1,5 +1,36 @@
 from django.db import models
 
-class SoftDeleteManager(models.Manager):
+from .services.time_zone_convert_service import TimezoneConverterService
+
+
+class LocalDateQuerySet(models.QuerySet):
+    """
+    Filters on local calendar days as plain range comparisons on the
+    datetime column. A `field__date` lookup wraps the column in
+    DATE(CONVERT_TZ(...)) on MySQL, which rules out an index range scan.
+    """
+
+    def on_local_day(self, field, day):
+        """Rows whose `field` falls on local calendar day `day`."""
+        return self.in_local_range(field, day, day)
+
+    def in_local_range(self, field, start=None, end=None):
+        """
+        Rows whose `field` falls on local days start..end, both inclusive.
+        Either end may be None to leave that side open.
+        """
+        lookups = {}
+        if start:
+            lookups[f'{field}__gte'] = TimezoneConverterService.local_day_start(start)
+        if end:
+            lookups[f'{field}__lt'] = TimezoneConverterService.local_day_bounds(end)[1]
+        return self.filter(**lookups)
+
+
+class LocalDateManager(models.Manager.from_queryset(LocalDateQuerySet)):
+    pass
+
+
+class SoftDeleteManager(LocalDateManager):
     def get_queryset(self):
         return super().get_queryset().filter(is_deleted=False)
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+
+# Content types worth compressing; images, archives and other binary
+# formats are already encoded and only cost CPU to gzip again
+COMPRESSIBLE_TYPES = {
+    "application/json", "application/javascript", "application/xml", "image/svg+xml",
+}
+
+
+def is_compressible(response):
+    content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+    return (
+        content_type.startswith("text/")
+        or content_type in COMPRESSIBLE_TYPES
+        or content_type.endswith(("+json", "+xml"))
+    )
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that only compresses text-like content types, leaves
+    responses under RESPONSE_COMPRESSION_MIN_SIZE bytes alone and prefers
+    brotli when it is installed and the client accepts it. Streaming text
+    responses are gzipped exactly as before.
+    """
+
+    def process_response(self, request, response):
+        if not is_compressible(response):
+            return response
+        if not response.streaming and len(response.content) < settings.RESPONSE_COMPRESSION_MIN_SIZE:
+            return response
+
+        if (
+            brotli is None
+            or response.streaming
+            or response.has_header("Content-Encoding")
+            or not re_accepts_brotli.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        # Return the compressed content only if it's actually shorter.
+        compressed_content = brotli.compress(response.content, quality=settings.RESPONSE_BROTLI_QUALITY)
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers["Content-Length"] = str(len(response.content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+
+        return response
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.16 on 2026-10-19 01:29
+
+import api.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_alter_bankaccount_account_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='frameimage',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='frameimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to=api.models.FrameImage.get_upload_path),
+        ),
+        migrations.AddField(
+            model_name='orderimage',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='orderimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to=api.models.OrderImage.get_upload_path),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.16 on 2026-10-19 01:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_image_processing_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentInvoiceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_invoice_number', models.IntegerField(default=0)),
+                ('branch', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='appointment_invoice_counter', to='api.branch')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AppointmentChannelCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('last_channel_no', models.IntegerField(default=0)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='channel_counters', to='api.branch')),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='channel_counters', to='api.doctor')),
+            ],
+            options={
+                'unique_together': {('doctor', 'branch', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-19 01:39
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_appointment_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CashInHandDirtyDate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('branch_id', models.IntegerField(unique=True)),
+                ('dirty_from', models.DateField()),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.16 on 2026-10-19 01:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_cash_in_hand_dirty_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CashBalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('branch_id', models.IntegerField()),
+                ('month', models.DateField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('branch_id', 'month')},
+            },
+        ),
+    ]
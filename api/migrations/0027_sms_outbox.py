@@ -0,0 +1,37 @@
+# Generated by Django 4.2.16 on 2026-10-19 01:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_cash_balance_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SMSOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch_id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False)),
+                ('mobile_number', models.CharField(max_length=15)),
+                ('message', models.TextField()),
+                ('source_address', models.CharField(blank=True, max_length=11, null=True)),
+                ('template_type', models.CharField(blank=True, max_length=30, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('template', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='outbox', to='api.smstemplate')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='api_smsoutb_status_623f44_idx')],
+            },
+        ),
+    ]
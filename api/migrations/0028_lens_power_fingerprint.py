@@ -0,0 +1,55 @@
+# Generated by Django 4.2.16 on 2026-10-19 01:50
+
+import hashlib
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_power_fingerprints(apps, schema_editor):
+    """
+    Same hash as LensUniquenessService.get_fingerprint. Existing duplicates
+    keep a NULL fingerprint (the oldest lens of each set gets it) so the
+    unique constraint can be created; they can be merged or retired later.
+    """
+    Lens = apps.get_model('api', 'Lens')
+    LensPower = apps.get_model('api', 'LensPower')
+
+    powers = {}
+    for lens_id, side, power_id, value in LensPower.objects.values_list('lens_id', 'side', 'power_id', 'value'):
+        powers.setdefault(lens_id, []).append(
+            (side or '', power_id, str(Decimal(str(value)).quantize(Decimal('0.01'))))
+        )
+
+    seen = set()
+    lenses = []
+    for lens in Lens.objects.order_by('id').only('id', 'type_id', 'coating_id', 'brand_id'):
+        payload = ';'.join(f"{side}|{power_id}|{value}" for side, power_id, value in sorted(powers.get(lens.id, [])))
+        fingerprint = hashlib.sha256(payload.encode()).hexdigest()
+        key = (lens.type_id, lens.coating_id, lens.brand_id, fingerprint)
+        if key in seen:
+            continue
+        seen.add(key)
+        lens.power_fingerprint = fingerprint
+        lenses.append(lens)
+    Lens.objects.bulk_update(lenses, ['power_fingerprint'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_sms_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lens',
+            name='power_fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_power_fingerprints, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='lens',
+            constraint=models.UniqueConstraint(fields=('type', 'coating', 'brand', 'power_fingerprint'), name='unique_lens_power_set'),
+        ),
+    ]
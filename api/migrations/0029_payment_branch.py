@@ -0,0 +1,45 @@
+# Generated by Django 4.2.16 on 2026-10-19 02:06
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_payment_branches(apps, schema_editor):
+    """Copy each payment's order/appointment branch, one UPDATE per table."""
+    for payment_model, parent_model, parent_field in (
+        ('OrderPayment', 'Order', 'order_id'),
+        ('ChannelPayment', 'Appointment', 'appointment_id'),
+        ('SolderingPayment', 'SolderingOrder', 'order_id'),
+    ):
+        Payment = apps.get_model('api', payment_model)
+        Parent = apps.get_model('api', parent_model)
+        Payment.objects.update(branch_id=Subquery(
+            Parent.objects.filter(pk=OuterRef(parent_field)).values('branch_id')[:1]
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0028_lens_power_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='channelpayment',
+            name='branch',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='channel_payments', to='api.branch'),
+        ),
+        migrations.AddField(
+            model_name='orderpayment',
+            name='branch',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_branch_payments', to='api.branch'),
+        ),
+        migrations.AddField(
+            model_name='solderingpayment',
+            name='branch',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='soldering_payments', to='api.branch'),
+        ),
+        migrations.RunPython(backfill_payment_branches, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.16 on 2026-10-19 02:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Composite indexes for the (branch, date range) filters of the reports."""
+
+    dependencies = [
+        ('api', '0029_payment_branch'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['branch', 'created_at'], name='api_appoint_branch__9a16d1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='channelpayment',
+            index=models.Index(fields=['branch', 'payment_date'], name='api_channel_branch__b1f37e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['branch', 'created_at'], name='api_expense_branch__de3dc3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='framestockhistory',
+            index=models.Index(fields=['branch', 'timestamp'], name='api_framest_branch__7dd118_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['invoice_type', 'invoice_date'], name='api_invoice_invoice_1128ca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lensstockhistory',
+            index=models.Index(fields=['branch', 'timestamp'], name='api_lenssto_branch__0f64b3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['branch', 'order_date', 'is_deleted'], name='api_order_branch__929760_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderpayment',
+            index=models.Index(fields=['branch', 'payment_date'], name='api_orderpa_branch__eb3e50_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderprogress',
+            index=models.Index(fields=['order', 'changed_at'], name='api_orderpr_order_i_73b3e9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solderingpayment',
+            index=models.Index(fields=['branch', 'payment_date'], name='api_solderi_branch__b1bd7b_idx'),
+        ),
+    ]
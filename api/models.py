@@ -7,14 +7,94 @@ from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.db import transaction
 from django.db.models import Max,Sum,Q
-from .managers import SoftDeleteManager
+from .managers import LocalDateManager, SoftDeleteManager
 from django.db import IntegrityError
 from django.utils.timezone import now
-from .services.image_uploard_service import compress_image_to_webp
+from .services.image_uploard_service import ImageProcessingService, ImageRenditionService
 import uuid
 import os
-from django.db.models.functions import TruncDate
+from django.db.models.functions import TruncDate, Least
 from decimal import Decimal
+
+class DirtyFieldsMixin:
+    """
+    Remembers the field values a row was loaded with, so save() can tell
+    what changed without re-reading the row, and writes only those columns
+    (plus auto_now fields) when no explicit update_fields is given.
+
+    So a save() that changed nothing issues no query and sends no
+    post_save, and saving a row deleted since it was loaded raises
+    DatabaseError (as any update_fields save does) instead of inserting it
+    again.
+    """
+
+    def _snapshot_loaded_values(self, attnames=None):
+        if attnames is None:
+            attnames = [f.attname for f in self._meta.concrete_fields if f.attname in self.__dict__]
+        loaded = getattr(self, '_loaded_values', None) or {}
+        loaded.update({name: self.__dict__[name] for name in attnames if name in self.__dict__})
+        self._loaded_values = loaded
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_loaded_values(field_names)
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        attnames = None
+        if fields is not None:
+            attnames = [self._meta.get_field(name).attname for name in fields]
+        self._snapshot_loaded_values(attnames)
+
+    @property
+    def has_loaded_values(self):
+        return bool(getattr(self, '_loaded_values', None)) and not self._state.adding
+
+    def get_loaded_value(self, field_name):
+        return self._loaded_values.get(self._meta.get_field(field_name).attname)
+
+    def _is_dirty(self, attname):
+        # Deferred fields that were never assigned are not in __dict__
+        if attname not in self.__dict__:
+            return False
+        loaded = getattr(self, '_loaded_values', None) or {}
+        return attname not in loaded or self.__dict__[attname] != loaded[attname]
+
+    def has_changed(self, field_name):
+        return self._is_dirty(self._meta.get_field(field_name).attname)
+
+    @property
+    def changed_fields(self):
+        """Names of the fields assigned since load whose value differs from the database row."""
+        return {f.name for f in self._meta.concrete_fields if self._is_dirty(f.attname)}
+
+    def save(self, *args, **kwargs):
+        narrow = (
+            not args
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+            and self.has_loaded_values
+        )
+        if narrow:
+            changed = self.changed_fields - {self._meta.pk.name}
+            if not changed:
+                return
+            auto_now = {
+                f.name for f in self._meta.concrete_fields
+                if getattr(f, 'auto_now', False)
+            }
+            kwargs['update_fields'] = changed | auto_now
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self._snapshot_loaded_values()
+        else:
+            # Fields left out of update_fields are still dirty
+            self._snapshot_loaded_values([self._meta.get_field(name).attname for name in update_fields])
+
 class Item(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
@@ -304,7 +384,14 @@ class FrameImage(models.Model):
         # This will create a path like: frame_images/<uuid>/<filename>
         return f'frame_images/{instance.uuid}/{filename}'
         
+    PROCESSING_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
     image = models.ImageField(upload_to=get_upload_path)
+    thumbnail = models.ImageField(upload_to=get_upload_path, null=True, blank=True)
+    processing_status = models.CharField(max_length=10, choices=PROCESSING_STATUS_CHOICES, default='ready')
     uploaded_at = models.DateTimeField(auto_now_add=True)
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     
@@ -316,14 +403,21 @@ class FrameImage(models.Model):
         if not self.uuid:
             self.uuid = uuid.uuid4()
             
-        # Handle image conversion and compression
-        if self.image and hasattr(self.image, 'file') and not str(self.image).endswith('.webp'):
-            new_image = compress_image_to_webp(self.image)
-            if new_image:
-                self.image.save(new_image.name, new_image, save=False)
+        # Store the upload as-is; WebP conversion and the thumbnail are
+        # produced by ImageProcessingService after the transaction commits
+        is_new_upload = bool(self.image) and not self.image._committed
+        if is_new_upload:
+            self.processing_status = 'pending'
+            self.thumbnail = None
         super().save(*args, **kwargs)
+        if is_new_upload:
+            ImageProcessingService.schedule(self)
     
     def delete(self, *args, **kwargs):
+        if self.thumbnail:
+            self.thumbnail.delete(save=False)
+        ImageRenditionService.delete_renditions(self.image)
+
         # Store the image path and folder before deletion
         if self.image:
             image_path = self.image.path if hasattr(self.image, 'path') else None
@@ -354,7 +448,14 @@ class OrderImage(models.Model):
         # This will create a path like: order_images/<uuid>/<filename>
         return f'order_images/{instance.uuid}/{filename}'
         
+    PROCESSING_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
     image = models.ImageField(upload_to=get_upload_path)
+    thumbnail = models.ImageField(upload_to=get_upload_path, null=True, blank=True)
+    processing_status = models.CharField(max_length=10, choices=PROCESSING_STATUS_CHOICES, default='ready')
     order = models.ForeignKey('Order', related_name='order_images', on_delete=models.CASCADE)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
@@ -367,12 +468,15 @@ class OrderImage(models.Model):
         if not self.uuid:
             self.uuid = uuid.uuid4()
             
-        # Handle image conversion and compression
-        if self.image and hasattr(self.image, 'file') and not str(self.image).endswith('.webp'):
-            new_image = compress_image_to_webp(self.image)
-            if new_image:
-                self.image.save(new_image.name, new_image, save=False)
+        # Store the upload as-is; WebP conversion and the thumbnail are
+        # produced by ImageProcessingService after the transaction commits
+        is_new_upload = bool(self.image) and not self.image._committed
+        if is_new_upload:
+            self.processing_status = 'pending'
+            self.thumbnail = None
         super().save(*args, **kwargs)
+        if is_new_upload:
+            ImageProcessingService.schedule(self)
 
 class Frame(models.Model):
     BRAND_CHOICES = (
@@ -430,6 +534,11 @@ class FrameStockHistory(models.Model):
     # performed_by = models.ForeignKey(CustomUser,related_name='stock_histories',on_delete=models.CASCADE, null=True, blank=True)
     # note = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'timestamp']),
+        ]
+
     def __str__(self):
         return f"{self.action.upper()} {self.quantity_changed} of {self.frame} at {self.branch}"
 class LensStockHistory(models.Model):
@@ -451,6 +560,11 @@ class LensStockHistory(models.Model):
     # performed_by = models.ForeignKey(CustomUser, related_name='lens_stock_histories', on_delete=models.CASCADE, null=True, blank=True)
     # note = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'timestamp']),
+        ]
+
     def __str__(self):
         return f"{self.action.upper()} {self.quantity_changed} of {self.lens} at {self.branch}"
 class LenseType(models.Model):
@@ -480,9 +594,19 @@ class Lens(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     is_active = models.BooleanField(default=True)
     initial_branch = models.ForeignKey(Branch, related_name='initial_lense', on_delete=models.CASCADE, null=True, blank=True) 
+    # Hash of the sorted (side, power, value) set, see LensUniquenessService
+    power_fingerprint = models.CharField(max_length=64, null=True, blank=True, editable=False)
 
     def __str__(self):
         return f"{self.type.name} - {self.coating.name} - ${self.price}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['type', 'coating', 'brand', 'power_fingerprint'],
+                name='unique_lens_power_set'
+            )
+        ]
     
 class LensStock(models.Model):
     lens = models.ForeignKey(Lens, related_name='stocks', on_delete=models.CASCADE)
@@ -543,7 +667,7 @@ class LensCleanerStock(models.Model):
     def __str__(self):
         return f"{self.lens_cleaner.name} - Qty: {self.qty} - Branch: {self.branch.branch_name if self.branch else 'N/A'}"
     
-class Order(models.Model):
+class Order(DirtyFieldsMixin, models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('processing', 'Processing'),
@@ -615,7 +739,12 @@ class Order(models.Model):
     fitting_status = models.CharField(max_length=20, choices=FITTING_CHOICES, default='Pending')
     fitting_status_updated_date = models.DateTimeField(null=True, blank=True)
     objects = SoftDeleteManager()      # Only active records
-    all_objects = models.Manager() 
+    all_objects = LocalDateManager() 
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'order_date', 'is_deleted']),
+        ]
 
     def __str__(self):
         return f"Order {self.id} - Status: {self.status} - Customer: {self.customer.id}"
@@ -626,14 +755,28 @@ class Order(models.Model):
         self.save()
     def save(self, *args, **kwargs):
         if self.pk:
-            # Fetch the original from the database
-            orig = Order.all_objects.filter(pk=self.pk).first()
+            if self.has_loaded_values:
+                # Compare against the values the row was loaded with
+                fitting_status_changed = self.has_changed('fitting_status')
+                issued_by_changed = self.has_changed('issued_by')
+            else:
+                # Built by hand with a pk; fetch the original from the database
+                orig = Order.all_objects.filter(pk=self.pk).values('fitting_status', 'issued_by_id').first()
+                fitting_status_changed = bool(orig) and orig['fitting_status'] != self.fitting_status
+                issued_by_changed = bool(orig) and orig['issued_by_id'] != self.issued_by_id
+
+            stamped = []
             # Only update the timestamp if status actually changed
-            if orig and orig.fitting_status != self.fitting_status:
+            if fitting_status_changed:
                 self.fitting_status_updated_date = timezone.now()
-               # If issued_by was previously None and is now set, or issued_by changes
-            if orig and orig.issued_by != self.issued_by and self.issued_by is not None:
+                stamped.append('fitting_status_updated_date')
+            # If issued_by was previously None and is now set, or issued_by changes
+            if issued_by_changed and self.issued_by_id is not None:
                 self.issued_date = timezone.now()
+                stamped.append('issued_date')
+
+            if stamped and kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | set(stamped)
         else:
             # On create, set timestamp if not already set
             if not self.fitting_status_updated_date:
@@ -688,6 +831,9 @@ class OrderProgress(models.Model):
     changed_at = models.DateTimeField(auto_now_add=True)
     class Meta:
         ordering = ['changed_at']
+        indexes = [
+            models.Index(fields=['order', 'changed_at']),
+        ]
     
     def __str__(self):
         return f"Order {self.order.id} - {self.progress_status} at {self.changed_at}"
@@ -709,7 +855,7 @@ class ArrivalStatus(models.Model):
     def __str__(self):
         return f"Order {self.order.id} - {self.arrival_status} at {self.created_at}"
 
-class MntOrder(models.Model):
+class MntOrder(DirtyFieldsMixin, models.Model):
     order = models.ForeignKey(
         Order, on_delete=models.CASCADE, related_name='mnt_orders'
     )  # Links to the original factory order
@@ -799,7 +945,7 @@ class ExternalLens(models.Model):
         verbose_name = "External Lens"
         verbose_name_plural = "External Lenses"
 
-class Invoice(models.Model):
+class Invoice(DirtyFieldsMixin, models.Model):
     INVOICE_TYPES = [
         ('factory', 'Factory Invoice'),  # Linked to an order with refraction
         ('manual', 'Manual Invoice'),  # Linked to an order without refraction
@@ -814,7 +960,7 @@ class Invoice(models.Model):
     is_deleted = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
     objects = SoftDeleteManager()
-    all_objects = models.Manager()
+    all_objects = LocalDateManager()
 
     
 
@@ -823,6 +969,9 @@ class Invoice(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["invoice_number"], name="unique_invoice_number")
         ]
+        indexes = [
+            models.Index(fields=['invoice_type', 'invoice_date']),
+        ]
     
     
     def delete(self, using=None, keep_parents=False):
@@ -921,7 +1070,7 @@ class OtherItem(models.Model):
     
 class OrderItem(models.Model):
     objects = SoftDeleteManager()
-    all_objects = models.Manager()
+    all_objects = LocalDateManager()
     order = models.ForeignKey(Order, related_name='order_items', on_delete=models.CASCADE)
     lens = models.ForeignKey(Lens, null=True, blank=True, on_delete=models.SET_NULL, related_name='order_items')
     external_lens = models.ForeignKey(ExternalLens, null=True, blank=True, on_delete=models.SET_NULL, related_name='order_items')
@@ -950,7 +1099,7 @@ class OrderItem(models.Model):
     )
     created_at = models.DateTimeField(default=timezone.now)
     objects = SoftDeleteManager()
-    all_objects = models.Manager()
+    all_objects = LocalDateManager()
 
     def save(self, *args, **kwargs):
        # Dynamically calculate subtotal on save
@@ -979,7 +1128,7 @@ class OrderItemWhatsAppLog(models.Model):
 
 class OrderPayment(models.Model):
     objects = SoftDeleteManager()
-    all_objects = models.Manager()
+    all_objects = LocalDateManager()
     PAYMENT_METHOD_CHOICES = [
         ('credit_card', 'Credit Card'),
         ('cash', 'Cash'),
@@ -1019,6 +1168,22 @@ class OrderPayment(models.Model):
         null=True,
         blank=True 
     )
+    # Copy of order.branch (paid_branch is where it was paid), so branch reports skip the Order join
+    branch = models.ForeignKey(
+        Branch, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        db_index=False, related_name='order_branch_payments'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'payment_date']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.branch_id is None and self.order_id:
+            self.branch_id = self.order.branch_id
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Payment for Order {self.order.id} - Amount: {self.amount}"
 
@@ -1072,7 +1237,7 @@ class Schedule(models.Model):
     deleted_at = models.DateTimeField(null=True, blank=True)
 
     objects = SoftDeleteManager()      # Only active records
-    all_objects = models.Manager() 
+    all_objects = LocalDateManager() 
 
     def delete(self, using=None, keep_parents=False):
         self.is_deleted = True
@@ -1119,9 +1284,12 @@ class Appointment(models.Model):
     is_arrived = models.BooleanField(default=False)
     arrival_time = models.DateTimeField(null=True, blank=True)
     objects = SoftDeleteManager()      # Only active records
-    all_objects = models.Manager() 
+    all_objects = LocalDateManager() 
     class Meta:
         unique_together = ('branch', 'invoice_number')
+        indexes = [
+            models.Index(fields=['branch', 'created_at']),
+        ]
 
     def delete(self, using=None, keep_parents=False):
         self.is_deleted = True
@@ -1129,19 +1297,11 @@ class Appointment(models.Model):
         self.save()
 
     def save(self, *args, **kwargs):
-        if self.invoice_number is None and self.branch:
-            for _ in range(5):  # retry up to 5 times
-                try:
-                    with transaction.atomic():
-                        # Use all_objects to include soft-deleted records
-                        max_id = Appointment.all_objects.select_for_update().filter(
-                            branch=self.branch
-                        ).aggregate(Max('invoice_number'))['invoice_number__max']
-                        self.invoice_number = (max_id or 0) + 1
-                        super().save(*args, **kwargs)
-                    break
-                except IntegrityError:
-                    continue
+        if self.invoice_number is None and self.branch_id:
+            with transaction.atomic():
+                # Locks only this branch's counter row, not its appointments
+                self.invoice_number = AppointmentInvoiceCounter.allocate(self.branch_id)
+                super().save(*args, **kwargs)
         else:
             super().save(*args, **kwargs)
 
@@ -1179,8 +1339,23 @@ class ChannelPayment(models.Model):
         blank=True,
         related_name='channel_order_payments'
     ) 
+    # Copy of appointment.branch, so branch reports skip the Appointment join
+    branch = models.ForeignKey(
+        Branch, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        db_index=False, related_name='channel_payments'
+    )
     objects = SoftDeleteManager()      # Only active records
-    all_objects = models.Manager() 
+    all_objects = LocalDateManager() 
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'payment_date']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.branch_id is None and self.appointment_id:
+            self.branch_id = self.appointment.branch_id
+        super().save(*args, **kwargs)
 
     def delete(self, using=None, keep_parents=False):
         self.is_deleted = True
@@ -1190,6 +1365,90 @@ class ChannelPayment(models.Model):
     def __str__(self):
         return f"Payment for {self.appointment.id} - {self.amount} ({self.payment_method})"
     
+class AppointmentChannelCounter(models.Model):
+    """Last channel number handed out per doctor, branch and day."""
+    doctor = models.ForeignKey('Doctor', on_delete=models.CASCADE, related_name='channel_counters')
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='channel_counters')
+    date = models.DateField()
+    last_channel_no = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('doctor', 'branch', 'date')
+
+    @classmethod
+    def _get_locked(cls, doctor_id, branch_id, date):
+        # A new counter starts after the numbers already used that day
+        lookup = {'doctor_id': doctor_id, 'branch_id': branch_id, 'date': date}
+        return _get_locked_counter(
+            cls, lookup,
+            seed=lambda: {'last_channel_no': Appointment.all_objects.filter(**lookup).aggregate(
+                last=Max('channel_no'))['last'] or 0},
+        )
+
+    @classmethod
+    def allocate(cls, doctor_id, branch_id, date, count=1):
+        """
+        Reserve `count` consecutive channel numbers and return the first one.
+        Must run inside a transaction; the counter row stays locked until commit.
+        """
+        counter = cls._get_locked(doctor_id, branch_id, date)
+        first = counter.last_channel_no + 1
+        counter.last_channel_no += count
+        counter.save(update_fields=['last_channel_no'])
+        return first
+
+    @classmethod
+    def reserve_up_to(cls, doctor_id, branch_id, date, channel_no):
+        """Make sure future allocations start after an externally assigned number."""
+        counter = cls._get_locked(doctor_id, branch_id, date)
+        if counter.last_channel_no < channel_no:
+            counter.last_channel_no = channel_no
+            counter.save(update_fields=['last_channel_no'])
+
+    def __str__(self):
+        return f"Doctor {self.doctor_id} @ Branch {self.branch_id} on {self.date}: {self.last_channel_no}"
+
+class AppointmentInvoiceCounter(models.Model):
+    """Last appointment invoice number handed out per branch."""
+    branch = models.OneToOneField(Branch, on_delete=models.CASCADE, related_name='appointment_invoice_counter')
+    last_invoice_number = models.IntegerField(default=0)
+
+    @classmethod
+    def allocate(cls, branch_id, count=1):
+        """
+        Reserve `count` consecutive invoice numbers and return the first one.
+        Must run inside a transaction; the counter row stays locked until commit.
+        """
+        lookup = {'branch_id': branch_id}
+        counter = _get_locked_counter(
+            cls, lookup,
+            # Include soft-deleted appointments, their numbers stay taken
+            seed=lambda: {'last_invoice_number': Appointment.all_objects.filter(**lookup).aggregate(
+                last=Max('invoice_number'))['last'] or 0},
+        )
+        first = counter.last_invoice_number + 1
+        counter.last_invoice_number += count
+        counter.save(update_fields=['last_invoice_number'])
+        return first
+
+    def __str__(self):
+        return f"Branch {self.branch_id}: {self.last_invoice_number}"
+
+def _get_locked_counter(model, lookup, seed):
+    """
+    Fetch a counter row with SELECT ... FOR UPDATE, creating it from `seed()`
+    on first use. A concurrent first insert loses on the unique key and then
+    waits on the winner's row lock.
+    """
+    counter = model.objects.select_for_update().filter(**lookup).first()
+    if counter is not None:
+        return counter
+    try:
+        with transaction.atomic():
+            return model.objects.create(**lookup, **seed())
+    except IntegrityError:
+        return model.objects.select_for_update().get(**lookup)
+
 class OtherItemStock(models.Model):
     branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name="other_item_stocks", null=True, blank=True)
     other_item = models.ForeignKey(OtherItem, on_delete=models.CASCADE, related_name="stocks")
@@ -1248,6 +1507,13 @@ class Expense(models.Model):
     is_refund=models.BooleanField(default=False)
     order_refund = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='expense_refunds', null=True, blank=True)
 
+    objects = LocalDateManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'created_at']),
+        ]
+
 class ExpenseReturn(models.Model):
     SOURCE_CHOICES = [
     ('safe', 'Safe'),
@@ -1372,7 +1638,7 @@ class SolderingOrder(models.Model):
     deleted_at = models.DateTimeField(null=True, blank=True)
 
     objects = SoftDeleteManager()      # Only active payments
-    all_objects = models.Manager()     # Include soft-deleted
+    all_objects = LocalDateManager()     # Include soft-deleted
 
     def __str__(self):
         return f"Soldering Order #{self.id} for {self.patient}"
@@ -1397,7 +1663,7 @@ class SolderingInvoice(models.Model):
     deleted_at = models.DateTimeField(null=True, blank=True)
 
     objects = SoftDeleteManager()      # Only active payments
-    all_objects = models.Manager()     # Include soft-deleted
+    all_objects = LocalDateManager()     # Include soft-deleted
 
     def __str__(self):
         return f"Invoice #{self.invoice_number}"
@@ -1429,8 +1695,23 @@ class SolderingPayment(models.Model):
         blank=True,
         related_name='soldering_order_payments'
     ) 
+    # Copy of order.branch, so branch reports skip the SolderingOrder join
+    branch = models.ForeignKey(
+        'Branch', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        db_index=False, related_name='soldering_payments'
+    )
     objects = SoftDeleteManager()      # Only active payments
-    all_objects = models.Manager()     # Include soft-deleted
+    all_objects = LocalDateManager()     # Include soft-deleted
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'payment_date']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.branch_id is None and self.order_id:
+            self.branch_id = self.order.branch_id
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Payment #{self.id} - Order #{self.order.id}"
@@ -1445,6 +1726,57 @@ class DailyCashInHandRecord(models.Model):
     def __str__(self):
         return f"Branch {self.branch_id} - {self.date}: {self.cash_in_hand}"
 
+class CashInHandDirtyDate(models.Model):
+    """
+    Earliest day per branch whose DailyCashInHandRecord is stale because a
+    cash-affecting row was written with an older date. Everything from
+    `dirty_from` onwards is rebuilt by DailyFinanceSummaryService.recompute_dirty.
+    """
+    branch_id = models.IntegerField(unique=True)
+    dirty_from = models.DateField()
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    @classmethod
+    def mark(cls, branch_id, date):
+        """Move the branch's dirty date back to `date` if it is earlier."""
+        values = {
+            'dirty_from': Least('dirty_from', models.Value(date, output_field=models.DateField())),
+            'updated_at': timezone.now(),
+        }
+        if cls.objects.filter(branch_id=branch_id).update(**values):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(branch_id=branch_id, dirty_from=date)
+        except IntegrityError:
+            cls.objects.filter(branch_id=branch_id).update(**values)
+
+    def __str__(self):
+        return f"Branch {self.branch_id} dirty from {self.dirty_from}"
+
+class CashBalanceCheckpoint(models.Model):
+    """
+    Running cash total of a branch (cash payments and other income minus
+    cash expenses) for everything before the first day of `month`.
+    Built by the build_balance_checkpoints command, read by
+    beforebalance_service.get_before_balance.
+    """
+    branch_id = models.IntegerField()
+    month = models.DateField()  # always the 1st of the month
+    balance = models.DecimalField(max_digits=14, decimal_places=2)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('branch_id', 'month')
+
+    @classmethod
+    def invalidate(cls, branch_id, date):
+        """Drop the checkpoints whose totals include `date`."""
+        cls.objects.filter(branch_id=branch_id, month__gt=date).delete()
+
+    def __str__(self):
+        return f"Branch {self.branch_id} before {self.month}: {self.balance}"
+
 #//! HEARING
 class HearingItem(models.Model):
     name = models.CharField(max_length=255, unique=True)
@@ -1575,4 +1907,39 @@ class SMSLog(models.Model):
         ordering = ['-sent_at']
 
     def __str__(self):
-        return f"SMS to {self.mobile_number} [{self.status}] at {self.sent_at}"
\ No newline at end of file
+        return f"SMS to {self.mobile_number} [{self.status}] at {self.sent_at}"
+
+class SMSOutbox(models.Model):
+    """
+    SMS queued for delivery. Rows are written in the same transaction as the
+    change that triggers them and sent by the `send_sms_outbox` worker, which
+    records every attempt in SMSLog.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        SENDING = 'sending', 'Sending'
+        SENT    = 'sent',    'Sent'
+        FAILED  = 'failed',  'Failed'
+
+    batch_id       = models.UUIDField(default=uuid.uuid4, db_index=True, editable=False)
+    mobile_number  = models.CharField(max_length=15)
+    message        = models.TextField()
+    source_address = models.CharField(max_length=11, null=True, blank=True)
+    template       = models.ForeignKey(SMSTemplate, null=True, blank=True, on_delete=models.SET_NULL, related_name='outbox')
+    template_type  = models.CharField(max_length=30, null=True, blank=True)
+
+    status          = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts        = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error      = models.TextField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at    = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"Outbox SMS to {self.mobile_number} [{self.status}]"
@@ -3,6 +3,7 @@ from django.db.models import Sum
 from django.db import models
 from rest_framework.exceptions import ValidationError
 import os
+from .services.image_uploard_service import ImageRenditionService
 from .models import (
     Branch,Refraction,RefractionDetails,RefractionDetailsAuditLog,
     Brand,Color,Code,Frame,
@@ -153,20 +154,31 @@ class CodeSerializer(serializers.ModelSerializer):
 class FrameImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = FrameImage
-        fields = ['id', 'image', 'uploaded_at']
+        fields = ['id', 'image', 'thumbnail', 'processing_status', 'uploaded_at']
+        read_only_fields = ['thumbnail', 'processing_status']
 class OrderImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
     
     class Meta:
         model = OrderImage
-        fields = ['id', 'order', 'image', 'image_url', 'uploaded_at', 'uuid']
-        read_only_fields = ['uploaded_at', 'uuid']
+        fields = ['id', 'order', 'image', 'image_url', 'thumbnail_url', 'processing_status', 'uploaded_at', 'uuid']
+        read_only_fields = ['uploaded_at', 'uuid', 'processing_status']
     
     def get_image_url(self, obj):
         if obj.image:
+            size = ImageRenditionService.get_size_hint(self.context)
+            if size:
+                return ImageRenditionService.get_rendition_url('order', obj, size)
             return obj.image.url
         return None
 
+    def get_thumbnail_url(self, obj):
+        # Thumbnail appears once background processing has finished
+        if obj.thumbnail:
+            return obj.thumbnail.url
+        return None
+
 class FrameSerializer(serializers.ModelSerializer):
     # Read-only display fields
     brand_name = serializers.CharField(source='brand.name', read_only=True)
@@ -179,6 +191,7 @@ class FrameSerializer(serializers.ModelSerializer):
 
     # For API consumers
     image_url = serializers.SerializerMethodField()
+    image_processing_status = serializers.CharField(source='image.processing_status', read_only=True, default=None)
 
     # Image input options (one of the three)
     image_file = serializers.ImageField(write_only=True, required=False)
@@ -197,7 +210,7 @@ class FrameSerializer(serializers.ModelSerializer):
             'price', 'size', 'species', 'brand_type', 'brand_type_display',
             'is_active',
             'image_file', 'uploaded_url', 'image_id',  # image input options
-            'image_url',  # read-only image access
+            'image_url', 'image_processing_status',  # read-only image access
             'initial_branch',
         ]
 
@@ -264,8 +277,12 @@ class FrameSerializer(serializers.ModelSerializer):
                 
                 return None
 
-            # Now safely get the URL
-            image_url = obj.image.image.url
+            # Now safely get the URL; a size hint points at the cached rendition
+            size = ImageRenditionService.get_size_hint(self.context)
+            if size:
+                image_url = ImageRenditionService.get_rendition_url('frame', obj.image, size)
+            else:
+                image_url = obj.image.image.url
 
             if image_url.startswith(('http://', 'https://')):
                 return image_url
@@ -652,7 +669,11 @@ class OrderSerializer(serializers.ModelSerializer):
     mnt_order = serializers.SerializerMethodField()
     
     def get_mnt_order(self, obj):
-        mnt_order = obj.mnt_orders.first()  # Get the first MNT order if exists
+        # Prefetched by OrderReadService when available
+        if hasattr(obj, 'prefetched_mnt_orders'):
+            mnt_order = obj.prefetched_mnt_orders[0] if obj.prefetched_mnt_orders else None
+        else:
+            mnt_order = obj.mnt_orders.first()  # Get the first MNT order if exists
         if mnt_order:
             return {
                 'id': mnt_order.id,
@@ -673,10 +694,16 @@ class OrderSerializer(serializers.ModelSerializer):
         return OrderItemSerializer(items, many=True).data
     
     def get_order_payments(self, obj):
-        payments = obj.orderpayment_set.filter(is_deleted=False)
+        if hasattr(obj, 'prefetched_payments'):
+            payments = obj.prefetched_payments
+        else:
+            payments = obj.orderpayment_set.filter(is_deleted=False)
         return OrderPaymentSerializer(payments, many=True).data
     def get_progress_status(self, obj):
-        last_status = obj.order_progress_status.order_by('-changed_at').first()
+        if hasattr(obj, 'prefetched_progress'):
+            last_status = obj.prefetched_progress[0] if obj.prefetched_progress else None
+        else:
+            last_status = obj.order_progress_status.order_by('-changed_at').first()
         if last_status:
             return OrderProgressSerializer(last_status).data
         return None
@@ -993,14 +1020,23 @@ class ChannelListSerializer(serializers.ModelSerializer):
             'arrival_time'
         ]
 
+    # total_paid, first_payment_amount and balance come from
+    # ChannelReadService.with_payment_totals when the queryset has them
+
     def get_first_payment(self, obj):
+        if hasattr(obj, 'first_payment_amount'):
+            return obj.first_payment_amount
         first_payment = obj.payments.first()  # Assuming related_name='payments' for ChannelPayment
         return first_payment.amount if first_payment else None
     
     def get_total_payment(self, obj):
+        if hasattr(obj, 'total_paid'):
+            return obj.total_paid or 0
         return obj.payments.aggregate(total=Sum('amount'))['total'] or 0
     
     def get_balance(self, obj):
+        if hasattr(obj, 'balance'):
+            return obj.balance
         total_paid = self.get_total_payment(obj)
         total_fee = obj.amount or 0  # or obj.amount, depending on your field naming
         return total_fee - total_paid
@@ -1020,8 +1056,8 @@ class AppointmentDetailSerializer(serializers.ModelSerializer):
             'status', 'amount', 'channel_no', 'payments','invoice_number','note','created_at','doctor_fees','branch_fees'
         ]
     def get_payments(self, obj):
-        """Fetch all related payments for this appointment."""
-        payments = ChannelPayment.objects.filter(appointment=obj)  # Related payments
+        """Related payments for this appointment, from the prefetch when the view made one."""
+        payments = obj.payments.all()
         return ChannelPaymentSerializer(payments, many=True).data 
         
 # class OtherItemSerializer(serializers.ModelSerializer):
@@ -1607,7 +1643,7 @@ class SolderingInvoiceSerializer(serializers.ModelSerializer):
 class SolderingPaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = SolderingPayment
-        fields = '__all__'
+        exclude = ['branch']
 
 class SolderingRepaymentInputSerializer(serializers.Serializer):
     order_id = serializers.IntegerField()
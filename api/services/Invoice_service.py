@@ -3,6 +3,7 @@ from django.db.models import Max
 from ..models import Invoice, RefractionDetails
 from rest_framework.exceptions import NotFound
 from ..serializers import InvoiceSerializer,RefractionDetailsSerializer
+from .order_read_service import OrderReadService
 from rest_framework.exceptions import ValidationError
 from django.db.models import OuterRef, Subquery
 from .time_zone_convert_service import TimezoneConverterService
@@ -53,11 +54,9 @@ class InvoiceService:
         """
         try:
             # ✅ Fetch the invoice, order, and refraction
-            invoice = (
-                Invoice.objects
-                .select_related('order__refraction')  # ✅ Load related refraction
-                .get(order_id=order_id)
-            )
+            invoice = OrderReadService.with_invoice_read_graph(
+                Invoice.objects.all()
+            ).get(order_id=order_id)
 
             # ✅ Manually fetch refraction_details using refraction_id
             refraction_details = RefractionDetails.objects.filter(refraction=invoice.order.refraction).first()
@@ -227,9 +226,7 @@ class InvoiceService:
             if is_frame_only is not None:
                 filters["order__is_frame_only"] = int(is_frame_only)
 
-            invoice = Invoice.all_objects.select_related(
-                "order__customer", "order__refraction"
-            ).get(**filters)
+            invoice = OrderReadService.get_invoice_queryset().get(**filters)
 
             return InvoiceSerializer(invoice).data
 
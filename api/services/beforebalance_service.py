@@ -1,38 +1,96 @@
-from django.db.models import Sum
+from django.db.models import Sum, Min
+from django.utils import timezone
+from datetime import datetime
 from decimal import Decimal
-from ..models import OrderPayment, ChannelPayment, OtherIncome, Expense,SolderingPayment
+from ..models import OrderPayment, ChannelPayment, OtherIncome, Expense,SolderingPayment,CashBalanceCheckpoint
+from .time_zone_convert_service import TimezoneConverterService
+
+
+def _next_month(month):
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def _sum(queryset):
+    return queryset.aggregate(total=Sum('amount'))['total'] or Decimal("0.00")
+
+
+def _cash_querysets(branch_id):
+    """(queryset, datetime field, sign) for every row that moves the running cash total."""
+    return (
+        (OrderPayment.objects.filter(branch_id=branch_id, payment_method="cash"), 'payment_date', 1),
+        (ChannelPayment.objects.filter(branch_id=branch_id, payment_method="cash"), 'payment_date', 1),
+        (OtherIncome.objects.filter(branch_id=branch_id), 'date', 1),
+        (SolderingPayment.objects.filter(branch_id=branch_id, payment_method="cash"), 'payment_date', 1),
+        (Expense.objects.filter(branch_id=branch_id, paid_source="cash"), 'created_at', -1),
+    )
+
+
+def get_cash_total(branch_id, start=None, end=None):
+    """
+    Cash income minus cash expenses between the aware datetimes [start, end).
+    Plain range filters on the raw columns, so the date indexes are usable.
+    """
+    total = Decimal("0.00")
+    for queryset, field, sign in _cash_querysets(branch_id):
+        if start is not None:
+            queryset = queryset.filter(**{f'{field}__gte': start})
+        if end is not None:
+            queryset = queryset.filter(**{f'{field}__lt': end})
+        total += sign * _sum(queryset)
+    return total
+
 
 def get_before_balance(branch_id, date):
     # Sum all order payments, channel payments, other income, soldering, minus all expenses,
-    # for ALL days BEFORE the given date.
-    order_total = OrderPayment.objects.filter(
-        order__branch_id=branch_id,
-        payment_date__date__lt=date,
-        payment_method="cash"
-    ).aggregate(total=Sum('amount'))['total'] or Decimal("0.00")
-
-    channel_total = ChannelPayment.objects.filter(
-        appointment__branch_id=branch_id,
-        payment_date__date__lt=date,
-        payment_method="cash"
-    ).aggregate(total=Sum('amount'))['total'] or Decimal("0.00")
-
-    other_income = OtherIncome.objects.filter(
+    # for ALL days BEFORE the given date: nearest month checkpoint + the rest of that month.
+    if isinstance(date, datetime):
+        date = date.date()
+
+    checkpoint = CashBalanceCheckpoint.objects.filter(
         branch_id=branch_id,
-        date__lt=date,
-    ).aggregate(total=Sum('amount'))['total'] or Decimal("0.00")
+        month__lte=date,
+    ).order_by('-month').first()
+
+    end = TimezoneConverterService.local_day_start(date)
+    if checkpoint is None:
+        return get_cash_total(branch_id, end=end)
+    return checkpoint.balance + get_cash_total(branch_id, start=TimezoneConverterService.local_day_start(checkpoint.month), end=end)
 
-    soldering_income = SolderingPayment.objects.filter(
-        order__branch_id=branch_id,
-        payment_date__date__lt=date,
-        payment_method="cash"
-    ).aggregate(total=Sum('amount'))['total'] or Decimal("0.00")
 
-    expenses = Expense.objects.filter(
+def build_checkpoints(branch_id, until=None):
+    """
+    Create the missing month checkpoints of a branch up to the month of
+    `until` (default today), continuing from the latest one still valid.
+    Returns the number of checkpoints created.
+    """
+    until_month = (until or timezone.localdate()).replace(day=1)
+
+    latest = CashBalanceCheckpoint.objects.filter(
         branch_id=branch_id,
-        created_at__date__lt=date,
-        paid_source="cash"
-    ).aggregate(total=Sum('amount'))['total'] or Decimal("0.00")
+        month__lte=until_month,
+    ).order_by('-month').first()
+
+    new_checkpoints = []
+    if latest is not None:
+        month, balance = latest.month, latest.balance
+    else:
+        firsts = [
+            queryset.aggregate(first=Min(field))['first']
+            for queryset, field, _ in _cash_querysets(branch_id)
+        ]
+        firsts = [value for value in firsts if value is not None]
+        if not firsts:
+            return 0
+        # Nothing happened before the first activity month
+        month, balance = timezone.localtime(min(firsts)).date().replace(day=1), Decimal("0.00")
+        new_checkpoints.append(CashBalanceCheckpoint(branch_id=branch_id, month=month, balance=balance))
+
+    while month < until_month:
+        next_month = _next_month(month)
+        balance += get_cash_total(branch_id, start=TimezoneConverterService.local_day_start(month), end=TimezoneConverterService.local_day_start(next_month))
+        new_checkpoints.append(CashBalanceCheckpoint(branch_id=branch_id, month=next_month, balance=balance))
+        month = next_month
 
-    before_balance = (order_total + channel_total + other_income + soldering_income) - expenses
-    return before_balance
+    # A concurrent run computes the same values; keep whichever landed first
+    CashBalanceCheckpoint.objects.bulk_create(new_checkpoints, ignore_conflicts=True)
+    return len(new_checkpoints)
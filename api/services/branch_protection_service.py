@@ -1,8 +1,8 @@
 # services/branch_protections_service.py
 
 from rest_framework.exceptions import ValidationError
-from django.shortcuts import get_object_or_404
-from api.models import Branch  # Import your Branch model
+from django.http import Http404
+from .reference_data_cache import ReferenceDataCache
 
 class BranchProtectionsService:
     
@@ -16,5 +16,7 @@ class BranchProtectionsService:
             raise ValidationError("current branch  can not identifyed  ")
         
         # Check if the branch exists in the database
-        branch = get_object_or_404(Branch, id=branch_id)
+        branch = ReferenceDataCache.get_branch(branch_id)
+        if branch is None:
+            raise Http404("No Branch matches the given query.")
         return branch
@@ -0,0 +1,163 @@
+from decimal import Decimal
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_time
+from ..models import (
+    Appointment, AppointmentChannelCounter, AppointmentInvoiceCounter,
+    ChannelPayment, Patient, Schedule,
+)
+from .reference_data_cache import ReferenceDataCache
+
+
+class ChannelBookingService:
+    """
+    Books channel appointments in bulk for one doctor, branch and day.
+
+    Channel and invoice numbers come from the per-(doctor, branch, date) and
+    per-branch counters, so a batch of N bookings reserves both ranges with
+    two locked row updates instead of one lock per appointment.
+    """
+
+    PAYMENT_METHODS = {choice for choice, _ in ChannelPayment.PAYMENT_METHOD_CHOICES}
+
+    @staticmethod
+    def _to_decimal(value, field):
+        try:
+            return Decimal(str(value))
+        except Exception:
+            raise ValueError(f"Invalid value for {field}: {value}")
+
+    @staticmethod
+    @transaction.atomic
+    def book_bulk(doctor_id, branch_id, channel_date, bookings, defaults=None):
+        """
+        bookings: [{
+            "patient_id", "time", "note"?,
+            "channeling_fee"?, "doctor_fees"?, "branch_fees"?,   # fall back to `defaults`
+            "payments": [{"amount", "payment_method", "payment_method_bank"?}]
+        }]
+        Returns (appointments, payments) in the order of `bookings`.
+        """
+        defaults = defaults or {}
+        if not bookings:
+            raise ValueError("At least one appointment is required.")
+
+        # Step 1: Validate patients and time slots up front
+        patient_ids = {b.get('patient_id') for b in bookings}
+        if None in patient_ids:
+            raise ValueError("patient_id is required for every appointment.")
+        found = set(Patient.objects.filter(id__in=patient_ids).values_list('id', flat=True))
+        missing = {int(pid) for pid in patient_ids} - found
+        if missing:
+            raise ValueError(f"Patients not found: {sorted(missing)}")
+
+        if isinstance(channel_date, str):
+            channel_date = parse_date(channel_date)
+        if channel_date is None:
+            raise ValueError("Invalid channel_date.")
+
+        times = [
+            parse_time(b['time']) if isinstance(b.get('time'), str) else b.get('time')
+            for b in bookings
+        ]
+        if None in times:
+            raise ValueError("A valid time is required for every appointment.")
+        if len(set(times)) != len(times):
+            raise ValueError("Each appointment in a batch needs its own time slot.")
+
+        slot_filter = dict(doctor_id=doctor_id, branch_id=branch_id, date=channel_date, start_time__in=times)
+        booked = Schedule.objects.filter(status='Booked', **slot_filter).values_list('start_time', flat=True)
+        if booked:
+            raise ValueError(f"Time slots already booked: {sorted(str(t) for t in booked)}")
+
+        # Step 2: Reuse available schedules, create the missing ones in one insert
+        schedules = {
+            s.start_time: s
+            for s in Schedule.objects.select_for_update().filter(status='Available', **slot_filter)
+        }
+        new_schedules = [
+            Schedule(doctor_id=doctor_id, branch_id=branch_id, date=channel_date, start_time=t, status='Available')
+            for t in times if t not in schedules
+        ]
+        if new_schedules:
+            Schedule.objects.bulk_create(new_schedules)
+            # MySQL bulk inserts don't return ids
+            schedules = {
+                s.start_time: s
+                for s in Schedule.objects.filter(status='Available', **slot_filter)
+            }
+
+        # Step 3: Reserve channel and invoice numbers for the whole batch
+        first_channel_no = AppointmentChannelCounter.allocate(doctor_id, branch_id, channel_date, len(bookings))
+        first_invoice_no = AppointmentInvoiceCounter.allocate(branch_id, len(bookings))
+
+        # Step 4: Create appointments
+        appointments = []
+        for index, (booking, slot_time) in enumerate(zip(bookings, times)):
+            appointments.append(Appointment(
+                doctor_id=doctor_id,
+                patient_id=booking['patient_id'],
+                schedule=schedules[slot_time],
+                branch_id=branch_id,
+                date=channel_date,
+                time=slot_time,
+                status=Appointment.StatusChoices.PENDING,
+                note=booking.get('note', ''),
+                amount=ChannelBookingService._to_decimal(
+                    booking.get('channeling_fee', defaults.get('channeling_fee')), 'channeling_fee'),
+                doctor_fees=ChannelBookingService._to_decimal(
+                    booking.get('doctor_fees', defaults.get('doctor_fees', 0)), 'doctor_fees'),
+                branch_fees=ChannelBookingService._to_decimal(
+                    booking.get('branch_fees', defaults.get('branch_fees', 0)), 'branch_fees'),
+                channel_no=first_channel_no + index,
+                invoice_number=first_invoice_no + index,
+            ))
+        Appointment.objects.bulk_create(appointments)
+
+        # (branch, invoice_number) is unique, use it to pick up the new ids
+        invoice_numbers = [a.invoice_number for a in appointments]
+        ids = dict(
+            Appointment.all_objects.filter(branch_id=branch_id, invoice_number__in=invoice_numbers)
+            .values_list('invoice_number', 'id')
+        )
+        for appointment in appointments:
+            appointment.id = ids[appointment.invoice_number]
+
+        # Step 5: Payments (banks come from the reference cache; ids may be strings)
+        now = timezone.now()
+        payments = []
+        for booking, appointment in zip(bookings, appointments):
+            total_paid = Decimal('0')
+            rows = []
+            for payment in booking.get('payments', []):
+                method = payment.get('payment_method')
+                if method not in ChannelBookingService.PAYMENT_METHODS:
+                    raise ValueError(f"Invalid payment method: {method}")
+                bank_id = payment.get('payment_method_bank')
+                bank = ReferenceDataCache.get_bank(bank_id) if bank_id else None
+                if bank_id and bank is None:
+                    raise ValueError(f"Payment method bank {bank_id} does not exist.")
+                amount = ChannelBookingService._to_decimal(payment.get('amount'), 'amount')
+                total_paid += amount
+                rows.append(ChannelPayment(
+                    appointment=appointment,
+                    branch_id=appointment.branch_id,  # bulk_create skips save()
+                    amount=amount,
+                    payment_method=method,
+                    payment_method_bank=bank,
+                    payment_date=now,
+                    is_final=False,
+                ))
+
+            if total_paid > appointment.amount:
+                raise ValueError(f"Total payments exceed the channeling fee for patient {appointment.patient_id}.")
+            if rows and total_paid == appointment.amount:
+                rows[-1].is_final = True
+            payments.extend(rows)
+
+        ChannelPayment.objects.bulk_create(payments)
+
+        # Step 6: Mark all used schedules as booked
+        Schedule.objects.filter(id__in=[a.schedule_id for a in appointments]).update(status='Booked')
+
+        return appointments, payments
@@ -7,7 +7,7 @@ from ..models import Appointment
 from ..models import Expense
 from ..serializers import ExpenseSerializer
 from django.db.models import Sum
-from ..models import PaymentMethodBanks
+from .reference_data_cache import ReferenceDataCache
 class ChannelPaymentService:
     @staticmethod
     def create_repayment(appointment, amount, method, payment_method_bank=None, payment_date=None):
@@ -34,10 +34,7 @@ class ChannelPaymentService:
         # Convert payment_method_bank ID to instance if needed
         bank_instance = None
         if payment_method_bank:
-            try:
-                bank_instance = PaymentMethodBanks.objects.get(id=payment_method_bank)
-            except PaymentMethodBanks.DoesNotExist:
-                bank_instance = None
+            bank_instance = ReferenceDataCache.get_bank(payment_method_bank)
 
         print("Bank instance:", bank_instance)
         print("Raw payment_method_bank value:", payment_method_bank)
@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from ..models import Appointment, ChannelPayment
+
+
+class ChannelReadService:
+    """
+    Querysets for rendering channel (appointment) listings without per-row
+    queries. ChannelListSerializer reads the `total_paid`,
+    `first_payment_amount` and `balance` annotations when present.
+    """
+
+    @staticmethod
+    def with_payment_totals(queryset):
+        """Annotate an Appointment queryset with its (non-deleted) payment totals."""
+        payments = ChannelPayment.objects.filter(appointment=OuterRef('pk'))
+        money = DecimalField(max_digits=10, decimal_places=2)
+        return queryset.annotate(
+            total_paid=Coalesce(
+                Subquery(
+                    payments.order_by().values('appointment').annotate(total=Sum('amount')).values('total'),
+                    output_field=money,
+                ),
+                Value(Decimal('0')),
+                output_field=money,
+            ),
+            first_payment_amount=Subquery(payments.order_by('id').values('amount')[:1], output_field=money),
+        ).annotate(
+            balance=Coalesce(F('amount'), Value(Decimal('0')), output_field=money) - F('total_paid'),
+        )
+
+    @staticmethod
+    def get_list_queryset():
+        """Base queryset for ChannelListSerializer, including soft-deleted channels."""
+        return ChannelReadService.with_payment_totals(
+            Appointment.all_objects.select_related('doctor', 'patient', 'branch')
+        )
@@ -1,115 +1,142 @@
-from datetime import datetime
-from django.db.models import Sum, Q, F
-from api.models import Appointment, ChannelPayment, PaymentMethodBanks
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.db.models import Sum, Q, Value, DecimalField
+from django.db.models.functions import Coalesce
+from api.models import Appointment, ChannelPayment
 from ..services.time_zone_convert_service import TimezoneConverterService
+from ..services.reference_data_cache import ReferenceDataCache
 
 class ChannelReportService:
 
+    METHOD_COLUMNS = {
+        'cash': 'amount_cash',
+        'credit_card': 'amount_credit_card',
+        'online_transfer': 'amount_online',
+    }
+
+    @staticmethod
+    def _get_day_range(payment_date):
+        start_datetime, end_datetime = TimezoneConverterService.format_date_with_timezone(payment_date, None)
+        if start_datetime is None:
+            raise ValueError("Invalid payment date format. Use YYYY-MM-DD.")
+        return start_datetime, end_datetime
+
+    @staticmethod
+    def _get_branch_bank_names(branch_id):
+        # Active credit card banks of the branch, each gets its own column
+        names = [bank.name for bank in ReferenceDataCache.get_branch_banks(branch_id, 'credit_card')]
+        return list(dict.fromkeys(names))
+
+    @staticmethod
+    def _get_report_queryset(start_datetime, end_datetime, branch_id, bank_names):
+        """
+        One row per appointment with its payment totals, in a single query.
+
+        Appointments are included when created, deleted or refunded on the day,
+        or when they received a payment that day. Payments count towards an
+        appointment if the appointment belongs to the day, or if they were
+        paid that day. Soft-deleted rows are included on both sides.
+        """
+        day = (start_datetime, end_datetime)
+        in_day = (
+            Q(created_at__range=day) |
+            Q(deleted_at__range=day) |
+            Q(refunded_at__range=day)
+        )
+        paid_in_day = ChannelPayment.all_objects.filter(
+            payment_date__range=day,
+            branch_id=branch_id
+        ).values('appointment_id')
+
+        counted = in_day | Q(payments__payment_date__range=day)
+        zero = Value(Decimal('0.00'), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+        def total(condition=Q()):
+            return Coalesce(Sum('payments__amount', filter=counted & condition), zero)
+
+        annotations = {
+            column: total(Q(payments__payment_method=method))
+            for method, column in ChannelReportService.METHOD_COLUMNS.items()
+        }
+        annotations['total_paid'] = total()
+        for index, bank_name in enumerate(bank_names):
+            annotations[f'bank_{index}'] = total(Q(payments__payment_method_bank__name=bank_name))
+
+        return (
+            Appointment.all_objects
+            .filter(in_day | Q(id__in=paid_in_day), branch_id=branch_id)
+            .annotate(**annotations)
+            .values(
+                'id', 'channel_no', 'invoice_number', 'amount',
+                'is_deleted', 'is_refund', 'created_at', 'deleted_at', 'refunded_at',
+                *annotations.keys()
+            )
+            .order_by('id')
+        )
+
+    @staticmethod
+    def _build_row(row, bank_names):
+        total_due = float(row['amount'])  # channeling_fee
+        total_paid = float(row['total_paid'])
+        result = {
+            "channel_id": row['id'],
+            "channel_no": row['channel_no'],
+            "invoice_number": row['invoice_number'],
+            "amount_cash": float(row['amount_cash']),
+            "amount_credit_card": float(row['amount_credit_card']),
+            "amount_online": float(row['amount_online']),
+            "total_paid": total_paid,
+            "total_due": total_due,
+            "balance": total_due - total_paid,
+            'appointment_id': row['id'],
+            'is_deleted': row['is_deleted'],
+            'is_refund': row['is_refund'],
+            'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+            'deleted_at': row['deleted_at'].isoformat() if row['deleted_at'] else None,
+            'refunded_at': row['refunded_at'].isoformat() if row['refunded_at'] else None,
+        }
+        for index, bank_name in enumerate(bank_names):
+            result[bank_name] = float(row[f'bank_{index}'])
+        return result
+
     @staticmethod
     def get_channel_payments_by_date_and_branch(payment_date, branch_id):
         """
         Fetch and summarize all channel payments on a specific date and branch.
         Includes soft-deleted, refunded appointments, and appointments with 0 payments.
         """
+        start_datetime, end_datetime = ChannelReportService._get_day_range(payment_date)
+        bank_names = ChannelReportService._get_branch_bank_names(branch_id)
+
+        rows = ChannelReportService._get_report_queryset(start_datetime, end_datetime, branch_id, bank_names)
+        return [ChannelReportService._build_row(row, bank_names) for row in rows]
 
-        # Step 1: Get appointments created on this date or deleted/refunded on this date
+    @staticmethod
+    def iter_channel_payments_by_range(start_date, end_date, branch_id):
+        """
+        Yield the daily report rows for every day from start_date to end_date
+        (inclusive), each tagged with its `date`. Rows are fetched one day at
+        a time with a server-side cursor so long ranges can be streamed.
+        """
         try:
-            start_datetime, end_datetime = TimezoneConverterService.format_date_with_timezone(payment_date, None)
-            
-            # Get all appointments that match the date criteria
-            appointments = Appointment.all_objects.filter(
-                Q(created_at__range=(start_datetime, end_datetime)) | 
-                Q(deleted_at__range=(start_datetime, end_datetime)) |
-                Q(refunded_at__range=(start_datetime, end_datetime)),
-                branch_id=branch_id
-            )
-            
-            # Get all payments for these appointments or payments made on this date
-            payments = ChannelPayment.all_objects.filter(
-                Q(payment_date__range=(start_datetime, end_datetime)) | 
-                Q(appointment__in=appointments),
-                appointment__branch_id=branch_id
-            ).select_related('appointment', 'payment_method_bank')
-            
-        except (ValueError, TypeError) as e:
-            raise ValueError("Invalid payment date format. Use YYYY-MM-DD.")
+            day = datetime.strptime(start_date, '%Y-%m-%d').date()
+            last_day = datetime.strptime(end_date, '%Y-%m-%d').date()
+        except (ValueError, TypeError):
+            raise ValueError("Invalid date format. Use YYYY-MM-DD.")
+        if last_day < day:
+            raise ValueError("end_date must be on or after the start date.")
+
+        bank_names = ChannelReportService._get_branch_bank_names(branch_id)
+
+        def rows():
+            current = day
+            while current <= last_day:
+                start_datetime, end_datetime = ChannelReportService._get_day_range(current.isoformat())
+                queryset = ChannelReportService._get_report_queryset(
+                    start_datetime, end_datetime, branch_id, bank_names
+                )
+                for row in queryset.iterator(chunk_size=500):
+                    yield {"date": current.isoformat(), **ChannelReportService._build_row(row, bank_names)}
+                current += timedelta(days=1)
 
-        # Get all active payment method banks for this branch (credit card banks only)
-        branch_banks = PaymentMethodBanks.objects.filter(
-            branch_id=branch_id,
-            payment_method='credit_card',
-            is_active=True
-        ).values_list('name', flat=True)
-
-        # Step 2: Initialize results with all appointments
-        results = {}
-        
-        # First, add all appointments from the date range
-        for appointment in appointments:
-            appt_id = appointment.id
-            results[appt_id] = {
-                "channel_id": appt_id,
-                "channel_no": appointment.channel_no,
-                "invoice_number": appointment.invoice_number,
-                "amount_cash": 0,
-                "amount_credit_card": 0,
-                "amount_online": 0,
-                "total_paid": 0,
-                "total_due": float(appointment.amount),  # channeling_fee
-                "balance": float(appointment.amount),
-                'appointment_id': appointment.id,
-                'is_deleted': appointment.is_deleted,
-                'is_refund': appointment.is_refund,
-                'created_at': appointment.created_at.isoformat() if appointment.created_at else None,
-                'deleted_at': appointment.deleted_at.isoformat() if appointment.deleted_at else None,
-                'refunded_at': appointment.refunded_at.isoformat() if appointment.refunded_at else None,
-            }
-            # Initialize all branch banks with 0
-            for bank_name in branch_banks:
-                results[appt_id][bank_name] = 0
-        
-        # Step 3: Add payment data
-        for payment in payments:
-            appt_id = payment.appointment_id
-            
-            # If appointment is not in results, add it (for payments made on this date)
-            if appt_id not in results:
-                results[appt_id] = {
-                    "channel_id": appt_id,
-                    "channel_no": payment.appointment.channel_no,
-                    "invoice_number": payment.appointment.invoice_number,
-                    "amount_cash": 0,
-                    "amount_credit_card": 0,
-                    "amount_online": 0,
-                    "total_paid": 0,
-                    "total_due": float(payment.appointment.amount),
-                    "balance": 0,
-                    'appointment_id': payment.appointment_id,
-                    'is_deleted': payment.appointment.is_deleted,
-                    'is_refund': payment.appointment.is_refund,
-                    'created_at': payment.appointment.created_at.isoformat() if payment.appointment.created_at else None,
-                    'deleted_at': payment.appointment.deleted_at.isoformat() if payment.appointment.deleted_at else None,
-                    'refunded_at': payment.appointment.refunded_at.isoformat() if payment.appointment.refunded_at else None,
-                }
-                # Initialize all branch banks with 0
-                for bank_name in branch_banks:
-                    results[appt_id][bank_name] = 0
-
-            method = payment.payment_method
-            if method == 'cash':
-                results[appt_id]["amount_cash"] += float(payment.amount)
-            elif method == 'credit_card':
-                results[appt_id]["amount_credit_card"] += float(payment.amount)
-            elif method == 'online_transfer':
-                results[appt_id]["amount_online"] += float(payment.amount)
-
-            results[appt_id]["total_paid"] += float(payment.amount)
-            results[appt_id]["balance"] = results[appt_id]["total_due"] - results[appt_id]["total_paid"]
-            
-            # Add bank total if payment has a bank
-            if payment.payment_method_bank:
-                bank_name = payment.payment_method_bank.name
-                if bank_name in results[appt_id]:
-                    results[appt_id][bank_name] += float(payment.amount)
-
-        return list(results.values())
+        return rows()
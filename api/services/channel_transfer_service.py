@@ -1,6 +1,7 @@
 # services/channel_transfer_service.py
 from django.db import transaction
-from ..models import Appointment, Schedule
+from ..models import Appointment, Schedule, AppointmentChannelCounter, ChannelPayment
+from .finance_summary_service import DailyFinanceSummaryService
 
 class ChannelTransferService:
     @staticmethod
@@ -22,9 +23,8 @@ class ChannelTransferService:
                 defaults={"status": "Available"}
             )
 
-            # Step 4: Calculate new channel number for the date & branch
-            appointments_on_date = Appointment.objects.filter(date=new_date, branch_id=branch_id).count()
-            new_channel_no = appointments_on_date + 1
+            # Step 4: Take the next channel number from the target day's counter
+            new_channel_no = AppointmentChannelCounter.allocate(doctor_id, branch_id, new_date)
 
             # Step 5: Update appointment
             appointment.schedule = schedule
@@ -34,6 +34,8 @@ class ChannelTransferService:
             appointment.branch_id = branch_id
             appointment.channel_no = new_channel_no
             appointment.save()
+            # Payments keep a copy of the appointment's branch
+            DailyFinanceSummaryService.move_payments(ChannelPayment.all_objects.filter(appointment=appointment), branch_id)
 
             return appointment
 
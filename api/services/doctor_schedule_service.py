@@ -1,7 +1,8 @@
-from ..models import Schedule, Doctor, Branch, Appointment
+from ..models import Schedule, Doctor, Branch, Appointment, AppointmentChannelCounter
 from django.utils import timezone
 from django.db import IntegrityError
 from django.db import transaction
+from django.db.models import Case, DateField, Value, When
 from django.utils.dateparse import parse_date
 from datetime import datetime
 from ..serializers import ScheduleSerializer
@@ -38,75 +39,172 @@ class DoctorScheduleService:
 
         return qs.order_by('date')
     
+    @staticmethod
+    def _parse_date(value):
+        if isinstance(value, str):
+            value = parse_date(value)
+        if value is None:
+            raise ValueError("Invalid date format. Use YYYY-MM-DD.")
+        return value
+
+    @staticmethod
+    def _date_shift(from_date, from_end_date, to_date):
+        """Map every source day in [from_date, from_end_date] to its target day."""
+        from_date = DoctorScheduleService._parse_date(from_date)
+        from_end_date = DoctorScheduleService._parse_date(from_end_date or from_date)
+        to_date = DoctorScheduleService._parse_date(to_date)
+        if from_end_date < from_date:
+            raise ValueError("from_end_date must be on or after from_date.")
+        offset = to_date - from_date
+        return from_date, from_end_date, offset
+
     @staticmethod
     @transaction.atomic
     def transfer_schedules(doctor_id, from_date, to_date, branch_id):
-        doctor = Doctor.objects.get(id=doctor_id)
-        branch = Branch.objects.get(id=branch_id)
-
-        # 🔹 1. Get active schedules for the from_date
-        original_schedules = Schedule.objects.filter(
-            doctor=doctor,
-            date=from_date,
-            branch=branch,
-            status='DOCTOR'
+        return DoctorScheduleService.transfer_schedule_range(
+            doctor_ids=[doctor_id],
+            branch_id=branch_id,
+            from_date=from_date,
+            to_date=to_date,
         )
 
-        if not original_schedules.exists():
+    @staticmethod
+    @transaction.atomic
+    def transfer_schedule_range(doctor_ids, branch_id, from_date, to_date, from_end_date=None):
+        """
+        Move the DOCTOR arrival slots of several doctors from a day (or range of
+        days) to the same slots starting at to_date, keeping the day offsets.
+
+        Source and target slots are read in two queries; sources are marked
+        Unavailable and existing targets flipped to DOCTOR with one UPDATE
+        each, and missing targets are inserted with bulk_create.
+        """
+        from_date, from_end_date, offset = DoctorScheduleService._date_shift(from_date, from_end_date, to_date)
+
+        doctors = set(Doctor.objects.filter(id__in=doctor_ids).values_list('id', flat=True))
+        if len(doctors) != len(set(int(d) for d in doctor_ids)):
+            raise Doctor.DoesNotExist("Doctor matching query does not exist.")
+        if not Branch.objects.filter(id=branch_id).exists():
+            raise Branch.DoesNotExist("Branch matching query does not exist.")
+
+        # 🔹 1. Active DOCTOR slots in the source range
+        sources = list(
+            Schedule.objects.select_for_update().filter(
+                doctor_id__in=doctors,
+                branch_id=branch_id,
+                date__range=(from_date, from_end_date),
+                status='DOCTOR'
+            )
+        )
+        if not sources:
             raise ValueError("No available schedules found on the given from_date for the specified branch.")
 
-        new_schedules = []
-
-        for schedule in original_schedules:
-            # 🔸 2. Mark old schedule as Unavailable
-            schedule.status = "Unavailable"
-            schedule.save()
-
-            # 🔸 3. Check if a schedule already exists for to_date with same time
-            existing_schedule = Schedule.objects.filter(
-                doctor=doctor,
-                date=to_date,
-                start_time=schedule.start_time,
-                branch=branch
-            ).first()
-
-            if existing_schedule:
-                # Update existing schedule to DOCTOR status
-                existing_schedule.status = 'DOCTOR'
-                existing_schedule.save()
-                new_schedules.append(existing_schedule)
-            else:
-                # Create new schedule for to_date
-                new_schedule = Schedule.objects.create(
-                    doctor=doctor,
-                    date=to_date,
-                    start_time=schedule.start_time,
-                    branch=branch,
-                    status='DOCTOR'
-                )
-                new_schedules.append(new_schedule)
-
-        return new_schedules
-    
+        wanted = {(s.doctor_id, s.date + offset, s.start_time) for s in sources}
+
+        # 🔹 2. Any existing slots at the target days/times, prefer ones already marked DOCTOR
+        existing = {}
+        for schedule in Schedule.objects.select_for_update().filter(
+            doctor_id__in=doctors,
+            branch_id=branch_id,
+            date__in={date for _, date, _ in wanted},
+            start_time__in={start_time for _, _, start_time in wanted},
+        ).order_by('id'):
+            key = (schedule.doctor_id, schedule.date, schedule.start_time)
+            if key in wanted and (key not in existing or schedule.status == 'DOCTOR'):
+                existing[key] = schedule
+
+        now = timezone.now()
+
+        # 🔸 3. Mark sources Unavailable, except those that are also targets
+        # (overlapping ranges), which stay DOCTOR
+        kept = {s.id for s in existing.values()}
+        Schedule.objects.filter(
+            id__in=[s.id for s in sources if s.id not in kept]
+        ).update(status='Unavailable', updated_at=now)
+
+        # 🔸 4. Re-use existing target slots, create the rest
+        Schedule.objects.filter(
+            id__in=[s.id for s in existing.values() if s.status != 'DOCTOR']
+        ).update(status='DOCTOR', updated_at=now)
+        Schedule.objects.bulk_create([
+            Schedule(doctor_id=doctor_id, branch_id=branch_id, date=date, start_time=start_time, status='DOCTOR')
+            for doctor_id, date, start_time in wanted if (doctor_id, date, start_time) not in existing
+        ])
+
+        # MySQL bulk inserts don't return ids, read the target slots back once
+        targets = {
+            (s.doctor_id, s.date, s.start_time): s
+            for s in Schedule.objects.filter(
+                doctor_id__in=doctors,
+                branch_id=branch_id,
+                date__in={date for _, date, _ in wanted},
+                start_time__in={start_time for _, _, start_time in wanted},
+                status='DOCTOR'
+            )
+        }
+        return [
+            targets[(s.doctor_id, s.date + offset, s.start_time)]
+            for s in sorted(sources, key=lambda s: (s.doctor_id, s.date, s.start_time))
+        ]
+
     @staticmethod
     def transfer_appointments_only(doctor_id, from_date, to_date, branch_id):
-        doctor = Doctor.objects.get(id=doctor_id)
-        branch = Branch.objects.get(id=branch_id)
-
-        appointments = Appointment.objects.filter(
-            doctor=doctor,
-            date=from_date,
-            branch=branch
+        return DoctorScheduleService.transfer_appointment_range(
+            doctor_ids=[doctor_id],
+            branch_id=branch_id,
+            from_date=from_date,
+            to_date=to_date,
         )
 
-        if not appointments.exists():
+    @staticmethod
+    @transaction.atomic
+    def transfer_appointment_range(doctor_ids, branch_id, from_date, to_date, from_end_date=None):
+        """
+        Move the appointments of several doctors from a day (or range of days)
+        to to_date onwards, keeping the day offsets, and confirm them.
+        Issues a single UPDATE ... WHERE id IN, with a CASE on the old date.
+        """
+        from_date, from_end_date, offset = DoctorScheduleService._date_shift(from_date, from_end_date, to_date)
+
+        doctors = set(Doctor.objects.filter(id__in=doctor_ids).values_list('id', flat=True))
+        if len(doctors) != len(set(int(d) for d in doctor_ids)):
+            raise Doctor.DoesNotExist("Doctor matching query does not exist.")
+        if not Branch.objects.filter(id=branch_id).exists():
+            raise Branch.DoesNotExist("Branch matching query does not exist.")
+
+        rows = list(
+            Appointment.objects.select_for_update().filter(
+                doctor_id__in=doctors,
+                date__range=(from_date, from_end_date),
+                branch_id=branch_id
+            ).values_list('id', 'doctor_id', 'date', 'channel_no')
+        )
+        if not rows:
             raise ValueError("No appointments found on the given from_date for the specified branch.")
 
-        updated = []
-        for appt in appointments:
-            appt.date = to_date
-            appt.status = "Confirmed"  # ✅ Force status update
-            appt.save()
-            updated.append(appt)
+        source_days = set()
+        last_channel_no = {}
+        for appointment_id, appointment_doctor_id, day, channel_no in rows:
+            source_days.add(day)
+            key = (appointment_doctor_id, day + offset)
+            last_channel_no[key] = max(last_channel_no.get(key, 0), channel_no or 0)
 
-        return updated
+        Appointment.objects.filter(id__in=[row[0] for row in rows]).update(
+            date=Case(
+                *[When(date=day, then=Value(day + offset)) for day in sorted(source_days)],
+                output_field=DateField(),
+            ),
+            status="Confirmed",  # ✅ Force status update
+            updated_at=timezone.now()
+        )
+
+        # Moved appointments keep their channel numbers; new bookings on the
+        # target day must continue after them
+        for (appointment_doctor_id, day), channel_no in last_channel_no.items():
+            AppointmentChannelCounter.reserve_up_to(appointment_doctor_id, branch_id, day, channel_no)
+
+        return list(
+            Appointment.objects.filter(id__in=[row[0] for row in rows])
+            .select_related('doctor', 'patient', 'branch', 'schedule')
+            .order_by('date', 'channel_no')
+        )
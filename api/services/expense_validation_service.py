@@ -1,6 +1,5 @@
 from django.db.models import Sum
 from django.core.exceptions import ValidationError
-from datetime import date
 from ..models import Expense, OrderPayment, ChannelPayment,SolderingPayment
 from ..services.finance_summary_service import DailyFinanceSummaryService
 
@@ -8,36 +7,14 @@ class ExpenseValidationService:
 
     @staticmethod
     def validate_expense_limit(branch_id, amount):
-        summary = DailyFinanceSummaryService.get_summary(branch_id)  # Pass the branch_id
-        # print(summary['cash_in_hand'])  
-        today = date.today()
-
-        # # 🔹 Sum of Order Payments
-        # order_total = OrderPayment.objects.filter(
-        #     order__branch_id=branch_id,
-        #     payment_date__date=today,
-        #     payment_method="cash"
-        # ).aggregate(total=Sum('amount'))['total'] or 0
-
-        # # 🔹 Sum of Channel Payments
-        # channel_total = ChannelPayment.objects.filter(
-        #     appointment__branch_id=branch_id,
-        #     payment_date__date=today,
-        #     payment_method="cash"
-        # ).aggregate(total=Sum('amount'))['total'] or 0
-
-        # soldering_total = SolderingPayment.objects.filter(
-        #     order__branch_id=branch_id,
-        #     payment_date__date=today,
-        #     payment_method="cash" 
-        #     ).aggregate(total=Sum('amount'))['total'] or 0
+        """
+        Call inside `transaction.atomic()` together with saving the expense;
+        the availability check locks the branch row until the commit.
+        """
+        availability = DailyFinanceSummaryService.get_cash_availability(branch_id)
 
-        total_available = summary.get('cash_in_hand', 0) + summary.get('before_balance', 0)
-        # 🔹 Sum of today's expenses
-        total_expenses = Expense.objects.filter(
-            branch_id=branch_id,
-            created_at__date=today,
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        total_available = availability['cash_in_hand'] + availability['before_balance']
+        total_expenses = availability['today_expenses']
 
         if (total_expenses + amount) > total_available:
             raise ValidationError(
@@ -47,16 +24,10 @@ class ExpenseValidationService:
 
     @staticmethod
     def validate_expense_update_limit(branch_id, amount, old_amount):
-        summary = DailyFinanceSummaryService.get_summary(branch_id)
-        today = date.today()
+        availability = DailyFinanceSummaryService.get_cash_availability(branch_id)
 
-        total_available = summary.get('cash_in_hand', 0) + summary.get('before_balance', 0)
-        
-        # Sum of today's expenses
-        total_expenses = Expense.objects.filter(
-            branch_id=branch_id,
-            created_at__date=today,
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        total_available = availability['cash_in_hand'] + availability['before_balance']
+        total_expenses = availability['today_expenses']
         
         # Adjust total expenses by removing the old amount
         adjusted_total_expenses = total_expenses - old_amount
@@ -75,14 +46,12 @@ class ExpenseValidationService:
         Includes OrderPayment and ChannelPayment models.
         """
         order_total = OrderPayment.objects.filter(
-            order__branch_id=branch_id,
-            payment_date__date=date
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
+            branch_id=branch_id,
+        ).on_local_day('payment_date', date).aggregate(Sum('amount'))['amount__sum'] or 0
 
         channel_total = ChannelPayment.objects.filter(
-            appointment__branch_id=branch_id,
-            payment_date__date=date
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
+            branch_id=branch_id,
+        ).on_local_day('payment_date', date).aggregate(Sum('amount'))['amount__sum'] or 0
 
         return order_total + channel_total
 
@@ -92,8 +61,7 @@ class ExpenseValidationService:
 
         total_expenses = Expense.objects.filter(
             branch_id=branch_id,
-            created_at__date=date
-        ).exclude(id=expense_instance.id).aggregate(
+        ).on_local_day('created_at', date).exclude(id=expense_instance.id).aggregate(
             Sum("amount")
         )["amount__sum"] or 0
 
@@ -1,7 +1,10 @@
 from django.utils import timezone
-from django.db.models import Sum
+from django.db import transaction
+from collections import defaultdict
+from django.db.models import Sum, Min, Q, F, OuterRef, Subquery, Value, DecimalField, DateTimeField
+from django.db.models.functions import Coalesce, TruncDate
 from datetime import timedelta, datetime, date
-from ..models import ExpenseReturn, OrderPayment,ChannelPayment,OtherIncome,Expense,BankDeposit,SafeTransaction,SolderingPayment,DailyCashInHandRecord,Order
+from ..models import ExpenseReturn, OrderPayment,ChannelPayment,OtherIncome,Expense,BankDeposit,SafeTransaction,SolderingPayment,DailyCashInHandRecord,Order,Branch,CashInHandDirtyDate,CashBalanceCheckpoint
 from decimal import Decimal
 from django.utils.timezone import is_naive, make_aware, localtime
 
@@ -54,6 +57,187 @@ class DailyFinanceSummaryService:
 
         return result["total_amount"] or Decimal("0.00")
 
+    @staticmethod
+    def _subquery_sum(queryset, group_field, field='amount'):
+        """Scalar subquery with the total of `field`, for use as an annotation."""
+        total = queryset.order_by().values(group_field).annotate(total=Sum(field)).values('total')[:1]
+        return Coalesce(
+            Subquery(total),
+            Value(Decimal("0.00")),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+
+    PAYMENT_METHODS = ('cash', 'credit_card', 'online_transfer')
+
+    @staticmethod
+    def _get_payment_totals(queryset):
+        """
+        Pivot a payment queryset into {payment_method: total} with one
+        aggregate query, using a filtered Sum per method.
+        """
+        totals = queryset.aggregate(**{
+            method: Sum('amount', filter=Q(payment_method=method))
+            for method in DailyFinanceSummaryService.PAYMENT_METHODS
+        })
+        return {method: total or Decimal("0.00") for method, total in totals.items()}
+
+    @staticmethod
+    def _get_day_annotations(date):
+        """
+        Per-branch totals for `date` as scalar subqueries, to be annotated on
+        a Branch queryset so they all come back in a single row.
+        """
+        yesterday = date - timedelta(days=1)
+        day = DailyFinanceSummaryService._get_date_range(date)
+        branch = OuterRef('pk')
+        total = DailyFinanceSummaryService._subquery_sum
+
+        return {
+            'previous_balance': total(
+                DailyCashInHandRecord.objects.filter(branch_id=branch, date=yesterday),
+                'branch_id', 'cash_in_hand',
+            ),
+            'order_cash': total(
+                OrderPayment.all_objects.filter(
+                    branch_id=branch, payment_date__range=day,
+                    payment_method="cash", is_edited=False,
+                ),
+                'branch_id',
+            ),
+            'channel_cash': total(
+                ChannelPayment.all_objects.filter(
+                    branch_id=branch, payment_date__range=day,
+                    payment_method="cash", is_edited=False,
+                ),
+                'branch_id',
+            ),
+            'soldering_cash': total(
+                SolderingPayment.objects.filter(
+                    branch_id=branch, payment_date__range=day, payment_method="cash",
+                ),
+                'branch_id',
+            ),
+            'other_income': total(
+                OtherIncome.objects.filter(branch_id=branch, date__range=day),
+                'branch_id',
+            ),
+            'expense_returns_cash': total(
+                ExpenseReturn.objects.filter(branch_id=branch, created_at__range=day, paid_source="cash"),
+                'branch_id',
+            ),
+            'expenses_cash': total(
+                Expense.objects.filter(branch_id=branch, created_at__range=day, paid_source="cash"),
+                'branch_id',
+            ),
+            'expenses_safe': total(
+                Expense.objects.filter(
+                    branch_id=branch, created_at__range=day, paid_source="safe", is_refund=False,
+                ),
+                'branch_id',
+            ),
+            'expenses_all': total(
+                Expense.objects.filter(branch_id=branch, created_at__range=day),
+                'branch_id',
+            ),
+            'safe_income': total(
+                SafeTransaction.objects.filter(branch_id=branch, transaction_type="income", date=date),
+                'branch_id',
+            ),
+        }
+
+    @staticmethod
+    def _get_day_totals(branch_id, date, fields, lock=False):
+        annotations = DailyFinanceSummaryService._get_day_annotations(date)
+        queryset = Branch.objects.select_for_update() if lock else Branch.objects.all()
+        row = queryset.filter(pk=branch_id).annotate(
+            **{field: annotations[field] for field in fields}
+        ).values(*fields).first()
+        if row is None:
+            raise Branch.DoesNotExist(f"Branch {branch_id} does not exist.")
+        return row
+
+    CASH_FIELDS = (
+        'order_cash', 'channel_cash', 'soldering_cash', 'other_income',
+        'expense_returns_cash', 'expenses_cash', 'safe_income',
+    )
+
+    @staticmethod
+    def _get_range_cash_totals(branch_id, from_date, to_date):
+        """
+        CASH_FIELDS totals of every day from `from_date` to `to_date` as
+        {day: totals}, with one query per source table grouped by local date.
+        Days without cash movement are left out.
+        """
+        period = (
+            DailyFinanceSummaryService._get_date_range(from_date)[0],
+            DailyFinanceSummaryService._get_date_range(to_date)[1],
+        )
+        sources = {
+            'order_cash': (OrderPayment.all_objects.filter(
+                branch_id=branch_id, payment_method="cash", is_edited=False), 'payment_date'),
+            'channel_cash': (ChannelPayment.all_objects.filter(
+                branch_id=branch_id, payment_method="cash", is_edited=False), 'payment_date'),
+            'soldering_cash': (SolderingPayment.objects.filter(
+                branch_id=branch_id, payment_method="cash"), 'payment_date'),
+            'other_income': (OtherIncome.objects.filter(branch_id=branch_id), 'date'),
+            'expense_returns_cash': (ExpenseReturn.objects.filter(
+                branch_id=branch_id, paid_source="cash"), 'created_at'),
+            'expenses_cash': (Expense.objects.filter(branch_id=branch_id, paid_source="cash"), 'created_at'),
+            'safe_income': (SafeTransaction.objects.filter(
+                branch_id=branch_id, transaction_type="income"), 'date'),
+        }
+
+        days = defaultdict(lambda: dict.fromkeys(DailyFinanceSummaryService.CASH_FIELDS, Decimal("0.00")))
+        for field, (queryset, date_field) in sources.items():
+            if isinstance(queryset.model._meta.get_field(date_field), DateTimeField):
+                queryset = queryset.filter(**{f'{date_field}__range': period}).annotate(day=TruncDate(date_field))
+            else:
+                queryset = queryset.filter(**{f'{date_field}__range': (from_date, to_date)}).annotate(day=F(date_field))
+            for day, total in queryset.order_by().values('day').annotate(total=Sum('amount')).values_list('day', 'total'):
+                days[day][field] = total or Decimal("0.00")
+        return days
+
+    @staticmethod
+    def _get_cash_balance(totals):
+        """Net cash movement of a day from the CASH_FIELDS totals."""
+        return (
+            totals['order_cash'] +
+            totals['channel_cash'] +
+            totals['other_income'] +
+            totals['soldering_cash'] + totals['expense_returns_cash']
+        ) - (totals['expenses_cash'] + totals['safe_income'])
+
+    @staticmethod
+    def get_cash_availability(branch_id, date=None):
+        """
+        Cash figures needed to validate an expense, read in a single query
+        without writing a DailyCashInHandRecord.
+
+        Returns the same `before_balance` and `cash_in_hand` as
+        `calculate_for_day`, plus `today_expenses` (all paid sources).
+        The branch row is locked with SELECT ... FOR UPDATE, so this must
+        run inside `transaction.atomic()`; concurrent expense posts for the
+        branch then queue behind each other until the expense is saved.
+        """
+        if date is None:
+            date = timezone.localdate()
+        elif isinstance(date, datetime):
+            date = date.date()
+
+        row = DailyFinanceSummaryService._get_day_totals(
+            branch_id, date,
+            fields=('previous_balance', 'expenses_all') + DailyFinanceSummaryService.CASH_FIELDS,
+            lock=True,
+        )
+
+        today_balance = DailyFinanceSummaryService._get_cash_balance(row)
+
+        return {
+            "before_balance": row['previous_balance'],
+            "cash_in_hand": row['previous_balance'] + today_balance,
+            "today_expenses": row['expenses_all'],
+        }
+
     @staticmethod
     def get_summary(branch_id, date=None):
         if date is None:
@@ -61,8 +245,11 @@ class DailyFinanceSummaryService:
         elif isinstance(date, datetime):
             date = date.date()
 
-        # Calculate and store the cash_in_hand for today and yesterday
-        DailyFinanceSummaryService.calculate_for_day(branch_id, date)
+        # Rebuild days left stale by backdated edits before reading yesterday's record
+        DailyFinanceSummaryService.recompute_dirty(branch_id)
+
+        # Calculate and store the cash_in_hand for the day
+        summary = DailyFinanceSummaryService.calculate_for_day(branch_id, date)
 
         # Fetch all records excluding today and yesterday
         today = timezone.localdate()
@@ -88,10 +275,6 @@ class DailyFinanceSummaryService:
                 'cash_in_hand': record.cash_in_hand
             })
 
-        # print(f"Historical data (excluding today and yesterday): {historical_data}")
-
-        # Optionally: return full report including historical
-        summary = DailyFinanceSummaryService.calculate_for_day(branch_id, date)
         summary['historical_data'] = historical_data  # Include in response
         return summary
 
@@ -100,159 +283,56 @@ class DailyFinanceSummaryService:
         if isinstance(date, datetime):
             date = date.date()
             
-        yesterday = date - timedelta(days=1)
         start_of_day, end_of_day = DailyFinanceSummaryService._get_date_range(date)
-        start_of_yesterday, end_of_yesterday = DailyFinanceSummaryService._get_date_range(yesterday)
+        day = (start_of_day, end_of_day)
 
-        # Get previous day's balance (if any)
-        previous_balance = DailyFinanceSummaryService.get_previous_day_balance(branch_id, yesterday)
-        yesterday_safe_income = DailyFinanceSummaryService.get_safe_balance(branch_id, yesterday)
-        today_safe_balance = DailyFinanceSummaryService.get_safe_balance(branch_id, date)
-        yesterday_safe_income = DailyFinanceSummaryService.get_safe_balance(branch_id, yesterday)
-        today_safe_balance = DailyFinanceSummaryService.get_safe_balance(branch_id, date)
-
-        # Yesterday calculations
-        yesterday_order_payments = DailyFinanceSummaryService._sum(
-            OrderPayment.all_objects.filter(
-                order__branch_id=branch_id, 
-                payment_date__gte=start_of_yesterday,
-                payment_date__lte=end_of_yesterday,
-                payment_method="cash",
-                is_edited=False,
-          
-            )
-        )
-        yesterday_channel_payments = DailyFinanceSummaryService._sum(
-            ChannelPayment.all_objects.filter(
-                appointment__branch_id=branch_id, 
-                payment_date__gte=start_of_yesterday,
-                payment_date__lte=end_of_yesterday,
-                payment_method="cash",
-             
-                is_edited=False
-            )
-        )
-        yesterday_other_income = DailyFinanceSummaryService._sum(
-            OtherIncome.objects.filter(
-                branch_id=branch_id, 
-                date__gte=start_of_yesterday,
-                date__lte=end_of_yesterday
-            )
-        )
-        yesterday_soldering_income = DailyFinanceSummaryService._sum(
-            SolderingPayment.objects.filter(
-                order__branch_id=branch_id,
-                payment_date__gte=start_of_yesterday,
-                payment_date__lte=end_of_yesterday,
-                payment_method="cash"
+        # Previous day's balance, safe income, other income and expenses in one query
+        try:
+            totals = DailyFinanceSummaryService._get_day_totals(
+                branch_id, date,
+                fields=(
+                    'previous_balance', 'other_income', 'expense_returns_cash',
+                    'expenses_cash', 'expenses_safe', 'safe_income',
+                ),
             )
-        )
-        yesterday_expenses = DailyFinanceSummaryService._sum(
-            Expense.objects.filter(
-                branch_id=branch_id, 
-                created_at__gte=start_of_yesterday,
-                created_at__lte=end_of_yesterday,
-                paid_source="cash",
-                is_refund=False
+        except Branch.DoesNotExist:
+            totals = dict.fromkeys(
+                ('previous_balance', 'other_income', 'expense_returns_cash',
+                 'expenses_cash', 'expenses_safe', 'safe_income'),
+                Decimal("0.00"),
             )
-        )
+        previous_balance = totals['previous_balance']
 
-        # before_balance = (
-        #     yesterday_order_payments +
-        #     yesterday_channel_payments +
-        #     yesterday_other_income +
-        #     yesterday_soldering_income
-        # ) - (yesterday_expenses + yesterday_safe_income)
-        
-        #get orderids softdeleted and refundeed also not soft deleted
-      
-        # Today calculations
-        today_order_payments = DailyFinanceSummaryService._sum(
+        # Payments split by method, one query per source table
+        order_payments = DailyFinanceSummaryService._get_payment_totals(
             OrderPayment.all_objects.filter(
-                order__branch_id=branch_id,
-                payment_date__gte=start_of_day,
-                payment_date__lte=end_of_day,
-                payment_method="cash",
+                branch_id=branch_id,
+                payment_date__range=day,
                 is_edited=False,
             )
         )
-        data=  OrderPayment.all_objects.filter(
-                order__branch_id=branch_id,
-                payment_date__gte=start_of_day,
-                payment_date__lte=end_of_day,
-                payment_method="cash",
-                is_edited=False,
-            )
-
-        today_channel_payments = DailyFinanceSummaryService._sum(
+        channel_payments = DailyFinanceSummaryService._get_payment_totals(
             ChannelPayment.all_objects.filter(
-                appointment__branch_id=branch_id, 
-                payment_date__gte=start_of_day,
-                payment_date__lte=end_of_day,
-                payment_method="cash",
+                branch_id=branch_id,
+                payment_date__range=day,
                 is_edited=False,
             )
         )
-       
-        today_other_income = DailyFinanceSummaryService._sum(
-            OtherIncome.objects.filter(
-                branch_id=branch_id, 
-                date__gte=start_of_day,
-                date__lte=end_of_day
-            )
-        )
-        today_soldering_income = DailyFinanceSummaryService._sum(
+        soldering_payments = DailyFinanceSummaryService._get_payment_totals(
             SolderingPayment.objects.filter(
-                order__branch_id=branch_id,
-                payment_date__gte=start_of_day,
-                payment_date__lte=end_of_day,
-                payment_method="cash"
-            )
-        )
-        today_expense_returns = DailyFinanceSummaryService._sum(
-        ExpenseReturn.objects.filter(
-            branch_id=branch_id,
-            created_at__gte=start_of_day,
-            created_at__lte=end_of_day,
-            paid_source="cash",)
-        )
-
-
-        today_expenses = DailyFinanceSummaryService._sum(
-            Expense.objects.filter(
-                branch_id=branch_id, 
-                created_at__gte=start_of_day,
-                created_at__lte=end_of_day,
-                paid_source="cash",
-                # is_refund=False
-            )
-        )
-        today_safe_expenses = DailyFinanceSummaryService._sum(
-            Expense.objects.filter(
-                branch_id=branch_id, 
-                created_at__gte=start_of_day,
-                created_at__lte=end_of_day,
-                paid_source="safe",
-                is_refund=False
+                branch_id=branch_id,
+                payment_date__range=day,
             )
         )
 
         # Today balance calculation with safe balance included
-        today_balance = (
-            today_order_payments +
-            today_channel_payments +
-            today_other_income +
-            today_soldering_income + today_expense_returns
-        ) - (today_expenses + today_safe_balance )
+        totals['order_cash'] = order_payments['cash']
+        totals['channel_cash'] = channel_payments['cash']
+        totals['soldering_cash'] = soldering_payments['cash']
+        today_balance = DailyFinanceSummaryService._get_cash_balance(totals)
       
         cash_in_hand = previous_balance + today_balance
 
-        today_banking_qs = BankDeposit.objects.select_related('bank_account').filter(
-            branch_id=branch_id,
-            date__gte=start_of_day,
-            date__lte=end_of_day
-        )
-        today_banking_total = DailyFinanceSummaryService._sum(today_banking_qs)
         today_banking_list = [
             {
                 "bank_name": deposit.bank_account.bank_name,
@@ -260,8 +340,13 @@ class DailyFinanceSummaryService:
                 "amount": deposit.amount,
                 "is_confirmed": deposit.is_confirmed,
             }
-            for deposit in today_banking_qs
+            for deposit in BankDeposit.objects.select_related('bank_account').filter(
+                branch_id=branch_id,
+                date__gte=start_of_day,
+                date__lte=end_of_day
+            )
         ]
+        today_banking_total = sum((deposit["amount"] for deposit in today_banking_list), Decimal("0.00"))
 
         # # ✅ Safe write to DB
         DailyCashInHandRecord.objects.update_or_create(
@@ -273,115 +358,125 @@ class DailyFinanceSummaryService:
                 'today_balance': today_balance,
             }
         )
-        #total online_transfer payment from orders
-        today_order_payments_online_transfer = DailyFinanceSummaryService._sum(
-            OrderPayment.all_objects.filter(
-                order__branch_id=branch_id,
-                payment_date__gte=start_of_day,
-                payment_date__lte=end_of_day,
-                payment_method="online_transfer",
-                is_edited=False,
-            )
-        )
-        #credit card payment from orders
-        today_order_payments_credit_card = DailyFinanceSummaryService._sum(
-            OrderPayment.all_objects.filter(
-                order__branch_id=branch_id,
-                payment_date__gte=start_of_day,
-                payment_date__lte=end_of_day,
-                payment_method="credit_card",
-                is_edited=False,
-            )
-        )
-        today_order_payments_cash = DailyFinanceSummaryService._sum(
-            OrderPayment.all_objects.filter(
-                order__branch_id=branch_id,
-                payment_date__gte=start_of_day,
-                payment_date__lte=end_of_day,
-                payment_method="cash",
-                is_edited=False,
-            )
-        )
-        #total online_transfer payment from channel
-        today_channel_payments_online_transfer = DailyFinanceSummaryService._sum(
-            ChannelPayment.all_objects.filter(
-                appointment__branch_id=branch_id,
-                payment_date__gte=start_of_day,
-                payment_date__lte=end_of_day,
-                payment_method="online_transfer",
-                is_edited=False,
-            )
-        )
-        #total credit card payment from channel
-        today_channel_payments_credit_card = DailyFinanceSummaryService._sum(
-            ChannelPayment.all_objects.filter(
-                appointment__branch_id=branch_id,
-                payment_date__gte=start_of_day,
-                payment_date__lte=end_of_day,
-                payment_method="credit_card",
-                is_edited=False,
-            )
-        )
-        #total cash payment from channel
-        today_channel_payments_cash = DailyFinanceSummaryService._sum(
-            ChannelPayment.all_objects.filter(
-                appointment__branch_id=branch_id,
-                payment_date__gte=start_of_day,
-                payment_date__lte=end_of_day,
-                payment_method="cash",
-                is_edited=False,
-            )
-        )
-        #total online_transfer payment from soldering
-        today_soldering_payments_online_transfer = DailyFinanceSummaryService._sum(
-            SolderingPayment.objects.filter(
-                order__branch_id=branch_id,
-                payment_date__gte=start_of_day,
-                payment_date__lte=end_of_day,
-                payment_method="online_transfer",
-                # is_edited=False,
-            )
-        ) 
-        #total credit card payment from soldering
-        today_soldering_payments_credit_card = DailyFinanceSummaryService._sum(
-            SolderingPayment.objects.filter(
-                order__branch_id=branch_id,
-                payment_date__gte=start_of_day,
-                payment_date__lte=end_of_day,
-                payment_method="credit_card",
-            )
-        )
-        #total cash payment from soldering
-        today_soldering_payments_cash = DailyFinanceSummaryService._sum(
-            SolderingPayment.objects.filter(
-                order__branch_id=branch_id,
-                payment_date__gte=start_of_day,
-                payment_date__lte=end_of_day,
-                payment_method="cash",
-            )
-        )
-        #grand total online payments from orders
-        today_total_online_payments = today_order_payments_online_transfer + today_channel_payments_online_transfer + today_soldering_payments_online_transfer
-        #grand total credit card payment from orders
-        today_total_credit_card_payments = today_order_payments_credit_card + today_channel_payments_credit_card + today_soldering_payments_credit_card
-        #grand total cash payment from orders
-        today_total_cash_payments = today_order_payments_cash + today_channel_payments_cash + today_soldering_payments_cash
+
+        def by_method(method):
+            return order_payments[method] + channel_payments[method] + soldering_payments[method]
+
         return {
             "branch": branch_id,
             "date": str(date),
-            "today_order_payments": today_order_payments_online_transfer+today_order_payments_credit_card+today_order_payments_cash+today_soldering_payments_online_transfer+today_soldering_payments_credit_card+today_soldering_payments_cash,
-            "today_channel_payments": today_channel_payments_online_transfer+today_channel_payments_credit_card+today_channel_payments_cash,
-            "today_soldering_payments": today_soldering_payments_online_transfer+today_soldering_payments_credit_card+today_soldering_payments_cash,
-            "today_other_income": today_other_income,
-            "today_expenses": today_expenses + today_safe_expenses,
+            "today_order_payments": sum(order_payments.values()) + sum(soldering_payments.values()),
+            "today_channel_payments": sum(channel_payments.values()),
+            "today_soldering_payments": sum(soldering_payments.values()),
+            "today_other_income": totals['other_income'],
+            "today_expenses": totals['expenses_cash'] + totals['expenses_safe'],
             "before_balance": previous_balance,
             "today_balance": today_balance,
             "cash_in_hand": cash_in_hand,
             "available_for_deposit": cash_in_hand,
             "today_banking_total": today_banking_total,
             "today_banking": today_banking_list,
-            "today_total_online_payments":today_total_online_payments,
-            "today_total_credit_card_payments":today_total_credit_card_payments,
-            "today_total_cash_payments":today_total_cash_payments,
+            "today_total_online_payments": by_method('online_transfer'),
+            "today_total_credit_card_payments": by_method('credit_card'),
+            "today_total_cash_payments": by_method('cash'),
         }
 
+    @staticmethod
+    def recompute_range(branch_id, from_date, to_date):
+        """
+        Rewrite the DailyCashInHandRecord of every day from `from_date` to
+        `to_date`, carrying each day's cash_in_hand into the next day's
+        before_balance. The day totals are read for the whole range at once,
+        so the query count does not grow with the number of days.
+        Returns the number of days written.
+        """
+        previous = DailyCashInHandRecord.objects.filter(
+            branch_id=branch_id, date=from_date - timedelta(days=1)
+        ).values_list('cash_in_hand', flat=True).first()
+        previous_balance = previous if previous is not None else Decimal("0.00")
+
+        existing = {}
+        for record in DailyCashInHandRecord.objects.filter(
+            branch_id=branch_id, date__range=(from_date, to_date)
+        ).order_by('id'):
+            existing.setdefault(record.date, record)
+
+        daily_totals = DailyFinanceSummaryService._get_range_cash_totals(branch_id, from_date, to_date)
+
+        to_update, to_create = [], []
+        day = from_date
+        while day <= to_date:
+            today_balance = DailyFinanceSummaryService._get_cash_balance(daily_totals[day])
+            values = {
+                'cash_in_hand': previous_balance + today_balance,
+                'before_balance': previous_balance,
+                'today_balance': today_balance,
+            }
+            record = existing.get(day)
+            if record is None:
+                to_create.append(DailyCashInHandRecord(branch_id=branch_id, date=day, **values))
+            else:
+                for field, value in values.items():
+                    setattr(record, field, value)
+                to_update.append(record)
+
+            previous_balance = values['cash_in_hand']
+            day += timedelta(days=1)
+
+        with transaction.atomic():
+            DailyCashInHandRecord.objects.bulk_update(
+                to_update, ['cash_in_hand', 'before_balance', 'today_balance'], batch_size=500
+            )
+            DailyCashInHandRecord.objects.bulk_create(to_create, batch_size=500)
+        return len(to_update) + len(to_create)
+
+    @staticmethod
+    def recompute_dirty(branch_id=None):
+        """
+        Recompute every branch (or just `branch_id`) marked dirty by a
+        backdated write, from its dirty date up to today.
+        Returns {branch_id: days written}.
+        """
+        today = timezone.localdate()
+        markers = CashInHandDirtyDate.objects.all()
+        if branch_id is not None:
+            markers = markers.filter(branch_id=branch_id)
+
+        written = {}
+        for marker in markers:
+            written[marker.branch_id] = DailyFinanceSummaryService.recompute_range(
+                marker.branch_id, marker.dirty_from, today
+            )
+            # A write that arrived while we were recomputing bumps updated_at and keeps the marker
+            CashInHandDirtyDate.objects.filter(pk=marker.pk, updated_at=marker.updated_at).delete()
+        return written
+
+    @staticmethod
+    def mark_stale(branch_id, value):
+        """
+        Mark the branch's cash records from `value` (a date or datetime) on
+        as stale, along with the checkpoints that include it. Today and later
+        are rebuilt anyway and are skipped.
+        """
+        if branch_id is None or value is None:
+            return
+        day = timezone.localtime(value).date() if isinstance(value, datetime) else value
+        if day >= timezone.localdate():
+            return
+        CashInHandDirtyDate.mark(branch_id, day)
+        CashBalanceCheckpoint.invalidate(branch_id, day)
+
+    @staticmethod
+    def move_payments(payments, branch_id):
+        """
+        Point a payment queryset at `branch_id`. A queryset update sends no
+        signals, so the old and new branches are marked stale here from the
+        earliest moved payment's date.
+        """
+        moved = payments.exclude(branch_id=branch_id)
+        earliest = dict(moved.order_by().values_list('branch_id').annotate(first=Min('payment_date')))
+        count = moved.update(branch_id=branch_id)
+        for old_branch_id, first in earliest.items():
+            DailyFinanceSummaryService.mark_stale(old_branch_id, first)
+            DailyFinanceSummaryService.mark_stale(branch_id, first)
+        return count
@@ -2,10 +2,11 @@
 
 from decimal import Decimal
 from django.db import transaction
-from ..models import Order, OrderItem, Invoice, Patient, FrameStock,OrderProgress
+from ..models import Order, OrderItem, Invoice, Patient, FrameStock,OrderProgress, OrderPayment
 from datetime import date
 from django.db.models import Q
 from ..services.patient_service import PatientService
+from ..services.finance_summary_service import DailyFinanceSummaryService
 class FrameOnlyOrderService:
 
     @staticmethod
@@ -197,6 +198,8 @@ class FrameOnlyOrderService:
         total_price = subtotal - discount
 
         order.branch_id = branch_id
+        # Payments keep a copy of the order's branch
+        DailyFinanceSummaryService.move_payments(OrderPayment.all_objects.filter(order=order), branch_id)
         order.sales_staff_code_id = data.get("sales_staff_code", order.sales_staff_code_id)
         order.sub_total = subtotal
         order.discount = discount
@@ -1,8 +1,9 @@
 from decimal import Decimal
 from django.db import transaction
-from ..models import Order, OrderItem, Invoice, Patient, HearingItemStock, OrderProgress
+from ..models import Order, OrderItem, Invoice, Patient, HearingItemStock, OrderProgress, OrderPayment
 from datetime import date
 from ..services.patient_service import PatientService
+from ..services.finance_summary_service import DailyFinanceSummaryService
 
 class HearingOrderService:
     """
@@ -191,6 +192,8 @@ class HearingOrderService:
         total_price = subtotal - discount
 
         order.branch_id = branch_id
+        # Payments keep a copy of the order's branch
+        DailyFinanceSummaryService.move_payments(OrderPayment.all_objects.filter(order=order), branch_id)
         order.sales_staff_code_id = data.get("sales_staff_code", order.sales_staff_code_id)
         order.sub_total = subtotal
         order.discount = discount
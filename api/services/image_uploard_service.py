@@ -1,7 +1,57 @@
 # utils/image_utils.py
-from PIL import Image
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
+
+from PIL import Image, ImageOps
+from django.apps import apps
+from django.conf import settings
 from django.core.files.base import ContentFile
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# Processing states stored on FrameImage / OrderImage.processing_status
+PENDING = 'pending'
+READY = 'ready'
+FAILED = 'failed'
+
+DEFAULT_MAX_EDGE = 2048
+DEFAULT_THUMBNAIL_EDGE = 256
+
+
+def open_scaled_image(source, max_edge):
+    """
+    Open an image and scale it so its longest edge is at most `max_edge`.
+
+    JPEGs are decoded straight at 1/2, 1/4 or 1/8 scale through `Image.draft`,
+    and the remaining factor is removed with the cheap box `reduce` before the
+    final resample, so a 12MP phone photo never gets fully decoded.
+    """
+    img = Image.open(source)
+    img.draft('RGB', (max_edge, max_edge))
+    img = ImageOps.exif_transpose(img)
+    # WebP does not support RGBA by default, and reduce() rejects palette,
+    # bilevel and 16-bit modes, so convert before scaling
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    factor = max(img.size) // max_edge
+    if factor >= 2:
+        img = img.reduce(factor)
+    if max(img.size) > max_edge:
+        img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+    return img
+
+
+def encode_webp(img, quality=85):
+    buffer = BytesIO()
+    img.save(buffer, format='WEBP', quality=quality)
+    return buffer.getvalue()
+
 
 def compress_image_to_webp(image_field, quality=85):
     # //TODO: Handle None/image_field not image edge case
@@ -9,15 +59,196 @@ def compress_image_to_webp(image_field, quality=85):
         return None
 
     try:
-        # Open image
-        img = Image.open(image_field)
-        img = img.convert('RGB')  # WebP does not support RGBA by default
-
-        # Compress and convert to webp
-        buffer = BytesIO()
-        img.save(buffer, format='WEBP', quality=quality)
+        max_edge = getattr(settings, 'IMAGE_MAX_EDGE', DEFAULT_MAX_EDGE)
+        img = open_scaled_image(image_field, max_edge)
         file_name = image_field.name.rsplit('.', 1)[0] + '.webp'
-        return ContentFile(buffer.getvalue(), name=file_name)
+        return ContentFile(encode_webp(img, quality), name=file_name)
     except Exception as e:
         # //TODO: Log error and handle exception for compliance
         return image_field  # fallback: return original file
+
+
+class ImageProcessingService:
+    """
+    Off-request WebP transcoding for FrameImage and OrderImage uploads.
+
+    The upload is stored as-is and the row is marked `pending`; once the
+    surrounding transaction commits, a background worker caps the longest
+    edge, writes the WebP rendition and a thumbnail next to it, swaps the
+    file names on the row and removes the original.
+    """
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    @classmethod
+    def _get_executor(cls):
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'IMAGE_PROCESSING_WORKERS', 2),
+                    thread_name_prefix='image-processing',
+                )
+            return cls._executor
+
+    @classmethod
+    def schedule(cls, instance):
+        """Queue processing for a saved image row once the transaction commits."""
+        model_label = instance._meta.label
+        pk = instance.pk
+        transaction.on_commit(lambda: cls._submit(model_label, pk))
+
+    @classmethod
+    def _submit(cls, model_label, pk):
+        if getattr(settings, 'IMAGE_PROCESSING_SYNC', False):
+            cls.process(model_label, pk)
+        else:
+            cls._get_executor().submit(cls._run_in_worker, model_label, pk)
+
+    @classmethod
+    def _run_in_worker(cls, model_label, pk):
+        try:
+            cls.process(model_label, pk)
+        finally:
+            # Worker threads get their own DB connection; don't leak it
+            connection.close()
+
+    @staticmethod
+    def process(model_label, pk):
+        model = apps.get_model(model_label)
+        manager = model._default_manager
+        instance = manager.filter(pk=pk).first()
+        if instance is None or not instance.image:
+            return
+
+        storage = instance.image.storage
+        original_name = instance.image.name
+        folder, file_name = os.path.split(original_name)
+        base_name = os.path.splitext(file_name)[0]
+        max_edge = getattr(settings, 'IMAGE_MAX_EDGE', DEFAULT_MAX_EDGE)
+        thumbnail_edge = getattr(settings, 'IMAGE_THUMBNAIL_EDGE', DEFAULT_THUMBNAIL_EDGE)
+
+        try:
+            with storage.open(original_name, 'rb') as source:
+                img = open_scaled_image(source, max_edge)
+
+            thumbnail = img.copy()
+            thumbnail.thumbnail((thumbnail_edge, thumbnail_edge), Image.LANCZOS)
+
+            image_name = storage.save(
+                f'{folder}/{base_name}.webp', ContentFile(encode_webp(img))
+            )
+            thumbnail_name = storage.save(
+                f'{folder}/thumb_{base_name}.webp', ContentFile(encode_webp(thumbnail))
+            )
+        except Exception:
+            logger.exception(f"Image processing failed for {model_label} {pk}")
+            manager.filter(pk=pk, image=original_name).update(processing_status=FAILED)
+            return
+
+        # Only swap if the row still points at the file we processed
+        updated = manager.filter(pk=pk, image=original_name).update(
+            image=image_name,
+            thumbnail=thumbnail_name,
+            processing_status=READY,
+        )
+        # Otherwise the image was replaced or deleted meanwhile; drop our output
+        stale_names = [original_name] if updated else [image_name, thumbnail_name]
+        for name in stale_names:
+            try:
+                storage.delete(name)
+            except Exception as e:
+                logger.error(f"Error deleting image file {name}: {str(e)}")
+
+
+class ImageRenditionService:
+    """
+    Fixed-size WebP renditions of FrameImage / OrderImage files.
+
+    Renditions are generated on first request and cached in the image's
+    own `<uuid>/` folder as `r<size>_<name>.webp`, so deleting the folder
+    removes them together with the image. Only the storage API is used; on
+    storages with local paths the first write is also made atomic.
+    """
+
+    SIZES = {
+        '128': 128,
+        '512': 512,
+        'original': None,
+    }
+    PREFIX = 'r'
+    # What Pillow raises for uploads it cannot decode: UnidentifiedImageError is an
+    # OSError, and some truncated files raise SyntaxError
+    DECODE_ERRORS = (OSError, SyntaxError, Image.DecompressionBombError)
+
+    @classmethod
+    def is_valid_size(cls, size):
+        return size in cls.SIZES
+
+    @classmethod
+    def get_rendition_name(cls, image_field, size):
+        if cls.SIZES.get(size) is None:
+            return image_field.name
+        folder, file_name = os.path.split(image_field.name)
+        base_name = os.path.splitext(file_name)[0]
+        return f'{folder}/{cls.PREFIX}{size}_{base_name}.webp'
+
+    @classmethod
+    def ensure_rendition(cls, image_field, size):
+        """Return the storage name of the rendition, generating it if missing."""
+        name = cls.get_rendition_name(image_field, size)
+        storage = image_field.storage
+        if storage.exists(name):
+            return name
+
+        edge = cls.SIZES[size]
+        with storage.open(image_field.name, 'rb') as source:
+            img = open_scaled_image(source, edge)
+
+        content = ContentFile(encode_webp(img))
+        # Two first requests may race. Locally, write to a temp name and move
+        # it in place so nobody reads a half-written file; elsewhere keep
+        # whichever copy landed first
+        try:
+            storage.path(name)
+        except NotImplementedError:
+            saved_name = storage.save(name, content)
+            if saved_name != name:
+                storage.delete(saved_name)
+            return name
+        tmp_name = storage.save(f'{name}.tmp', content)
+        os.replace(storage.path(tmp_name), storage.path(name))
+        return name
+
+    @classmethod
+    def delete_renditions(cls, image_field):
+        if not image_field:
+            return
+        storage = image_field.storage
+        for size, edge in cls.SIZES.items():
+            if edge is None:
+                continue
+            try:
+                storage.delete(cls.get_rendition_name(image_field, size))
+            except Exception as e:
+                logger.error(f"Error deleting rendition {size} of {image_field.name}: {str(e)}")
+
+    @staticmethod
+    def build_etag(storage, name):
+        """Strong ETag derived from the rendition file's size and mtime."""
+        modified = storage.get_modified_time(name)
+        return f'"{storage.size(name):x}-{int(modified.timestamp() * 1_000_000):x}"'
+
+    @classmethod
+    def get_size_hint(cls, context):
+        """Requested rendition size from serializer context or `?image_size=`."""
+        size = context.get('image_size')
+        request = context.get('request')
+        if size is None and request is not None:
+            size = getattr(request, 'query_params', request.GET).get('image_size')
+        return size if cls.is_valid_size(size) else None
+
+    @staticmethod
+    def get_rendition_url(kind, image, size):
+        from django.urls import reverse
+        return reverse('image-rendition', kwargs={'kind': kind, 'uuid': image.uuid, 'size': size})
@@ -1,8 +1,9 @@
 from datetime import datetime, time
 from django.db.models import Sum, Q
-from api.models import Invoice, Order, OrderPayment,Appointment, ChannelPayment, SolderingPayment, SolderingOrder,SolderingInvoice, PaymentMethodBanks, Expense
+from api.models import Invoice, Order, OrderPayment,Appointment, ChannelPayment, SolderingPayment, SolderingOrder,SolderingInvoice, Expense
 from django.utils import timezone
 from api.services.time_zone_convert_service import TimezoneConverterService
+from api.services.reference_data_cache import ReferenceDataCache
 from django.db.models.functions import TruncDate
 
 class InvoiceReportService:
@@ -38,17 +39,15 @@ class InvoiceReportService:
         
         payments = OrderPayment.all_objects.select_related("order").filter(
             (Q(payment_date__range=(start_datetime, end_datetime)) |  Q(order__deleted_at__range=(start_datetime, end_datetime))),
-            order__branch_id=branch_id,
+            branch_id=branch_id,
             is_edited=False
         )
         # print(f"Found {payments.count()} payments")
 
         # Get all active payment method banks for this branch (credit card banks only, to match frontend)
-        branch_banks = PaymentMethodBanks.objects.filter(
-            branch_id=branch_id,
-            payment_method='credit_card',
-            is_active=True
-        ).values_list('name', flat=True)
+        branch_banks = [
+            bank.name for bank in ReferenceDataCache.get_branch_banks(branch_id, 'credit_card')
+        ]
         
         # Organize payments by order
         # print("\n=== Processing Payments ===")
@@ -147,7 +146,7 @@ class InvoiceReportService:
     # Get all soldering payments made on that date for that branch
         soldering_payments = SolderingPayment.objects.select_related("order").filter(
             payment_date__range=(start_datetime, end_datetime),
-            order__branch_id=branch_id,
+            branch_id=branch_id,
             is_deleted=False
         )
         # print(f"Found {soldering_payments.count()} soldering payments")
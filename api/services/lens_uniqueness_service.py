@@ -1,52 +1,122 @@
-from rest_framework.exceptions import ValidationError
+import hashlib
 from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
 from ..models import Lens, LensPower
 
+DUPLICATE_LENS_MESSAGE = "A lens with the same type, coating, brand, and powers already exists."
+
 
 class LensUniquenessService:
+    """
+    A lens is identified by type, coating, brand and its set of powers. The
+    power set is stored on Lens.power_fingerprint, and the unique constraint
+    on (type, coating, brand, power_fingerprint) makes duplicate detection a
+    single indexed lookup that the database also enforces.
+    """
+
+    @staticmethod
+    def get_fingerprint(powers):
+        """
+        Canonical hash of a power set.
+
+        powers : iterable of (side, power_id, value) tuples. The order of the
+                 tuples does not matter; side may be None.
+        """
+        canonical = sorted(
+            (side or '', int(power_id), str(Decimal(str(value)).quantize(Decimal('0.01'))))
+            for side, power_id, value in powers
+        )
+        payload = ';'.join(f"{side}|{power_id}|{value}" for side, power_id, value in canonical)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def get_fingerprint_from_data(powers_data):
+        """Fingerprint of request power dicts with 'side', 'value' and 'power' keys."""
+        return LensUniquenessService.get_fingerprint(
+            (power.get('side'), power['power'], power['value']) for power in powers_data
+        )
+
     @staticmethod
     def check_lens_uniqueness(type_id, coating_id, brand_id, powers_data, exclude_lens_id=None):
         """
         Checks if a lens with the same type, coating, brand, and powers already exists.
-        
+
         Args:
             type_id: ID of the lens type
             coating_id: ID of the coating
             brand_id: ID of the brand
             powers_data: List of power dictionaries with 'side', 'value', 'power' keys
             exclude_lens_id: ID of the lens to exclude (for updates)
-        
+
+        Returns:
+            The power fingerprint, to store on the lens being saved.
+
         Raises:
             ValidationError: If a duplicate lens is found
         """
-        # Find existing lenses with same type, coating, brand
+        fingerprint = LensUniquenessService.get_fingerprint_from_data(powers_data)
         existing_lenses = Lens.objects.filter(
             type_id=type_id,
             coating_id=coating_id,
-            brand_id=brand_id
+            brand_id=brand_id,
+            power_fingerprint=fingerprint,
         )
-        
         if exclude_lens_id:
             existing_lenses = existing_lenses.exclude(id=exclude_lens_id)
-        
-        if not existing_lenses.exists():
-            return  # No existing lenses with same basic attributes, so unique
-        
-        # Prepare incoming power set
-        incoming_power_set = set(
-            (power['side'], str(Decimal(str(power['value'])).quantize(Decimal('0.01'))), power['power'])
-            for power in powers_data
-        )
-        
-        # Check against each existing lens
-        for existing_lens in existing_lenses:
-            existing_powers = existing_lens.lens_powers.all()
-            existing_power_set = set(
-                (p.side, str(p.value), p.power_id)  # side, value as string, power_id
-                for p in existing_powers
-            )
-            
-            if incoming_power_set == existing_power_set:
-                raise ValidationError(
-                    "A lens with the same type, coating, brand, and powers already exists."
-                )
\ No newline at end of file
+
+        if existing_lenses.exists():
+            raise ValidationError(DUPLICATE_LENS_MESSAGE)
+        return fingerprint
+
+    @staticmethod
+    def save_lens(serializer, **kwargs):
+        """
+        Save a LensSerializer, turning a unique_lens_power_set violation (a
+        concurrent duplicate, or a type/coating/brand change onto another
+        lens's power set) into a ValidationError.
+        """
+        try:
+            with transaction.atomic():
+                return serializer.save(**kwargs)
+        except IntegrityError:
+            raise ValidationError(DUPLICATE_LENS_MESSAGE)
+
+    @staticmethod
+    def set_fingerprint(lens, fingerprint):
+        """Store a fingerprint already checked with check_lens_uniqueness."""
+        lens.power_fingerprint = fingerprint
+        try:
+            with transaction.atomic():
+                Lens.objects.filter(pk=lens.pk).update(power_fingerprint=fingerprint)
+        except IntegrityError:
+            raise ValidationError(DUPLICATE_LENS_MESSAGE)
+
+    @staticmethod
+    def refresh_fingerprints(lens_ids):
+        """
+        Recompute the fingerprint of each lens from its current LensPower rows.
+        Call once after a set of power changes, not per row, so an
+        intermediate power set never has to be unique.
+        """
+        lens_ids = set(lens_ids)
+        if not lens_ids:
+            return
+
+        powers = {lens_id: [] for lens_id in lens_ids}
+        for lens_id, side, power_id, value in LensPower.objects.filter(
+            lens_id__in=lens_ids
+        ).values_list('lens_id', 'side', 'power_id', 'value'):
+            powers[lens_id].append((side, power_id, value))
+
+        lenses = list(Lens.objects.filter(id__in=lens_ids).only('id', 'power_fingerprint'))
+        for lens in lenses:
+            lens.power_fingerprint = LensUniquenessService.get_fingerprint(powers[lens.id])
+
+        try:
+            with transaction.atomic():
+                Lens.objects.bulk_update(lenses, ['power_fingerprint'])
+        except IntegrityError:
+            raise ValidationError(DUPLICATE_LENS_MESSAGE)
@@ -0,0 +1,58 @@
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from ..models import Order, OrderProgress
+
+
+class OrderProgressService:
+
+    @staticmethod
+    def bulk_transition(order_ids, progress_status):
+        """
+        Move many orders to `progress_status` with a fixed number of queries.
+
+        Locks the orders and reads each one's latest progress status in the
+        same SELECT, works out the transitions in memory, inserts the new
+        OrderProgress rows in one bulk insert and clears fitting_on_collection
+        with one UPDATE. Must run inside a transaction.
+
+        Returns (results, updated_orders): results is
+        [{"order_id", "status": "created" | "already_set"}] in order of the
+        locked queryset; updated_orders are the orders that got a new row.
+        """
+        latest_status = (
+            OrderProgress.objects
+            .filter(order=OuterRef('pk'))
+            .order_by('-changed_at', '-id')
+            .values('progress_status')[:1]
+        )
+        orders = list(
+            Order.objects
+            .select_related('customer', 'branch')
+            .select_for_update(of=('self',))
+            .filter(id__in=order_ids, is_deleted=False)
+            .annotate(latest_progress_status=Subquery(latest_status))
+        )
+
+        if progress_status == "issue_to_customer":
+            fitting_ids = [order.id for order in orders if order.fitting_on_collection]
+            if fitting_ids:
+                Order.objects.filter(id__in=fitting_ids).update(fitting_on_collection=False)
+                for order in orders:
+                    order.fitting_on_collection = False
+
+        now = timezone.now()
+        results = []
+        updated_orders = []
+        new_progress = []
+        for order in orders:
+            if order.latest_progress_status == progress_status:
+                results.append({"order_id": order.id, "status": "already_set"})
+                continue
+
+            new_progress.append(OrderProgress(order=order, progress_status=progress_status, changed_at=now))
+            results.append({"order_id": order.id, "status": "created"})
+            updated_orders.append(order)
+
+        OrderProgress.objects.bulk_create(new_progress, batch_size=1000)
+        return results, updated_orders
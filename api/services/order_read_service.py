@@ -0,0 +1,82 @@
+from django.db.models import Prefetch
+
+from ..models import Invoice, LensPower, MntOrder, Order, OrderItem, OrderPayment, OrderProgress
+
+
+class OrderReadService:
+    """
+    Query graph for rendering OrderSerializer (and InvoiceSerializer, which
+    nests it) without per-row queries.
+
+    Payments, progress and MNT orders are prefetched into the
+    `prefetched_payments`, `prefetched_progress` and `prefetched_mnt_orders`
+    attributes that OrderSerializer reads when present.
+    """
+
+    ORDER_RELATED = ['branch', 'sales_staff_code', 'invoice', 'bus_title', 'issued_by']
+
+    @staticmethod
+    def get_item_queryset():
+        return (
+            OrderItem.objects
+            .select_related(
+                'lens__brand', 'lens__type', 'lens__coating',
+                'frame__brand', 'frame__code', 'frame__color', 'frame__image',
+                'external_lens__lens_type', 'external_lens__coating', 'external_lens__brand',
+                'other_item', 'hearing_item', 'user', 'admin',
+            )
+            .prefetch_related(
+                Prefetch('lens__lens_powers', queryset=LensPower.objects.select_related('power'))
+            )
+        )
+
+    @staticmethod
+    def get_prefetches(prefix=''):
+        """Prefetch objects for an Order reached through `prefix` (e.g. 'order__')."""
+        return [
+            Prefetch(f'{prefix}order_items', queryset=OrderReadService.get_item_queryset()),
+            Prefetch(
+                f'{prefix}orderpayment_set',
+                queryset=OrderPayment.objects.filter(is_deleted=False).select_related('user', 'admin'),
+                to_attr='prefetched_payments',
+            ),
+            Prefetch(
+                f'{prefix}order_progress_status',
+                queryset=OrderProgress.objects.order_by('-changed_at'),
+                to_attr='prefetched_progress',
+            ),
+            Prefetch(
+                f'{prefix}mnt_orders',
+                queryset=MntOrder.objects.select_related('user', 'admin'),
+                to_attr='prefetched_mnt_orders',
+            ),
+        ]
+
+    @staticmethod
+    def with_read_graph(queryset):
+        """Apply the full read graph to an Order queryset."""
+        return (
+            queryset
+            .select_related(*OrderReadService.ORDER_RELATED)
+            .prefetch_related(*OrderReadService.get_prefetches())
+        )
+
+    @staticmethod
+    def with_invoice_read_graph(queryset):
+        """Apply the full read graph to an Invoice queryset, for InvoiceSerializer."""
+        return (
+            queryset
+            .select_related('order__customer', 'order__refraction', *[
+                f'order__{name}' for name in OrderReadService.ORDER_RELATED
+            ])
+            .prefetch_related(*OrderReadService.get_prefetches('order__'))
+        )
+
+    @staticmethod
+    def get_order(pk):
+        """Load one order with the read graph, e.g. to render it after a write."""
+        return OrderReadService.with_read_graph(Order.all_objects.filter(pk=pk)).get()
+
+    @staticmethod
+    def get_invoice_queryset():
+        return OrderReadService.with_invoice_read_graph(Invoice.all_objects.all())
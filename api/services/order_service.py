@@ -7,6 +7,7 @@ from ..services.external_lens_service import ExternalLensService
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from ..services.stock_validation_service import StockValidationService
+from ..services.reference_data_cache import ReferenceDataCache
 from django.utils import timezone
 from decimal import Decimal, InvalidOperation
 class OrderService:
@@ -248,7 +249,10 @@ class OrderService:
                 )
             
             if bus_title_id is not None:
-                order.bus_title = BusSystemSetting.objects.get(pk=bus_title_id)
+                bus_title = ReferenceDataCache.get_bus_setting(bus_title_id)
+                if bus_title is None:
+                    raise BusSystemSetting.DoesNotExist("BusSystemSetting matching query does not exist.")
+                order.bus_title = bus_title
             
             for field in ['pd', 'height', 'right_height', 'left_height', 'left_pd', 'right_pd']:
                 if field in order_data:
@@ -1,7 +1,123 @@
 # visionmain/api/pagination.py
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 class PaginationService(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'  # Optional: allow client to override
-    max_page_size = 100  # Optional: limit max page size
\ No newline at end of file
+    max_page_size = 100  # Optional: limit max page size
+
+
+class KeysetPaginationService(PaginationService):
+    """
+    PaginationService with an opt-in keyset (cursor) mode for long listings.
+
+    Without extra parameters it pages by number exactly like PaginationService.
+    With ?pagination=cursor (and then the `cursor` of the next/previous links)
+    it pages on the view's `keyset_ordering`, e.g. ('-timestamp', '-id'): each
+    page is a range filter on those columns instead of an OFFSET, and no
+    COUNT(*) is run unless ?with_count=true. The last field must be unique and
+    all fields must sort the same direction. Any ?ordering= is ignored in this
+    mode.
+    """
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    count_query_param = 'with_count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        self.ordering = tuple(view.keyset_ordering)
+        self.fields = [name.lstrip('-') for name in self.ordering]
+        self.count = queryset.count() if self._wants_count(request) else None
+
+        position, reverse = self._decode_cursor(request, queryset.model)
+        ordering = self._reversed(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        # Going forward there is a previous page whenever we started from a cursor,
+        # and the other way round when going back
+        has_next, has_previous = (position is not None, has_more) if reverse else (has_more, position is not None)
+        self.next_position = self._position(results[-1]) if has_next and results else None
+        self.previous_position = self._position(results[0]) if has_previous and results else None
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self._link(self.next_position, reverse=False)
+        response['previous'] = self._link(self.previous_position, reverse=True)
+        response['results'] = data
+        return Response(response)
+
+    # --- keyset helpers -----------------------------------------------------
+
+    def _wants_count(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+
+    @staticmethod
+    def _reversed(ordering):
+        return tuple(name[1:] if name.startswith('-') else f'-{name}' for name in ordering)
+
+    def _after(self, ordering, position):
+        """Rows strictly after `position` in `ordering`: (a > x) or (a = x and b > y) ..."""
+        lookup = 'lt' if ordering[0].startswith('-') else 'gt'
+        condition = Q()
+        for i, field in enumerate(self.fields):
+            equal = {name: value for name, value in zip(self.fields[:i], position[:i])}
+            condition |= Q(**equal, **{f'{field}__{lookup}': position[i]})
+        return condition
+
+    def _position(self, obj):
+        return [getattr(obj, field) for field in self.fields]
+
+    def _link(self, position, reverse):
+        if position is None:
+            return None
+        payload = json.dumps({'p': position, 'r': reverse}, default=lambda value: value.isoformat())
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def _decode_cursor(self, request, model):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            if len(payload['p']) != len(self.fields):
+                raise ValueError(cursor)
+            position = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, payload['p'])
+            ]
+            return position, bool(payload['r'])
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
@@ -0,0 +1,155 @@
+import threading
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from ..models import (
+    Branch, Brand, BusSystemSetting, Code, Coating, Color, ExpenseMainCategory,
+    ExpenseSubCategory, LenseType, PaymentMethodBanks, Power, SMSTemplate,
+)
+
+_MISSING = object()
+
+
+class ReferenceDataCache:
+    """
+    Shared cache for small, rarely changing tables.
+
+    Each model has a version counter in the cache; every cached entry for
+    the model is stored under that version, so bumping the counter (done by
+    the post_save/post_delete handlers in api/signals.py, after commit)
+    invalidates all of them at once. Queryset update()/bulk writes send no
+    signals; call ReferenceDataCache.bump(Model) after those.
+
+    The backend is settings.CACHES['default'] (CACHE_BACKEND env var). A
+    locmem cache is per process, so with several workers a change is only
+    seen by the other workers once REFERENCE_CACHE_TIMEOUT expires; use the
+    file or redis backend there. Loads always read the primary database, so
+    a lagging report replica can't be cached under a new version.
+    """
+
+    MODELS = (
+        Branch, PaymentMethodBanks, Brand, Color, Code, LenseType, Coating, Power,
+        ExpenseMainCategory, ExpenseSubCategory, BusSystemSetting, SMSTemplate,
+    )
+
+    _stats = defaultdict(lambda: {"hits": 0, "misses": 0})
+    _stats_lock = threading.Lock()
+
+    # --- versions -------------------------------------------------------
+
+    @staticmethod
+    def _version_key(model):
+        return f"refdata:version:{model._meta.label_lower}"
+
+    @staticmethod
+    def get_version(model):
+        key = ReferenceDataCache._version_key(model)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, 1, timeout=None)
+            version = cache.get(key, 1)
+        return version
+
+    @staticmethod
+    def bump(model):
+        """Invalidate every cached entry of `model`."""
+        key = ReferenceDataCache._version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Counter evicted or never set; any value other than the old one will do
+            cache.set(key, ReferenceDataCache.get_version(model) + 1, timeout=None)
+
+    @staticmethod
+    def bump_on_commit(model):
+        # Bumping before commit would let another request cache the old rows
+        # under the new version
+        transaction.on_commit(lambda: ReferenceDataCache.bump(model))
+
+    # --- stats ----------------------------------------------------------
+
+    @staticmethod
+    def _count(model, outcome):
+        with ReferenceDataCache._stats_lock:
+            ReferenceDataCache._stats[model._meta.label][outcome] += 1
+
+    @staticmethod
+    def get_stats():
+        """Hit/miss counts per model for this process since start (or reset_stats)."""
+        with ReferenceDataCache._stats_lock:
+            return {label: dict(counts) for label, counts in ReferenceDataCache._stats.items()}
+
+    @staticmethod
+    def reset_stats():
+        with ReferenceDataCache._stats_lock:
+            ReferenceDataCache._stats.clear()
+
+    # --- generic access -------------------------------------------------
+
+    @staticmethod
+    def get(model, name, loader):
+        """
+        Return the cached value of `name` for `model`, calling `loader()` on
+        a miss. None is a valid value.
+        """
+        key = f"refdata:{model._meta.label_lower}:{name}"
+        version = ReferenceDataCache.get_version(model)
+        value = cache.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            ReferenceDataCache._count(model, "hits")
+            return value
+
+        ReferenceDataCache._count(model, "misses")
+        value = loader()
+        cache.set(key, value, version=version)
+        return value
+
+    @staticmethod
+    def get_all(model):
+        """All rows of a reference model as {id: instance}."""
+        return ReferenceDataCache.get(model, 'all', lambda: {
+            obj.pk: obj for obj in model._default_manager.using(DEFAULT_DB_ALIAS).order_by('pk')
+        })
+
+    @staticmethod
+    def get_by_id(model, pk):
+        """One row of a reference model, or None. `pk` may be a string."""
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            return None
+        return ReferenceDataCache.get_all(model).get(pk)
+
+    # --- typed accessors ------------------------------------------------
+
+    @staticmethod
+    def get_branch(branch_id):
+        return ReferenceDataCache.get_by_id(Branch, branch_id)
+
+    @staticmethod
+    def get_bank(bank_id):
+        return ReferenceDataCache.get_by_id(PaymentMethodBanks, bank_id)
+
+    @staticmethod
+    def get_branch_banks(branch_id, method):
+        """Active banks of a branch for one payment method, in id order."""
+        branch_id = int(branch_id)
+        return [
+            bank for bank in ReferenceDataCache.get_all(PaymentMethodBanks).values()
+            if bank.branch_id == branch_id and bank.payment_method == method and bank.is_active
+        ]
+
+    @staticmethod
+    def get_bus_setting(pk):
+        return ReferenceDataCache.get_by_id(BusSystemSetting, pk)
+
+    @staticmethod
+    def get_active_sms_template(template_type):
+        return ReferenceDataCache.get(
+            SMSTemplate, f'active:{template_type}',
+            lambda: SMSTemplate.objects.using(DEFAULT_DB_ALIAS).filter(
+                template_type=template_type, active=True
+            ).first(),
+        )
@@ -1,12 +1,17 @@
+import itertools
 import time
 import requests
 from django.conf import settings
 from rest_framework.exceptions import ValidationError
 
 from ..models import SMSToken, SMSTemplate, SMSLog
+from .reference_data_cache import ReferenceDataCache
 
-LOGIN_URL = "https://esms.dialog.lk/api/v2/user/login"
-SEND_SMS_URL = "https://e-sms.dialog.lk/api/v2/sms"
+LOGIN_URL = getattr(settings, "SMS_LOGIN_URL", "https://esms.dialog.lk/api/v2/user/login")
+SEND_SMS_URL = getattr(settings, "SMS_SEND_URL", "https://e-sms.dialog.lk/api/v2/sms")
+
+# Keeps transaction ids unique when several sends happen in the same millisecond
+_transaction_sequence = itertools.count()
 
 
 class SMSService:
@@ -66,7 +71,7 @@ class SMSService:
         token = SMSService._get_valid_token()
 
         # transaction_id must be a unique integer up to 18 digits
-        transaction_id = int(time.time() * 1000) % (10 ** 18)
+        transaction_id = (int(time.time() * 1000) * 1000 + next(_transaction_sequence) % 1000) % (10 ** 18)
 
         msisdn = [{"mobile": num} for num in mobile_numbers]
 
@@ -183,9 +188,7 @@ class SMSService:
 
         Raises ValidationError if no active template is found.
         """
-        template = SMSTemplate.objects.filter(
-            template_type=template_type, active=True
-        ).first()
+        template = ReferenceDataCache.get_active_sms_template(template_type)
 
         if not template:
             raise ValidationError(
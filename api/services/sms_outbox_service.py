@@ -0,0 +1,190 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from ..models import SMSOutbox
+from .send_sms_service import SMSService
+from .reference_data_cache import ReferenceDataCache
+
+logger = logging.getLogger(__name__)
+
+
+class SMSOutboxService:
+    """
+    Transactional outbox for SMS.
+
+    Callers enqueue rendered messages inside their own transaction, so an SMS
+    only exists if the change that triggered it commits. The
+    `send_sms_outbox` command claims due rows in batches, sends them through
+    SMSService with a bounded thread pool and retries failures with
+    exponential backoff.
+    """
+
+    @staticmethod
+    def enqueue_by_template_type(template_type: str, recipients: list) -> list:
+        """
+        Render the active template for each recipient and queue the messages.
+
+        recipients : same shape as SMSService.send_sms_by_template_type,
+                     dicts with a 'mobile' key plus placeholder context.
+
+        Returns the outbox ids in recipient order; recipients without a
+        mobile number are skipped. Raises ValidationError if no active
+        template is found.
+        """
+        template = ReferenceDataCache.get_active_sms_template(template_type)
+
+        if not template:
+            raise ValidationError(
+                f"No active SMS template found for type '{template_type}'."
+            )
+
+        rows = []
+        for recipient in recipients:
+            mobile = recipient.get("mobile")
+            if not mobile:
+                continue
+            context = {k: v for k, v in recipient.items() if k != "mobile"}
+            rows.append(SMSOutbox(
+                mobile_number=mobile,
+                message=SMSService._substitute(template.template, context),
+                source_address=template.source_address or None,
+                template=template,
+                template_type=template.template_type,
+            ))
+        if not rows:
+            return []
+
+        # One batch id for the whole insert; MySQL bulk inserts don't return ids
+        batch_id = rows[0].batch_id
+        for row in rows:
+            row.batch_id = batch_id
+        SMSOutbox.objects.bulk_create(rows)
+        return list(
+            SMSOutbox.objects.filter(batch_id=batch_id).order_by('id').values_list('id', flat=True)
+        )
+
+    @staticmethod
+    def enqueue_order_create(order):
+        """
+        Queue the order_create SMS for a new order. Call inside the order's
+        transaction; the message is written in a savepoint, so a missing
+        template or outbox error is logged and never rolls back the order.
+        """
+        patient = order.customer
+        mobile = getattr(patient, 'phone_number', None)
+        if not mobile:
+            return []
+
+        invoice = getattr(order, 'invoice', None)
+        recipient = {
+            "mobile": mobile,
+            "customer_name": getattr(patient, 'name', ''),
+            "branch_name": getattr(order.branch, 'branch_name', ''),
+            "branch_address": getattr(order.branch, 'address', '') or '',
+            "branch_contact_number": getattr(order.branch, 'contact_one', '') or '',
+            "invoice_number": getattr(invoice, 'invoice_number', ''),
+        }
+        try:
+            with transaction.atomic():
+                return SMSOutboxService.enqueue_by_template_type("order_create", [recipient])
+        except Exception as e:
+            logger.warning(f"order_create SMS not queued for order {order.pk}: {e}")
+            return []
+
+    @staticmethod
+    def claim_batch(batch_size, lease_seconds):
+        """
+        Take up to `batch_size` due rows and mark them `sending`. While sending,
+        next_attempt_at is the lease expiry: rows left behind by a crashed
+        worker become due again once it passes.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                SMSOutbox.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=SMSOutbox.Status.PENDING) | Q(status=SMSOutbox.Status.SENDING),
+                    next_attempt_at__lte=now,
+                )
+                .order_by('next_attempt_at', 'id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            SMSOutbox.objects.filter(id__in=ids).update(
+                status=SMSOutbox.Status.SENDING,
+                next_attempt_at=now + timedelta(seconds=lease_seconds),
+            )
+        return list(SMSOutbox.objects.select_related('template').filter(id__in=ids).order_by('id'))
+
+    @staticmethod
+    def get_backoff(attempts):
+        base = getattr(settings, 'SMS_OUTBOX_BACKOFF_SECONDS', 30)
+        cap = getattr(settings, 'SMS_OUTBOX_MAX_BACKOFF_SECONDS', 3600)
+        return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+    @staticmethod
+    def deliver(row, max_attempts):
+        """Send one claimed row and record the outcome. Returns True when sent."""
+        try:
+            SMSService.send_sms(
+                [row.mobile_number],
+                row.message,
+                row.source_address,
+                template=row.template,
+                template_type=row.template_type,
+            )
+        except Exception as e:
+            attempts = row.attempts + 1
+            failed = attempts >= max_attempts
+            SMSOutbox.objects.filter(pk=row.pk).update(
+                attempts=F('attempts') + 1,
+                status=SMSOutbox.Status.FAILED if failed else SMSOutbox.Status.PENDING,
+                next_attempt_at=timezone.now() + SMSOutboxService.get_backoff(attempts),
+                last_error=str(e),
+            )
+            logger.warning(f"SMS outbox {row.pk} attempt {attempts} failed: {e}")
+            return False
+
+        SMSOutbox.objects.filter(pk=row.pk).update(
+            attempts=F('attempts') + 1,
+            status=SMSOutbox.Status.SENT,
+            sent_at=timezone.now(),
+            last_error=None,
+        )
+        return True
+
+    @staticmethod
+    def drain(batch_size=50, concurrency=4, max_attempts=5, lease_seconds=300):
+        """
+        Send due rows until none are left. Returns {"sent": n, "failed": n}.
+        Failed attempts that still have retries left go back to `pending`.
+        """
+        totals = {"sent": 0, "failed": 0}
+
+        def deliver(row):
+            try:
+                return SMSOutboxService.deliver(row, max_attempts)
+            finally:
+                # Worker threads get their own DB connection; don't leak it
+                connection.close()
+
+        while True:
+            rows = SMSOutboxService.claim_batch(batch_size, lease_seconds)
+            if not rows:
+                return totals
+
+            # Log in once up front so the workers don't all race to refresh the token
+            try:
+                SMSService._get_valid_token()
+            except Exception as e:
+                logger.warning(f"SMS login failed before sending a batch: {e}")
+
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='sms-outbox') as executor:
+                for sent in executor.map(deliver, rows):
+                    totals["sent" if sent else "failed"] += 1
@@ -1,8 +1,9 @@
-from ..models import SolderingPayment, SolderingOrder,PaymentMethodBanks
+from ..models import SolderingPayment, SolderingOrder
 from ..serializers import SolderingPaymentSerializer
 from rest_framework.exceptions import ValidationError
 from django.db import transaction
 from decimal import Decimal
+from .reference_data_cache import ReferenceDataCache
 
 
 class SolderingPaymentService:
@@ -25,9 +26,8 @@ class SolderingPaymentService:
             bank_id = payment.get('payment_method_bank')
             payment_method_bank = None
             if bank_id:
-                try:
-                    payment_method_bank = PaymentMethodBanks.objects.get(id=bank_id)
-                except PaymentMethodBanks.DoesNotExist:
+                payment_method_bank = ReferenceDataCache.get_bank(bank_id)
+                if payment_method_bank is None:
                     raise ValidationError("Invalid payment_method_bank ID.")
 
             if is_final:
@@ -90,9 +90,8 @@ class SolderingPaymentService:
 
         bank_instance = None
         if payment_method_bank:
-            try:
-                bank_instance = PaymentMethodBanks.objects.get(id=payment_method_bank)
-            except PaymentMethodBanks.DoesNotExist:
+            bank_instance = ReferenceDataCache.get_bank(payment_method_bank)
+            if bank_instance is None:
                 raise ValidationError("Invalid payment_method_bank ID.")
 
         # Create and return the payment instance
@@ -1,65 +1,111 @@
 # inventory/services/stock_adjustment.py
 
 from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
 from django.core.exceptions import ValidationError
 from ..models import Frame, FrameStock, FrameStockHistory
 
+
+def _lock_stocks(branch, frame_ids):
+    """Lock the branch's stock rows for these frames, in id order. Returns {frame_id: FrameStock}."""
+    stocks = {}
+    for stock in (
+        FrameStock.objects.select_for_update()
+        .filter(branch=branch, frame_id__in=frame_ids)
+        .order_by('id')
+    ):
+        # Keep the oldest row if a frame has more than one at this branch
+        stocks.setdefault(stock.frame_id, stock)
+    return stocks
+
+
 def adjust_stock_bulk(action, items, branch, performed_by):
     """
     Adjust stock for multiple frames at a given branch.
-    
+
+    Runs in a fixed number of statements whatever the batch size: one frame
+    lookup, one locking read of the stock rows (plus one insert and re-read
+    for frames with no stock row yet), one UPDATE applying every quantity
+    with F() and one history insert.
+
     :param action: "add" or "remove"
     :param items: list of dicts: [{ "frame_id": int, "quantity": int }]
     :param branch: Branch instance
     :param performed_by: User instance
     :raises: ValidationError if any operation would fail
-    :return: list of updated FrameStock objects
+    :return: list of updated FrameStock objects, one per distinct frame
     """
 
     if action not in ['add', 'remove']:
         raise ValidationError(f"Invalid action: {action}. Must be 'add' or 'remove'.")
 
-    updated_stocks = []
+    # Net change per frame; a frame may appear on several lines
+    deltas = {}
+    for item in items:
+        frame_id = item.get('frame_id')
+        quantity = item.get('quantity')
 
-    with transaction.atomic():
-        for item in items:
-            frame_id = item.get('frame_id')
-            quantity = item.get('quantity')
+        if not frame_id or quantity is None:
+            raise ValidationError("Each item must include 'frame_id' and 'quantity'.")
+        # JSON clients may send ids as strings; "12" and 12 are the same frame
+        try:
+            frame_id = int(frame_id)
+        except (TypeError, ValueError):
+            raise ValidationError(f"Invalid frame ID: {frame_id}.")
+        if not isinstance(quantity, int) or quantity <= 0:
+            raise ValidationError(f"Quantity for Frame ID {frame_id} must be a positive integer.")
 
-            if not frame_id or quantity is None:
-                raise ValidationError("Each item must include 'frame_id' and 'quantity'.")
+        deltas[frame_id] = deltas.get(frame_id, 0) + (quantity if action == 'add' else -quantity)
 
-            try:
-                frame = Frame.objects.get(id=frame_id)
-            except Frame.DoesNotExist:
-                raise ValidationError(f"Frame with ID {frame_id} does not exist.")
+    existing_ids = set(Frame.objects.filter(id__in=deltas).values_list('id', flat=True))
+    missing_ids = [frame_id for frame_id in deltas if frame_id not in existing_ids]
+    if missing_ids:
+        raise ValidationError(f"Frame with ID {missing_ids[0]} does not exist.")
 
-            stock, created = FrameStock.objects.get_or_create(
-                frame=frame,
-                branch=branch,
-                defaults={'qty': 0}
-            )
+    with transaction.atomic():
+        stocks = _lock_stocks(branch, deltas)
 
-            # Stock logic
-            if action == 'add':
-                stock.qty += quantity
-            elif action == 'remove':
-                if stock.qty < quantity:
+        new_frame_ids = [frame_id for frame_id in deltas if frame_id not in stocks]
+        if new_frame_ids:
+            if action == 'remove':
+                frame_id = new_frame_ids[0]
+                raise ValidationError(
+                    f"Not enough stock for Frame ID {frame_id} at Branch {branch}. Available: 0, requested: {-deltas[frame_id]}"
+                )
+            FrameStock.objects.bulk_create([
+                FrameStock(frame_id=frame_id, branch=branch, qty=0) for frame_id in new_frame_ids
+            ])
+            # MySQL bulk inserts don't return ids, so read (and lock) them back
+            stocks = _lock_stocks(branch, deltas)
+
+        if action == 'remove':
+            for frame_id, delta in deltas.items():
+                stock = stocks[frame_id]
+                if stock.qty < -delta:
                     raise ValidationError(
-                        f"Not enough stock for Frame ID {frame_id} at Branch {branch}. Available: {stock.qty}, requested: {quantity}"
+                        f"Not enough stock for Frame ID {frame_id} at Branch {branch}. Available: {stock.qty}, requested: {-delta}"
                     )
-                stock.qty -= quantity
 
-            stock.save()
-            updated_stocks.append(stock)
+        FrameStock.objects.filter(id__in=[stock.id for stock in stocks.values()]).update(
+            qty=F('qty') + Case(
+                *[When(id=stocks[frame_id].id, then=Value(delta)) for frame_id, delta in deltas.items()],
+                output_field=IntegerField(),
+            )
+        )
+        # The rows are locked, so the new quantities are known without re-reading
+        for frame_id, delta in deltas.items():
+            stocks[frame_id].qty += delta
 
-            # Log history
-            FrameStockHistory.objects.create(
-                frame=frame,
+        # Log history, one row per item as submitted
+        # (FrameStockHistory has no performed_by column yet)
+        FrameStockHistory.objects.bulk_create([
+            FrameStockHistory(
+                frame_id=item['frame_id'],
                 branch=branch,
                 action=action,
-                quantity_changed=quantity,
-                performed_by=performed_by
+                quantity_changed=item['quantity'],
             )
+            for item in items
+        ])
 
-    return
+    return [stocks[frame_id] for frame_id in deltas]
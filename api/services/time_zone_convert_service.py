@@ -1,10 +1,31 @@
 #TimezoneConverterService class 
-from datetime import datetime, time as datetime_time  # ✅ Fixed import
+from datetime import datetime, time as datetime_time, timedelta  # ✅ Fixed import
 from django.utils import timezone
 
 
 class TimezoneConverterService:
 
+    @staticmethod
+    def local_day_start(day):
+        """Aware datetime of local midnight at the start of `day` (a date, datetime or 'YYYY-MM-DD')."""
+        if isinstance(day, str):
+            day = datetime.strptime(day, '%Y-%m-%d').date()
+        elif isinstance(day, datetime):
+            day = timezone.localtime(day).date() if timezone.is_aware(day) else day.date()
+        return timezone.make_aware(datetime.combine(day, datetime_time.min))
+
+    @staticmethod
+    def local_day_bounds(start_day, end_day=None):
+        """
+        Half-open range (start, end) of aware datetimes covering the local
+        calendar days start_day..end_day inclusive (just start_day if no
+        end_day). Filtering `field__gte=start, field__lt=end` gives the same
+        rows as a `field__date` lookup, but can use an index on the column.
+        """
+        start = TimezoneConverterService.local_day_start(start_day)
+        end = TimezoneConverterService.local_day_start(end_day or start_day)
+        return start, TimezoneConverterService.local_day_start(end.date() + timedelta(days=1))
+
     @staticmethod
     def format_date_with_timezone(start_date, end_date):
         """
@@ -0,0 +1,72 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import (
+    ChannelPayment, Expense, ExpenseReturn, OrderPayment, OtherIncome, SafeTransaction, SolderingPayment,
+)
+from .services.finance_summary_service import DailyFinanceSummaryService
+from .services.reference_data_cache import ReferenceDataCache
+
+# Rows that move cash in hand: model -> (date field, how to reach the branch id)
+CASH_AFFECTING_MODELS = {
+    OrderPayment: ('payment_date', lambda payment: payment.branch_id),
+    ChannelPayment: ('payment_date', lambda payment: payment.branch_id),
+    SolderingPayment: ('payment_date', lambda payment: payment.branch_id),
+    Expense: ('created_at', lambda expense: expense.branch_id),
+    ExpenseReturn: ('created_at', lambda expense_return: expense_return.branch_id),
+    OtherIncome: ('date', lambda income: income.branch_id),
+    SafeTransaction: ('date', lambda transaction: transaction.branch_id),
+}
+
+
+def remember_previous_cash_date(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Keep the stored date and branch of a row about to be updated, so moving
+    it from an old day to a newer one also marks the old day stale.
+    """
+    instance._previous_cash_day = None
+    date_field, _ = CASH_AFFECTING_MODELS[sender]
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not {date_field, 'branch', 'branch_id'} & set(update_fields):
+        return
+    instance._previous_cash_day = sender._base_manager.filter(pk=instance.pk).values_list(
+        'branch_id', date_field,
+    ).first()
+
+
+def mark_backdated_cash_change(sender, instance, **kwargs):
+    """
+    A cash-affecting row written or deleted with a date before today makes
+    that day's DailyCashInHandRecord, and every one after it, stale, as well
+    as every CashBalanceCheckpoint whose running total includes it. An
+    update marks the row's previous date as well.
+    Bulk inserts and queryset updates do not send signals and are not tracked.
+    """
+    date_field, get_branch_id = CASH_AFFECTING_MODELS[sender]
+    try:
+        branch_id = get_branch_id(instance)
+    except ObjectDoesNotExist:
+        # Parent removed in the same cascade
+        return
+    current = (branch_id, getattr(instance, date_field))
+    DailyFinanceSummaryService.mark_stale(*current)
+
+    previous = instance.__dict__.pop('_previous_cash_day', None)
+    if previous is not None and previous != current:
+        DailyFinanceSummaryService.mark_stale(*previous)
+
+
+for model in CASH_AFFECTING_MODELS:
+    pre_save.connect(remember_previous_cash_date, sender=model, dispatch_uid=f'cash-previous-{model.__name__}')
+    post_save.connect(mark_backdated_cash_change, sender=model, dispatch_uid=f'cash-dirty-save-{model.__name__}')
+    post_delete.connect(mark_backdated_cash_change, sender=model, dispatch_uid=f'cash-dirty-delete-{model.__name__}')
+
+
+def bump_reference_data_version(sender, **kwargs):
+    ReferenceDataCache.bump_on_commit(sender)
+
+
+for model in ReferenceDataCache.MODELS:
+    post_save.connect(bump_reference_data_version, sender=model, dispatch_uid=f'refdata-save-{model.__name__}')
+    post_delete.connect(bump_reference_data_version, sender=model, dispatch_uid=f'refdata-delete-{model.__name__}')
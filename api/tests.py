@@ -1,3 +1,908 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import SkipTest, mock
 
-# Create your tests here.
+import requests
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connections, transaction
+from django.db.models.signals import post_save
+from django.http import FileResponse, HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .db.replica import PIN_COOKIE, REPORTS_DB, ReplicaPinningMiddleware, reports_db
+from .middleware import CompressionMiddleware
+from .models import (
+    Appointment, AppointmentChannelCounter, AppointmentInvoiceCounter, Branch, Brand, CashBalanceCheckpoint,
+    CashInHandDirtyDate, ChannelPayment, Coating, Code, Color, DailyCashInHandRecord, Doctor, Expense,
+    ExpenseMainCategory, ExpenseSubCategory, Frame, FrameImage, FrameStock, Lens, LenseType, LensPower, Order,
+    OrderImage, OrderItem, OrderPayment, OrderProgress, OtherIncome, OtherIncomeCategory, OtherItem, Patient,
+    PaymentMethodBanks, Power, Schedule, SMSLog, SMSOutbox, SMSTemplate,
+)
+from .serializers import OrderImageSerializer, OrderSerializer
+from .services.channel_booking_service import ChannelBookingService
+from .services.doctor_schedule_service import DoctorScheduleService
+from .services.finance_summary_service import DailyFinanceSummaryService
+from .services.image_uploard_service import ImageRenditionService
+from .services.order_read_service import OrderReadService
+from .services.reference_data_cache import ReferenceDataCache
+from .services.sms_outbox_service import SMSOutboxService
+from .services.stock_adjustment import adjust_stock_bulk
+
+
+def local(*args):
+    """Aware datetime in the project time zone (Asia/Colombo)."""
+    return timezone.make_aware(datetime(*args))
+
+
+def make_order(branch, total=Decimal('10000.00'), **kwargs):
+    patient = Patient.objects.create(name='Test Patient', phone_number='0771234567')
+    return Order.objects.create(customer=patient, branch=branch, sub_total=total, total_price=total, **kwargs)
+
+
+def make_appointment(branch, day, channel_no=1, **kwargs):
+    doctor = kwargs.pop('doctor', None) or Doctor.objects.create(name='Dr. Silva')
+    schedule, _ = Schedule.objects.get_or_create(doctor=doctor, branch=branch, date=day, start_time=time(9, 0), status='DOCTOR')
+    patient = Patient.objects.create(name='Channel Patient', phone_number='0777654321')
+    return Appointment.objects.create(
+        doctor=doctor, patient=patient, schedule=schedule, date=day, time=time(9, 0),
+        amount=Decimal('2000.00'), channel_no=channel_no, branch=branch, **kwargs,
+    )
+
+
+class DoctorScheduleTransferTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(branch_name='Main', location='Colombo')
+        self.doctor = Doctor.objects.create(name='Dr. Perera')
+
+    def slot(self, day):
+        return Schedule.objects.create(
+            doctor=self.doctor, branch=self.branch, date=day, start_time=time(9, 0), status='DOCTOR',
+        )
+
+    def test_overlapping_ranges_keep_shared_days(self):
+        day1, day2 = self.slot(date(2030, 1, 1)), self.slot(date(2030, 1, 2))
+
+        targets = DoctorScheduleService.transfer_schedule_range(
+            doctor_ids=[self.doctor.id], branch_id=self.branch.id,
+            from_date='2030-01-01', from_end_date='2030-01-02', to_date='2030-01-02',
+        )
+
+        self.assertEqual([s.date for s in targets], [date(2030, 1, 2), date(2030, 1, 3)])
+        self.assertEqual(targets[0].id, day2.id)
+        day1.refresh_from_db()
+        day2.refresh_from_db()
+        self.assertEqual(day1.status, 'Unavailable')
+        self.assertEqual(day2.status, 'DOCTOR')
+
+
+    def test_appointment_range_moves_in_one_update(self):
+        first = make_appointment(self.branch, date(2030, 1, 1), channel_no=3, doctor=self.doctor)
+        second = make_appointment(self.branch, date(2030, 1, 2), channel_no=5, doctor=self.doctor)
+
+        with CaptureQueriesContext(connections['default']) as queries:
+            moved = DoctorScheduleService.transfer_appointment_range(
+                doctor_ids=[self.doctor.id], branch_id=self.branch.id,
+                from_date='2030-01-01', from_end_date='2030-01-02', to_date='2030-01-10',
+            )
+
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "api_appointment"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual([(a.id, a.date, a.status) for a in moved], [
+            (first.id, date(2030, 1, 10), 'Confirmed'),
+            (second.id, date(2030, 1, 11), 'Confirmed'),
+        ])
+        # New bookings on the target days continue after the moved numbers
+        self.assertEqual(AppointmentChannelCounter.allocate(self.doctor.id, self.branch.id, date(2030, 1, 11)), 6)
+
+class FinanceSummaryTests(TestCase):
+    day = date(2030, 6, 15)
+
+    def setUp(self):
+        self.branch = Branch.objects.create(branch_name='Main', location='Colombo')
+        noon = local(2030, 6, 15, 12, 0)
+
+        order = make_order(self.branch)
+        for method, amount in (('cash', 1000), ('credit_card', 500), ('online_transfer', 200)):
+            OrderPayment.objects.create(order=order, payment_date=noon, amount=amount, payment_method=method)
+        # Edited payments and other days are left out
+        OrderPayment.objects.create(order=order, payment_date=noon, amount=999, payment_method='cash', is_edited=True)
+        OrderPayment.objects.create(order=order, payment_date=local(2030, 6, 16, 0, 0), amount=999, payment_method='cash')
+
+        appointment = make_appointment(self.branch, self.day)
+        ChannelPayment.objects.create(appointment=appointment, payment_date=noon, amount=800, payment_method='cash')
+
+        main = ExpenseMainCategory.objects.create(name='Office')
+        sub = ExpenseSubCategory.objects.create(main_category=main, name='Tea')
+        expense = Expense.objects.create(
+            branch=self.branch, main_category=main, sub_category=sub, amount=300, paid_source='cash',
+        )
+        income = OtherIncome.objects.create(
+            branch=self.branch, category=OtherIncomeCategory.objects.create(name='Scrap'), amount=150,
+        )
+        Expense.objects.filter(pk=expense.pk).update(created_at=noon)
+        OtherIncome.objects.filter(pk=income.pk).update(date=noon)
+
+        DailyCashInHandRecord.objects.create(
+            branch_id=self.branch.id, date=date(2030, 6, 14), cash_in_hand=5000, before_balance=0, today_balance=5000,
+        )
+
+    def test_calculate_for_day_query_budget(self):
+        # Day totals, three payment pivots, deposits, and the record upsert
+        # (a SELECT and an INSERT inside two savepoints)
+        with self.assertNumQueries(11):
+            summary = DailyFinanceSummaryService.calculate_for_day(self.branch.id, self.day)
+
+        self.assertEqual(summary['before_balance'], Decimal('5000.00'))
+        self.assertEqual(summary['today_order_payments'], Decimal('1700.00'))
+        self.assertEqual(summary['today_channel_payments'], Decimal('800.00'))
+        self.assertEqual(summary['today_other_income'], Decimal('150.00'))
+        self.assertEqual(summary['today_expenses'], Decimal('300.00'))
+        self.assertEqual(summary['today_balance'], Decimal('1650.00'))
+        self.assertEqual(summary['cash_in_hand'], Decimal('6650.00'))
+        self.assertEqual(summary['today_total_cash_payments'], Decimal('1800.00'))
+        self.assertEqual(summary['today_total_credit_card_payments'], Decimal('500.00'))
+        self.assertEqual(summary['today_total_online_payments'], Decimal('200.00'))
+
+        record = DailyCashInHandRecord.objects.get(branch_id=self.branch.id, date=self.day)
+        self.assertEqual(record.cash_in_hand, Decimal('6650.00'))
+
+    def test_recompute_range_matches_calculate_for_day(self):
+        DailyFinanceSummaryService.recompute_range(self.branch.id, self.day, date(2030, 6, 16))
+        records = {
+            record.date: (record.before_balance, record.today_balance, record.cash_in_hand)
+            for record in DailyCashInHandRecord.objects.filter(branch_id=self.branch.id, date__gte=self.day)
+        }
+        self.assertEqual(records, {
+            self.day: (Decimal('5000.00'), Decimal('1650.00'), Decimal('6650.00')),
+            date(2030, 6, 16): (Decimal('6650.00'), Decimal('999.00'), Decimal('7649.00')),
+        })
+
+        summary = DailyFinanceSummaryService.calculate_for_day(self.branch.id, self.day)
+        self.assertEqual(records[self.day], (summary['before_balance'], summary['today_balance'], summary['cash_in_hand']))
+
+    def test_recompute_range_query_count_does_not_grow_with_days(self):
+        # Previous record, existing records, one grouped query per cash table,
+        # and the insert inside a savepoint
+        with self.assertNumQueries(12):
+            DailyFinanceSummaryService.recompute_range(self.branch.id, self.day, date(2030, 6, 16))
+        with self.assertNumQueries(13):  # plus the bulk update of the two days written above
+            written = DailyFinanceSummaryService.recompute_range(self.branch.id, self.day, date(2030, 12, 31))
+        self.assertEqual(written, 200)
+
+
+class BackdatedCashChangeTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(branch_name='Main', location='Colombo')
+        self.today = timezone.localdate()
+        self.order = make_order(self.branch)
+
+    def test_moving_a_payment_forward_marks_its_old_day(self):
+        old_day, new_day = self.today - timedelta(days=40), self.today - timedelta(days=2)
+        payment = OrderPayment.objects.create(
+            order=self.order, payment_date=local(old_day.year, old_day.month, old_day.day, 10), amount=500,
+            payment_method='cash',
+        )
+        CashInHandDirtyDate.objects.all().delete()
+        CashBalanceCheckpoint.objects.create(branch_id=self.branch.id, month=new_day.replace(day=1), balance=0)
+
+        payment = OrderPayment.objects.get(pk=payment.pk)
+        payment.payment_date = local(new_day.year, new_day.month, new_day.day, 10)
+        payment.save()
+
+        self.assertEqual(CashInHandDirtyDate.objects.get(branch_id=self.branch.id).dirty_from, old_day)
+        self.assertFalse(CashBalanceCheckpoint.objects.filter(branch_id=self.branch.id).exists())
+
+    def test_moving_payments_to_another_branch_marks_both_branches(self):
+        other = Branch.objects.create(branch_name='Kandy', location='Kandy')
+        first, second = self.today - timedelta(days=40), self.today - timedelta(days=10)
+        for day in (second, first):
+            OrderPayment.objects.create(
+                order=self.order, payment_date=local(day.year, day.month, day.day, 10), amount=500,
+                payment_method='cash',
+            )
+        CashInHandDirtyDate.objects.all().delete()
+        for branch in (self.branch, other):
+            CashBalanceCheckpoint.objects.create(branch_id=branch.id, month=second.replace(day=1), balance=0)
+
+        moved = DailyFinanceSummaryService.move_payments(OrderPayment.all_objects.filter(order=self.order), other.id)
+
+        self.assertEqual(moved, 2)
+        self.assertEqual(OrderPayment.objects.filter(branch_id=other.id).count(), 2)
+        for branch in (self.branch, other):
+            self.assertEqual(CashInHandDirtyDate.objects.get(branch_id=branch.id).dirty_from, first)
+        self.assertFalse(CashBalanceCheckpoint.objects.exists())
+
+
+
+class LocalDateFilterTests(TestCase):
+    """Rows either side of local midnight (Asia/Colombo, UTC+05:30)."""
+
+    def setUp(self):
+        order = make_order(Branch.objects.create(branch_name='Main', location='Colombo'))
+        times = {
+            'day_start': local(2030, 6, 15, 0, 0),
+            'day_end': local(2030, 6, 15, 23, 59, 59, 999999),
+            'previous_day_end': local(2030, 6, 14, 23, 59, 59, 999999),
+            'next_day_start': local(2030, 6, 16, 0, 0),
+        }
+        self.payments = {
+            name: OrderPayment.objects.create(order=order, payment_date=when, amount=100, payment_method='cash').pk
+            for name, when in times.items()
+        }
+        self.ids = {pk: name for name, pk in self.payments.items()}
+
+    def names(self, queryset):
+        return {self.ids[pk] for pk in queryset.values_list('pk', flat=True)}
+
+    def test_on_local_day(self):
+        queryset = OrderPayment.all_objects.on_local_day('payment_date', date(2030, 6, 15))
+        self.assertEqual(self.names(queryset), {'day_start', 'day_end'})
+        # Same rows as the __date lookup it replaces
+        self.assertEqual(self.names(queryset), self.names(OrderPayment.all_objects.filter(payment_date__date=date(2030, 6, 15))))
+
+    def test_in_local_range(self):
+        queryset = OrderPayment.all_objects.in_local_range('payment_date', '2030-06-14', '2030-06-15')
+        self.assertEqual(self.names(queryset), {'previous_day_end', 'day_start', 'day_end'})
+
+    def test_open_ended_range(self):
+        since = OrderPayment.all_objects.in_local_range('payment_date', start=date(2030, 6, 15))
+        self.assertEqual(self.names(since), {'day_start', 'day_end', 'next_day_start'})
+        until = OrderPayment.all_objects.in_local_range('payment_date', end=date(2030, 6, 15))
+        self.assertEqual(self.names(until), {'previous_day_end', 'day_start', 'day_end'})
+        self.assertEqual(self.names(OrderPayment.all_objects.in_local_range('payment_date')), set(self.payments))
+
+
+class FakeSMSGateway:
+    """Stands in for requests.post against the eSMS login and send endpoints."""
+
+    def __init__(self, fail_sends=0):
+        self.fail_sends = fail_sends
+        self.sent = []
+
+    def __call__(self, url, json=None, headers=None, timeout=None):
+        response = mock.Mock(status_code=200)
+        response.raise_for_status.return_value = None
+        if url.endswith('/login'):
+            response.json.return_value = {'status': 'success', 'token': 'test-token', 'expiration': 3600}
+            return response
+        if self.fail_sends:
+            self.fail_sends -= 1
+            raise requests.ConnectionError('gateway unreachable')
+        self.sent.append((json['msisdn'][0]['mobile'], json['message']))
+        response.json.return_value = {'status': 'success', 'data': {'campaignId': 1}}
+        return response
+
+
+class SMSOutboxEnqueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.branch = Branch.objects.create(branch_name='Main', location='Colombo', contact_one='0112345678')
+
+    def test_enqueue_is_part_of_the_callers_transaction(self):
+        SMSTemplate.objects.create(template_type='order_create', template='Hi {{customer_name}}', active=True)
+        order = make_order(self.branch)
+
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                SMSOutboxService.enqueue_order_create(order)
+                raise ValueError('order failed')
+        self.assertFalse(SMSOutbox.objects.exists())
+
+        with transaction.atomic():
+            ids = SMSOutboxService.enqueue_order_create(order)
+        row = SMSOutbox.objects.get()
+        self.assertEqual(ids, [row.id])
+        self.assertEqual((row.mobile_number, row.status), ('0771234567', SMSOutbox.Status.PENDING))
+
+    def test_missing_template_does_not_roll_back_the_order(self):
+        with transaction.atomic(), self.assertLogs('api.services.sms_outbox_service', 'WARNING'):
+            order = make_order(self.branch)
+            self.assertEqual(SMSOutboxService.enqueue_order_create(order), [])
+        self.assertTrue(Order.objects.filter(pk=order.pk).exists())
+        self.assertFalse(SMSOutbox.objects.exists())
+
+
+@override_settings(SMS_USER='user', SMS_PASSWORD='secret', SMS_OUTBOX_BACKOFF_SECONDS=30)
+class SMSOutboxDrainTests(TransactionTestCase):
+    # drain() sends from worker threads, which need committed rows
+
+    def setUp(self):
+        cache.clear()
+        self.template = SMSTemplate.objects.create(
+            template_type='order_create', template='Order ready', active=True,
+        )
+        SMSOutboxService.enqueue_by_template_type(
+            'order_create', [{'mobile': '0771111111'}, {'mobile': '0772222222'}],
+        )
+
+    def test_drain_sends_due_rows(self):
+        gateway = FakeSMSGateway()
+        with mock.patch('api.services.send_sms_service.requests.post', gateway):
+            totals = SMSOutboxService.drain(concurrency=2)
+
+        self.assertEqual(totals, {'sent': 2, 'failed': 0})
+        self.assertEqual(sorted(mobile for mobile, _ in gateway.sent), ['0771111111', '0772222222'])
+        self.assertEqual(SMSOutbox.objects.filter(status=SMSOutbox.Status.SENT, attempts=1).count(), 2)
+        self.assertEqual(SMSLog.objects.filter(status=SMSLog.Status.SUCCESS).count(), 2)
+
+    def test_failed_sends_back_off_and_give_up_after_max_attempts(self):
+        gateway = FakeSMSGateway(fail_sends=10)
+        before = timezone.now()
+        with mock.patch('api.services.send_sms_service.requests.post', gateway), \
+                self.assertLogs('api.services.sms_outbox_service', 'WARNING') as logs:
+            totals = SMSOutboxService.drain(concurrency=1, max_attempts=2)
+        self.assertEqual(len(logs.output), 2)
+
+        # Both rows wait 30s for their retry, so a drain ends after one attempt each
+        self.assertEqual(totals, {'sent': 0, 'failed': 2})
+        for row in SMSOutbox.objects.all():
+            self.assertEqual((row.status, row.attempts), (SMSOutbox.Status.PENDING, 1))
+            self.assertIn('gateway unreachable', row.last_error)
+            self.assertGreaterEqual(row.next_attempt_at, before + timedelta(seconds=30))
+
+        # Second failure doubles the delay and, at max_attempts, gives up
+        SMSOutbox.objects.update(next_attempt_at=timezone.now())
+        with mock.patch('api.services.send_sms_service.requests.post', gateway), \
+                self.assertLogs('api.services.sms_outbox_service', 'WARNING'):
+            SMSOutboxService.drain(concurrency=1, max_attempts=2)
+        self.assertEqual(SMSOutbox.objects.filter(status=SMSOutbox.Status.FAILED, attempts=2).count(), 2)
+        self.assertEqual(SMSOutboxService.get_backoff(2), timedelta(seconds=60))
+
+        # A recovered gateway sends whatever is still pending
+        SMSOutbox.objects.update(status=SMSOutbox.Status.PENDING, next_attempt_at=timezone.now())
+        gateway.fail_sends = 0
+        with mock.patch('api.services.send_sms_service.requests.post', gateway):
+            totals = SMSOutboxService.drain(max_attempts=5)
+        self.assertEqual(totals, {'sent': 2, 'failed': 0})
+
+
+class OrderReadServiceTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(branch_name='Main', location='Colombo')
+        self.item = OtherItem.objects.create(name='Lens cloth', price=250)
+
+        lens_brand = Brand.objects.create(name='Essilor', brand_type='lens')
+        self.lens = Lens.objects.create(
+            type=LenseType.objects.create(name='Single Vision'), coating=Coating.objects.create(name='Blue Cut'),
+            brand=lens_brand, price=8000,
+        )
+        for side, value in (('left', '-1.25'), ('right', '-1.50')):
+            LensPower.objects.create(lens=self.lens, power=Power.objects.create(name='SPH'), value=value, side=side)
+
+        frame_brand = Brand.objects.create(name='Ray-Ban', brand_type='frame')
+        self.frame = Frame.objects.create(
+            brand=frame_brand, brand_type='branded', code=Code.objects.create(name='RB1', brand=frame_brand),
+            color=Color.objects.create(name='Black'), price=15000, size='52', species='Metal',
+            image=FrameImage.objects.create(image='frame_images/rb1/front.webp'),
+        )
+
+    def make_orders(self, count):
+        for _ in range(count):
+            order = make_order(self.branch)
+            OrderItem.objects.create(order=order, lens=self.lens, price_per_unit=8000, subtotal=8000)
+            OrderItem.objects.create(order=order, frame=self.frame, price_per_unit=15000, subtotal=15000)
+            OrderItem.objects.create(order=order, other_item=self.item, price_per_unit=250, subtotal=250)
+            OrderPayment.objects.create(order=order, payment_date=timezone.now(), amount=500, payment_method='cash')
+            OrderProgress.objects.create(order=order, progress_status='received_from_customer')
+
+    def render(self):
+        return OrderSerializer(OrderReadService.with_read_graph(Order.objects.order_by('pk')), many=True).data
+
+    # Orders with their select_related rows, then one query per prefetch:
+    # items (with their lens, frame and frame image), lens powers, payments,
+    # progress and MNT orders
+    def test_single_order_query_count(self):
+        self.make_orders(1)
+        with self.assertNumQueries(6):
+            data = self.render()
+        self.assertEqual(len(data[0]['order_items']), 3)
+        self.assertEqual(len(data[0]['order_payments']), 1)
+
+    def test_fifty_orders_query_count(self):
+        self.make_orders(50)
+        with self.assertNumQueries(6):
+            data = self.render()
+        self.assertEqual(len(data), 50)
+        self.assertTrue(all(len(order['order_items']) == 3 for order in data))
+
+
+class StockAdjustmentTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(branch_name='Main', location='Colombo')
+        brand = Brand.objects.create(name='Ray-Ban', brand_type='frame')
+        self.frame = Frame.objects.create(
+            brand=brand, brand_type='branded', code=Code.objects.create(name='RB1', brand=brand),
+            color=Color.objects.create(name='Black'), price=15000, size='52', species='Metal',
+        )
+
+    def test_string_and_int_ids_are_the_same_frame(self):
+        adjust_stock_bulk('add', [
+            {'frame_id': str(self.frame.id), 'quantity': 2},
+            {'frame_id': self.frame.id, 'quantity': 3},
+        ], self.branch, None)
+        self.assertEqual(FrameStock.objects.get(branch=self.branch, frame=self.frame).qty, 5)
+
+    def test_non_integer_id_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            adjust_stock_bulk('add', [{'frame_id': 'abc', 'quantity': 1}], self.branch, None)
+
+
+
+class ReferenceDataCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.branch = Branch.objects.create(branch_name='Main', location='Colombo')
+        self.bank = PaymentMethodBanks.objects.create(
+            name='BOC', account_no='001', payment_method='credit_card', branch=self.branch,
+        )
+
+    def book(self, bank_id):
+        patient = Patient.objects.create(name='Bulk Patient', phone_number='0770000000')
+        return ChannelBookingService.book_bulk(
+            doctor_id=Doctor.objects.create(name='Dr. Fernando').id, branch_id=self.branch.id,
+            channel_date='2030-06-15', bookings=[{
+                'patient_id': patient.id, 'time': '09:00', 'channeling_fee': '2000',
+                'payments': [{'amount': '500', 'payment_method': 'credit_card', 'payment_method_bank': bank_id}],
+            }],
+        )
+
+    def test_bulk_booking_accepts_string_and_int_bank_ids(self):
+        for bank_id in (str(self.bank.id), self.bank.id):
+            _, payments = self.book(bank_id)
+            self.assertEqual(payments[0].payment_method_bank_id, self.bank.id)
+
+    def test_bulk_booking_rejects_unknown_bank(self):
+        with self.assertRaisesMessage(ValueError, 'Payment method bank 999 does not exist.'):
+            self.book('999')
+
+    def test_get_branch_banks(self):
+        other = Branch.objects.create(branch_name='Kandy', location='Kandy')
+        PaymentMethodBanks.objects.create(name='HNB', account_no='002', payment_method='credit_card', branch=other)
+        PaymentMethodBanks.objects.create(name='NSB', account_no='003', payment_method='online_transfer', branch=self.branch)
+        PaymentMethodBanks.objects.create(
+            name='Old', account_no='004', payment_method='credit_card', branch=self.branch, is_active=False,
+        )
+        self.assertEqual(ReferenceDataCache.get_branch_banks(str(self.branch.id), 'credit_card'), [self.bank])
+
+    def test_writes_invalidate_after_commit(self):
+        self.assertEqual(list(ReferenceDataCache.get_all(PaymentMethodBanks)), [self.bank.id])
+        version = ReferenceDataCache.get_version(PaymentMethodBanks)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            added = PaymentMethodBanks.objects.create(name='HNB', account_no='002', payment_method='cash')
+            # Not before commit, or another request could cache the old rows under the new version
+            self.assertEqual(ReferenceDataCache.get_version(PaymentMethodBanks), version)
+
+        self.assertEqual(ReferenceDataCache.get_version(PaymentMethodBanks), version + 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(list(ReferenceDataCache.get_all(PaymentMethodBanks)), [self.bank.id, added.id])
+        with self.assertNumQueries(0):
+            ReferenceDataCache.get_bank(str(added.id))
+
+class ChannelReadQueryTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(branch_name='Main', location='Colombo')
+        self.doctor = Doctor.objects.create(name='Dr. Fernando')
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='reception', password='x', mobile='0770000001',
+        ))
+
+    def make_channels(self, count):
+        appointments = []
+        for channel_no in range(1, count + 1):
+            appointment = make_appointment(self.branch, date(2030, 6, 15), channel_no=channel_no, doctor=self.doctor)
+            for amount in (500, 700):
+                ChannelPayment.objects.create(
+                    appointment=appointment, payment_date=timezone.now(), amount=amount, payment_method='cash',
+                )
+            appointments.append(appointment)
+        return appointments
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        self.make_channels(10)
+        # Page count and the annotated page
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('channel-list'), {'branch_id': self.branch.id, 'page_size': 10, 'ordering': 'channel_no'})
+        self.assertEqual(response.status_code, 200)
+        rows = response.data['results']
+        self.assertEqual(len(rows), 10)
+        self.assertTrue(all(row['total_payment'] == Decimal('1200.00') for row in rows))
+        self.assertTrue(all(row['first_payment'] == Decimal('500.00') for row in rows))
+        self.assertTrue(all(row['balance'] == Decimal('800.00') for row in rows))
+
+    def test_detail_query_count(self):
+        appointment = self.make_channels(1)[0]
+        # The appointment with its doctor, patient and schedule, then its payments
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('appointment-detail', args=[appointment.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['payments']), 2)
+
+
+@override_settings(RESPONSE_COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(TestCase):
+    def process(self, response):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_large_json_is_compressed(self):
+        response = self.process(HttpResponse(b'{"a": 1}' * 500, content_type='application/json'))
+        self.assertEqual(response.get('Content-Encoding'), 'gzip')
+
+    def test_small_json_is_left_alone(self):
+        response = self.process(HttpResponse(b'{"a": 1}', content_type='application/json'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_images_are_not_recompressed(self):
+        streamed = self.process(FileResponse(io.BytesIO(b'\xff\xd8' * 4096), content_type='image/jpeg'))
+        self.assertFalse(streamed.has_header('Content-Encoding'))
+        buffered = self.process(HttpResponse(b'RIFF' * 4096, content_type='image/webp'))
+        self.assertFalse(buffered.has_header('Content-Encoding'))
+
+
+class ReportReplicaRoutingTests(TestCase):
+    """
+    Runs against a throwaway in-memory SQLite `reports` alias holding only
+    Branch. The alias exists only while this class runs, so it is added to
+    `databases` in setUpClass rather than declared here, where the test runner
+    would try to set it up (and check it) with the configured databases.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        if REPORTS_DB in connections.settings:
+            raise SkipTest('A configured reports database mirrors default under test')
+        connections.settings[REPORTS_DB] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}
+        connections.configure_settings(connections.settings)
+        with connections[REPORTS_DB].schema_editor() as editor:
+            editor.create_model(Branch)
+        cls.databases = {'default', REPORTS_DB}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPORTS_DB].close()
+        del connections[REPORTS_DB]
+        del connections.settings[REPORTS_DB]
+
+    def setUp(self):
+        # Same id on both sides, different names, so a read shows where it went
+        Branch.objects.create(id=1, branch_name='Primary', location='Colombo')
+        Branch.objects.using(REPORTS_DB).create(id=1, branch_name='Replica', location='Colombo')
+
+    def branch_name(self):
+        return Branch.objects.get(pk=1).branch_name
+
+    def request(self, view, **cookies):
+        request = RequestFactory().get('/')
+        request.COOKIES.update(cookies)
+        return ReplicaPinningMiddleware(view)(request)
+
+    def test_reads_in_reports_db_go_to_the_replica(self):
+        def view(request):
+            with reports_db():
+                inside = self.branch_name()
+            return HttpResponse(f'{inside},{self.branch_name()}')
+
+        with CaptureQueriesContext(connections[REPORTS_DB]) as replica:
+            response = self.request(view)
+
+        self.assertEqual(response.content, b'Replica,Primary')
+        self.assertEqual(len(replica), 1)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_a_write_pins_the_rest_of_the_request_and_sets_the_cookie(self):
+        seen = []
+
+        def view(request):
+            with reports_db():
+                seen.append(self.branch_name())
+                Branch.objects.create(branch_name='New', location='Kandy')
+                seen.append(self.branch_name())
+            return HttpResponse()
+
+        response = self.request(view)
+
+        self.assertEqual(seen, ['Replica', 'Primary'])
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertFalse(Branch.objects.using(REPORTS_DB).filter(branch_name='New').exists())
+
+    def test_pin_cookie_keeps_the_next_request_on_default(self):
+        def write(request):
+            Branch.objects.create(branch_name='New', location='Kandy')
+            return HttpResponse()
+
+        def read(request):
+            with reports_db():
+                return HttpResponse(self.branch_name())
+
+        pin = self.request(write).cookies[PIN_COOKIE].value
+
+        self.assertEqual(self.request(read, **{PIN_COOKIE: pin}).content, b'Primary')
+        # Without the cookie (or once it has expired) reads go back to the replica
+        self.assertEqual(self.request(read).content, b'Replica')
+        self.assertEqual(self.request(read, **{PIN_COOKIE: '0'}).content, b'Replica')
+
+
+class DirtyFieldsTests(TestCase):
+    stamp = local(2030, 6, 15, 12, 0)
+
+    def setUp(self):
+        self.order = Order.objects.get(pk=make_order(Branch.objects.create(branch_name='Main', location='Colombo')).pk)
+        self.user = get_user_model().objects.create_user(username='issuer', password='x', mobile='0770000002')
+
+    def save(self, order, **kwargs):
+        """Save and return the columns of the single UPDATE it ran."""
+        with CaptureQueriesContext(connections['default']) as queries:
+            order.save(**kwargs)
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1, queries.captured_queries)
+        assignments = updates[0].split(' SET ', 1)[1].split(' WHERE ', 1)[0]
+        return {part.split(' = ')[0].strip('"`') for part in assignments.split(', ')}
+
+    def test_save_writes_only_changed_and_auto_now_columns(self):
+        self.order.order_remark = 'Call before delivery'
+        self.assertEqual(self.order.changed_fields, {'order_remark'})
+
+        self.assertEqual(self.save(self.order), {'order_remark', 'order_updated_date'})
+        self.assertEqual(self.order.changed_fields, set())
+        self.assertEqual(Order.objects.get(pk=self.order.pk).order_remark, 'Call before delivery')
+
+    def test_unchanged_save_runs_no_query_and_sends_no_signal(self):
+        self.order.order_remark = self.order.order_remark  # same value
+        receiver = mock.Mock()
+        post_save.connect(receiver, sender=Order)
+        self.addCleanup(post_save.disconnect, receiver, sender=Order)
+
+        with self.assertNumQueries(0):
+            self.order.save()
+        receiver.assert_not_called()
+
+    def test_save_of_a_deleted_row_does_not_insert_it_again(self):
+        Order.all_objects.filter(pk=self.order.pk).delete()
+        self.order.order_remark = 'Gone'
+        with self.assertRaises(DatabaseError):
+            self.order.save()
+
+    def test_fitting_status_and_issued_by_are_stamped(self):
+        self.order.fitting_status = 'fitting_ok'
+        self.order.issued_by = self.user
+        with mock.patch('django.utils.timezone.now', return_value=self.stamp):
+            columns = self.save(self.order)
+
+        self.assertTrue({'fitting_status', 'fitting_status_updated_date', 'issued_by_id', 'issued_date'} <= columns)
+        saved = Order.objects.get(pk=self.order.pk)
+        self.assertEqual((saved.fitting_status_updated_date, saved.issued_date), (self.stamp, self.stamp))
+
+    def test_stamps_are_added_to_explicit_update_fields(self):
+        self.order.fitting_status = 'damage'
+        self.order.issued_by = self.user
+        self.order.order_remark = 'Not saved'
+        with mock.patch('django.utils.timezone.now', return_value=self.stamp):
+            columns = self.save(self.order, update_fields=['fitting_status', 'issued_by'])
+
+        self.assertEqual(columns, {'fitting_status', 'fitting_status_updated_date', 'issued_by_id', 'issued_date'})
+        saved = Order.objects.get(pk=self.order.pk)
+        self.assertEqual((saved.fitting_status_updated_date, saved.issued_date), (self.stamp, self.stamp))
+        self.assertIsNone(saved.order_remark)
+        # Left out of update_fields, so still unsaved
+        self.assertEqual(self.order.changed_fields, {'order_remark'})
+
+    def test_unchanged_fields_are_not_stamped(self):
+        self.order.order_remark = 'Remark only'
+        with mock.patch('django.utils.timezone.now', return_value=self.stamp):
+            self.save(self.order)
+        saved = Order.objects.get(pk=self.order.pk)
+        self.assertNotEqual(saved.fitting_status_updated_date, self.stamp)
+        self.assertIsNone(saved.issued_date)
+
+    def test_deferred_fields_are_written_only_when_assigned(self):
+        order = Order.objects.only('id', 'order_remark').get(pk=self.order.pk)
+        with self.assertNumQueries(0):
+            order.save()
+
+        order.total_price = Decimal('12500.00')
+        self.assertEqual(self.save(order), {'total_price', 'order_updated_date'})
+        self.assertEqual(Order.objects.get(pk=order.pk).total_price, Decimal('12500.00'))
+
+    def test_refresh_from_db_resets_the_snapshot(self):
+        Order.all_objects.filter(pk=self.order.pk).update(order_remark='Changed elsewhere', on_hold=True)
+        self.order.urgent = True
+
+        self.order.refresh_from_db(fields=['order_remark'])
+        self.assertEqual(self.order.changed_fields, {'urgent'})
+        self.assertEqual(self.save(self.order), {'urgent', 'order_updated_date'})
+
+        self.order.refresh_from_db()
+        self.assertTrue(self.order.on_hold)
+        with self.assertNumQueries(0):
+            self.order.save()
+
+
+class ImageRenditionTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = self.settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (1200, 800), 'red').save(buffer, format='PNG')
+        self.image = self.upload(buffer.getvalue())
+
+    def upload(self, content, status='ready'):
+        image = OrderImage.objects.create(
+            order=make_order(Branch.objects.create(branch_name='Main', location='Colombo')),
+            image=SimpleUploadedFile('photo.png', content, content_type='image/png'),
+        )
+        OrderImage.objects.filter(pk=image.pk).update(processing_status=status)
+        return image
+
+    def get(self, image, size='128', kind='order', **headers):
+        response = self.client.get(reverse('image-rendition', args=[kind, image.uuid, size]), **headers)
+        self.addCleanup(response.close)
+        return response
+
+    def test_rendition_is_generated_and_revalidated_by_etag(self):
+        response = self.get(self.image)
+        self.assertEqual(response.status_code, 200)
+        rendition = Image.open(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual((rendition.format, max(rendition.size)), ('WEBP', 128))
+        etag = response['ETag']
+
+        # Served from the cached file with the same validator
+        self.assertEqual(self.get(self.image)['ETag'], etag)
+        not_modified = self.get(self.image, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], etag)
+        self.assertEqual(self.get(self.image, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_cache_control_follows_processing_status(self):
+        self.assertIn('immutable', self.get(self.image)['Cache-Control'])
+
+        OrderImage.objects.filter(pk=self.image.pk).update(processing_status='pending')
+        cache_control = self.get(self.image, size='original')['Cache-Control']
+        self.assertIn('no-cache', cache_control)
+        self.assertNotIn('immutable', cache_control)
+
+    def test_unknown_kind_or_size_is_not_found(self):
+        self.assertEqual(self.get(self.image, kind='patient').status_code, 404)
+        self.assertEqual(self.get(self.image, size='64').status_code, 404)
+
+    def test_undecodable_upload(self):
+        broken = self.upload(b'not an image')
+        with self.assertLogs('api.views.image_rendition_view', 'WARNING'):
+            self.assertEqual(self.get(broken).status_code, 404)
+
+        # Once background processing has marked it failed the upload is served as is
+        OrderImage.objects.filter(pk=broken.pk).update(processing_status='failed')
+        response = self.get(broken)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'not an image')
+
+    def test_size_hint(self):
+        request = RequestFactory().get('/', {'image_size': '512'})
+        self.assertEqual(ImageRenditionService.get_size_hint({'request': request}), '512')
+        self.assertEqual(ImageRenditionService.get_size_hint({'image_size': '128', 'request': request}), '128')
+        self.assertIsNone(ImageRenditionService.get_size_hint({'image_size': '64'}))
+        self.assertIsNone(ImageRenditionService.get_size_hint({}))
+
+        hinted = OrderImageSerializer(self.image, context={'image_size': '128'}).data
+        self.assertEqual(hinted['image_url'], reverse('image-rendition', args=['order', self.image.uuid, '128']))
+        self.assertEqual(OrderImageSerializer(self.image).data['image_url'], self.image.image.url)
+
+
+class ChannelNumberAllocationTests(TestCase):
+    day = date(2030, 6, 15)
+
+    def setUp(self):
+        self.branch = Branch.objects.create(branch_name='Main', location='Colombo')
+        self.doctor = Doctor.objects.create(name='Dr. Fernando')
+        self.patients = [
+            Patient.objects.create(name=f'Patient {n}', phone_number=f'077000000{n}') for n in range(3)
+        ]
+
+    def existing(self, channel_no, invoice_number, **kwargs):
+        return make_appointment(
+            self.branch, self.day, channel_no=channel_no, doctor=self.doctor, invoice_number=invoice_number, **kwargs,
+        )
+
+    def allocate_channel(self, count=1):
+        return AppointmentChannelCounter.allocate(self.doctor.id, self.branch.id, self.day, count)
+
+    def bookings(self, **last_payment):
+        bookings = [
+            {'patient_id': patient.id, 'time': f'09:{10 * n:02d}', 'payments': [
+                {'amount': '500', 'payment_method': 'cash'},
+            ]}
+            for n, patient in enumerate(self.patients)
+        ]
+        bookings[-1]['payments'][0].update(last_payment)
+        return bookings
+
+    def book(self, **last_payment):
+        return ChannelBookingService.book_bulk(
+            self.doctor.id, self.branch.id, self.day, self.bookings(**last_payment), defaults={'channeling_fee': '2000'},
+        )
+
+    def test_new_counters_start_after_existing_numbers_including_deleted(self):
+        self.existing(2, 40)
+        self.existing(5, 41, is_deleted=True)
+
+        self.assertEqual(self.allocate_channel(), 6)
+        self.assertEqual(self.allocate_channel(2), 7)
+        self.assertEqual(AppointmentInvoiceCounter.allocate(self.branch.id), 42)
+        # Another day starts from 1
+        self.assertEqual(AppointmentChannelCounter.allocate(self.doctor.id, self.branch.id, date(2030, 6, 16)), 1)
+
+    def test_reserve_up_to(self):
+        self.existing(7, 1)
+        # A lower number than the existing ones does not move the new counter back
+        AppointmentChannelCounter.reserve_up_to(self.doctor.id, self.branch.id, self.day, 3)
+        self.assertEqual(self.allocate_channel(), 8)
+
+        AppointmentChannelCounter.reserve_up_to(self.doctor.id, self.branch.id, self.day, 20)
+        self.assertEqual(self.allocate_channel(), 21)
+
+    def test_bulk_booking_takes_consecutive_numbers(self):
+        self.existing(4, 10)
+
+        appointments, payments = self.book()
+        self.assertEqual([a.channel_no for a in appointments], [5, 6, 7])
+        self.assertEqual([a.invoice_number for a in appointments], [11, 12, 13])
+        self.assertEqual([p.appointment_id for p in payments], [a.id for a in appointments])
+        booked = Schedule.objects.filter(id__in=[a.schedule_id for a in appointments])
+        self.assertEqual(set(booked.values_list('status', flat=True)), {'Booked'})
+
+        appointments, _ = ChannelBookingService.book_bulk(
+            self.doctor.id, self.branch.id, self.day, [{'patient_id': self.patients[0].id, 'time': '10:00'}],
+            defaults={'channeling_fee': '2000'},
+        )
+        self.assertEqual((appointments[0].channel_no, appointments[0].invoice_number), (8, 14))
+
+    def test_bad_payment_rolls_back_the_whole_batch(self):
+        with self.assertRaisesMessage(ValueError, 'Invalid payment method: cheque'):
+            self.book(payment_method='cheque')
+
+        self.assertFalse(Appointment.all_objects.exists())
+        self.assertFalse(ChannelPayment.all_objects.exists())
+        self.assertFalse(Schedule.objects.exists())
+        self.assertFalse(AppointmentChannelCounter.objects.exists())
+        self.assertEqual([a.channel_no for a in self.book()[0]], [1, 2, 3])
+
+    def test_bulk_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(
+            username='reception', password='x', mobile='0770000001',
+        ))
+        body = {
+            'doctor_id': self.doctor.id, 'branch_id': self.branch.id, 'channel_date': '2030-06-15',
+            'channeling_fee': '2000', 'appointments': self.bookings(),
+        }
+
+        response = client.post(reverse('channel-appointment-bulk'), body, format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        rows = response.data['appointments']
+        self.assertEqual([row['channel_no'] for row in rows], [1, 2, 3])
+        self.assertEqual([row['invoice_number'] for row in rows], [1, 2, 3])
+        self.assertTrue(all(row['payments'][0]['amount'] == Decimal('500') for row in rows))
+
+        body['appointments'] = self.bookings(amount='5000')
+        response = client.post(reverse('channel-appointment-bulk'), body, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Appointment.objects.count(), 3)
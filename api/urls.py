@@ -40,7 +40,7 @@ from .views import (
     PatientListView,
     PatientUpdateView,
     AllPatientAuditLogListView, PatientAuditLogListView,
-    ChannelAppointmentView,
+    ChannelAppointmentView,ChannelBulkAppointmentView,
     ChannelListView,RefundChannelView,
     DoctorAppointmentTimeListView,
     AppointmentRetrieveUpdateDeleteView,
@@ -77,7 +77,8 @@ from .views import (
     RestPasswordView,ResetPasswordConfirmView,VerifyOTPView,RefractionOrderView,CreatePatientView,PatientOrderCountView,PaymentMethodBanksDetailView,PaymentMethodBanksView,LogoutView,
     HearingOrderReportByOrderDateView,OrderPaymentBankReportViewSet,ExpenceReturnAPIView,ExpenceSummeryReportView,EarningReportView,HearingOrderReportView,FactoryOrderStatusSummaryView,SafeTransactionSummaryView,
     COOrderReportView,BranchTimeReportView,AppointmentArrivalMarkView,InvoiceTrackingReportView,BirthdayReportView,BirthdayReminderCreateView,
-    SendSMSView, SMSTemplateListCreateView, SMSTemplateRetrieveUpdateDeleteView, SMSLogListView
+    SendSMSView, SMSTemplateListCreateView, SMSTemplateRetrieveUpdateDeleteView, SMSLogListView,
+    ImageRenditionView
 )
 from .views.customer_report_views import BestCustomersReportView
 from .views.employee_report_views import EmployeeHistoryReportView
@@ -250,6 +251,7 @@ urlpatterns = [
     path('patients/audit-logs/', AllPatientAuditLogListView.as_view(), name='patient-audit-logs'),
     path('patients/<int:pk>/audit-logs/', PatientAuditLogListView.as_view(), name='patient-single-audit-logs'),
     path('channel/', ChannelAppointmentView.as_view(), name='channel-appointment'),
+    path('channel/bulk/', ChannelBulkAppointmentView.as_view(), name='channel-appointment-bulk'),
     path('channels/', ChannelListView.as_view(), name='channel-list'),
     path('channels/time-slots/', DoctorAppointmentTimeListView.as_view(), name='doctor-appointment-time-list'),#time slots
     path('channels/<int:pk>/', AppointmentRetrieveUpdateDeleteView.as_view(), name='appointment-detail'),
@@ -343,6 +345,7 @@ urlpatterns = [
     path('orders/<int:order_id>/images/', OrderImageListCreateView.as_view(), name='order-image-list-create'),
     path('orders/<int:order_id>/images/<int:pk>', OrderImageDetailView.as_view(), name='order-image-detail'),
     path('orders/<int:order_id>/images/<int:pk>/', OrderImageDetailView.as_view(), name='order-image-detail-slash'),
+    path('images/<str:kind>/<uuid:uuid>/<str:size>/', ImageRenditionView.as_view(), name='image-rendition'),
     path('order-feedback/by-invoice/', OrderFeedbackByInvoiceView.as_view(), name='order-feedback-by-invoice'),
     path('order-feedback/', OrderFeedbackCreateView.as_view(), name='order-feedback-create'),
     path('refraction/orders/', RefractionOrderView.as_view(), name='refraction-order-list'),
@@ -15,7 +15,7 @@ from .lens_cleaner_stock_views import LensCleanerStockListCreateView,LensCleaner
 from .order_views import OrderCreateView,OrderSoftDeleteView,OrderRefundView,OrderProgressStatusListView,ArrivalStatusBulkCreateView
 from .doctor_views import  DoctorListCreateView,DoctorRetrieveUpdateDeleteView
 from .patient_views import PatientListView, PatientUpdateView, CreatePatientView, PatientAuditLogListView, AllPatientAuditLogListView
-from .channel_views import ChannelAppointmentView,ChannelListView,AppointmentRetrieveUpdateDeleteView,DoctorScheduleTransferView,DoctorAppointmentTransferView,DoctorAppointmentTimeListView,ChannelUpdateView,CancelChannelView,RefundChannelView,AppointmentStatusListView,BranchAppointmentCountView,AppointmentArrivalMarkView
+from .channel_views import ChannelAppointmentView,ChannelBulkAppointmentView,ChannelListView,AppointmentRetrieveUpdateDeleteView,DoctorScheduleTransferView,DoctorAppointmentTransferView,DoctorAppointmentTimeListView,ChannelUpdateView,CancelChannelView,RefundChannelView,AppointmentStatusListView,BranchAppointmentCountView,AppointmentArrivalMarkView
 from .lens_stock_views import LensStockListCreateView,LensStockRetrieveUpdateDeleteView
 from .lens_type_views import LensTypeListCreateView,LensTypeRetrieveUpdateDeleteView
 from .lens_coating_views import LensCoatingListCreateView,LensCoatingRetrieveUpdateDeleteView
@@ -58,6 +58,7 @@ from .inventory_transfer import FrameTransferView
 from .frame_store__report import FrameHistoryReportView,FrameSaleReportView
 from .lens_store_report_view import LensSaleReportView
 from .order_image_view import OrderImageListCreateView,OrderImageDetailView
+from .image_rendition_view import ImageRenditionView
 from .payment_report import PaymentSummaryReportView
 from .doctor_branch_fees import DoctorBranchChannelFeesCreateView,DoctorBranchChannelFeesListView,DoctorBranchChannelFeesUpdateView
 from .order_feedback import OrderFeedbackCreateView
@@ -1,17 +1,33 @@
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from api.services.channel_report_service import ChannelReportService
 
 class ChannelReportView(APIView):
+    """
+    GET ?payment_date=YYYY-MM-DD&branch_id=1                        -> JSON list for the day
+    GET ?payment_date=YYYY-MM-DD&end_date=YYYY-MM-DD&branch_id=1    -> NDJSON stream, one row per line
+    """
 
     def get(self, request):
         payment_date = request.query_params.get("payment_date")
+        end_date = request.query_params.get("end_date")
         branch_id = request.query_params.get("branch_id")
 
         if not payment_date or not branch_id:
             return Response({"error": "payment_date and branch_id are required."}, status=400)
 
+        if end_date:
+            try:
+                rows = ChannelReportService.iter_channel_payments_by_range(payment_date, end_date, branch_id)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            lines = (json.dumps(row, cls=DjangoJSONEncoder) + "\n" for row in rows)
+            return StreamingHttpResponse(lines, content_type="application/x-ndjson")
+
         try:
             report_data = ChannelReportService.get_channel_payments_by_date_and_branch(payment_date, branch_id)
             return Response(report_data, status=200)
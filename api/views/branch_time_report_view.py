@@ -91,7 +91,7 @@ class BranchTimeReportView(APIView):
     def get_order_payments(self, branch_id, start_date, end_date):
         return OrderPayment.objects.filter(
             is_deleted=False,
-            order__branch_id=branch_id,
+            branch_id=branch_id,
             payment_date__gte=start_date,
             payment_date__lte=end_date
         ).select_related(
@@ -105,7 +105,7 @@ class BranchTimeReportView(APIView):
     def get_channel_payments(self, branch_id, start_date, end_date):
         return ChannelPayment.objects.filter(
             is_deleted=False,
-            appointment__branch_id=branch_id,
+            branch_id=branch_id,
             payment_date__gte=start_date,
             payment_date__lte=end_date
         ).select_related(
@@ -149,7 +149,7 @@ class BranchTimeReportView(APIView):
     def get_soldering_payments(self, branch_id, start_date, end_date):
         payments = SolderingPayment.objects.filter(
             is_deleted=False,
-            order__branch_id=branch_id,
+            branch_id=branch_id,
             payment_date__gte=start_date,
             payment_date__lte=end_date
         ).select_related('order', 'order__patient').values(
@@ -277,17 +277,17 @@ class BranchTimeReportView(APIView):
     
     def calculate_summary(self, branch_id, start_date, end_date):
         order_total = OrderPayment.objects.filter(
-            is_deleted=False, order__branch_id=branch_id,
+            is_deleted=False, branch_id=branch_id,
             payment_date__gte=start_date, payment_date__lte=end_date
         ).aggregate(total=Sum('amount'))['total'] or 0
         
         channel_total = ChannelPayment.objects.filter(
-            is_deleted=False, appointment__branch_id=branch_id,
+            is_deleted=False, branch_id=branch_id,
             payment_date__gte=start_date, payment_date__lte=end_date
         ).aggregate(total=Sum('amount'))['total'] or 0
         
         soldering_total = SolderingPayment.objects.filter(
-            is_deleted=False, order__branch_id=branch_id,
+            is_deleted=False, branch_id=branch_id,
             payment_date__gte=start_date, payment_date__lte=end_date
         ).aggregate(total=Sum('amount'))['total'] or 0
         
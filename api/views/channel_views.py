@@ -2,13 +2,15 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status,generics
 from django.db import transaction
-from ..models import Doctor, Patient, Schedule, Appointment, ChannelPayment
+from ..models import Doctor, Patient, Schedule, Appointment, ChannelPayment, AppointmentChannelCounter
 from ..serializers import PatientSerializer, ScheduleSerializer, AppointmentSerializer, ChannelPaymentSerializer,ChannelListSerializer,AppointmentDetailSerializer,AppointmentTimeListSerializer
 from rest_framework.generics import ListAPIView
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from ..services.doctor_schedule_service import DoctorScheduleService
-from ..services.pagination_service import PaginationService
+from ..services.channel_booking_service import ChannelBookingService
+from ..services.channel_read_service import ChannelReadService
+from ..services.pagination_service import KeysetPaginationService, PaginationService
 from ..services.patient_service import PatientService
 from ..services.soft_delete_service import ChannelSoftDeleteService
 from django.shortcuts import get_object_or_404
@@ -62,13 +64,8 @@ class ChannelAppointmentView(APIView):
             channel_date = data['channel_date']
             branch_id = data['branch_id']
             doctor_id = data['doctor_id']
-            # Get the last created appointment for this date/branch/doctor and use its channel_no + 1
-            last_appointment = Appointment.all_objects.filter(
-                date=channel_date, 
-                branch_id=branch_id, 
-                doctor_id=doctor_id
-            ).order_by('-created_at').first()
-            channel_no = (last_appointment.channel_no + 1) if last_appointment else 1
+            # Locked per-(doctor, branch, date) counter, safe under concurrent bookings
+            channel_no = AppointmentChannelCounter.allocate(doctor_id, branch_id, channel_date)
 
             # Step 5: Create Appointment
             appointment_data = {
@@ -131,17 +128,81 @@ class ChannelAppointmentView(APIView):
             transaction.set_rollback(True)
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+class ChannelBulkAppointmentView(APIView):
+    """
+    Book several patients with one doctor on one day in a single transaction.
+    POST /api/channel/bulk/
+    Body: {
+        "doctor_id", "branch_id", "channel_date",
+        "channeling_fee", "doctor_fees", "branch_fees",   # defaults for every appointment
+        "appointments": [
+            {"patient_id", "time", "note"?, "channeling_fee"?, "doctor_fees"?, "branch_fees"?,
+             "payments": [{"amount", "payment_method", "payment_method_bank"?}]}
+        ]
+    }
+    """
+    def post(self, request, *args, **kwargs):
+        data = request.data
+
+        required_fields = ['doctor_id', 'branch_id', 'channel_date', 'appointments']
+        for field in required_fields:
+            if field not in data:
+                return Response({"error": f"{field} is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            appointments, payments = ChannelBookingService.book_bulk(
+                doctor_id=data['doctor_id'],
+                branch_id=data['branch_id'],
+                channel_date=data['channel_date'],
+                bookings=data['appointments'],
+                defaults={
+                    'channeling_fee': data.get('channeling_fee'),
+                    'doctor_fees': data.get('doctor_fees', 0),
+                    'branch_fees': data.get('branch_fees', 0),
+                },
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        payments_by_appointment = {}
+        for payment in payments:
+            payments_by_appointment.setdefault(payment.appointment_id, []).append({
+                "amount": payment.amount,
+                "payment_method": payment.payment_method,
+                "payment_method_bank": payment.payment_method_bank_id,
+                "is_final": payment.is_final,
+            })
+
+        return Response({
+            "message": f"{len(appointments)} appointments booked.",
+            "appointments": [
+                {
+                    "id": appointment.id,
+                    "patient": appointment.patient_id,
+                    "schedule": appointment.schedule_id,
+                    "date": appointment.date,
+                    "time": appointment.time,
+                    "channel_no": appointment.channel_no,
+                    "invoice_number": appointment.invoice_number,
+                    "amount": appointment.amount,
+                    "payments": payments_by_appointment.get(appointment.id, []),
+                }
+                for appointment in appointments
+            ],
+        }, status=status.HTTP_201_CREATED)
+
 class ChannelListView(ListAPIView):
-    queryset = Appointment.all_objects.prefetch_related('payments').select_related('doctor', 'patient', 'branch')
+    queryset = ChannelReadService.get_list_queryset()
     serializer_class = ChannelListSerializer
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['doctor', 'date','branch','invoice_number']  # Optional DRF filters
     search_fields = ['id', 'patient__phone_number']
     ordering_fields = ['channel_no']
-    pagination_class = PaginationService
+    pagination_class = KeysetPaginationService
+    keyset_ordering = ('-id',)  # ?pagination=cursor
 
     def get_queryset(self):
-        queryset = Appointment.all_objects.prefetch_related('payments').select_related('doctor', 'patient', 'branch')
+        queryset = ChannelReadService.get_list_queryset()
         # ✅ Get branch_id from query params
         branch_id = self.request.query_params.get('branch_id')
         if branch_id:
@@ -181,21 +242,27 @@ class AppointmentRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
 class DoctorScheduleTransferView(APIView):
+    """
+    Body: doctor_id (or doctor_ids list), branch_id, from_date, to_date and
+    an optional from_end_date to move a whole range of days at once.
+    """
     def post(self, request, *args, **kwargs):
-        doctor_id = request.data.get("doctor_id")
+        doctor_ids = request.data.get("doctor_ids") or [request.data.get("doctor_id")]
         from_date = request.data.get("from_date")
+        from_end_date = request.data.get("from_end_date")
         to_date = request.data.get("to_date")
         branch_id = request.data.get("branch_id")
 
-        if not all([doctor_id, from_date, to_date, branch_id]):
+        if not all(doctor_ids) or not all([from_date, to_date, branch_id]):
             return Response({"error": "doctor_id, from_date, to_date, branch_id are required."}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            new_schedules = DoctorScheduleService.transfer_schedules(
-                doctor_id=doctor_id,
+            new_schedules = DoctorScheduleService.transfer_schedule_range(
+                doctor_ids=doctor_ids,
+                branch_id=branch_id,
                 from_date=from_date,
                 to_date=to_date,
-                branch_id=branch_id
+                from_end_date=from_end_date
             )
 
             return Response({
@@ -209,21 +276,27 @@ class DoctorScheduleTransferView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
 class DoctorAppointmentTransferView(APIView):
+    """
+    Body: doctor_id (or doctor_ids list), branch_id, from_date, to_date and
+    an optional from_end_date to move a whole range of days at once.
+    """
     def post(self, request, *args, **kwargs):
-        doctor_id = request.data.get("doctor_id")
+        doctor_ids = request.data.get("doctor_ids") or [request.data.get("doctor_id")]
         from_date = request.data.get("from_date")
+        from_end_date = request.data.get("from_end_date")
         to_date = request.data.get("to_date")
         branch_id = request.data.get("branch_id")
 
-        if not all([doctor_id, from_date, to_date, branch_id]):
+        if not all(doctor_ids) or not all([from_date, to_date, branch_id]):
             return Response({"error": "doctor_id, from_date, to_date, and branch_id are required."}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            updated_appointments = DoctorScheduleService.transfer_appointments_only(
-                doctor_id=doctor_id,
+            updated_appointments = DoctorScheduleService.transfer_appointment_range(
+                doctor_ids=doctor_ids,
+                branch_id=branch_id,
                 from_date=from_date,
                 to_date=to_date,
-                branch_id=branch_id
+                from_end_date=from_end_date
             )
 
             return Response({
@@ -526,7 +599,7 @@ class AppointmentStatusListView(ListAPIView):
         start_date = self.request.query_params.get("start_date")
         end_date = self.request.query_params.get("end_date")
         branch_id = self.request.query_params.get("branch_id")
-        queryset = Appointment.all_objects.prefetch_related('payments').select_related('doctor', 'patient', 'branch')
+        queryset = ChannelReadService.get_list_queryset()
         start_datetime, end_datetime = TimezoneConverterService.format_date_with_timezone(start_date, end_date)
         # Decide status and which date field to filter on
         if status_filter == "deactivated":
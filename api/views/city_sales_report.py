@@ -8,9 +8,10 @@ from django.db.models import Value
 from collections import defaultdict
 from ..models import Order, Invoice, Appointment, SolderingOrder, Patient
 from ..services.time_zone_convert_service import TimezoneConverterService
+from ..db.replica import ReportReplicaMixin
 
 
-class CitySalesReportView(APIView):
+class CitySalesReportView(ReportReplicaMixin, APIView):
     """
     Optimized city-wise sales count report.
     Uses aggregation queries to avoid N+1 problem and improve performance.
@@ -3,7 +3,9 @@ from rest_framework.response import Response
 from ..services.time_zone_convert_service import TimezoneConverterService
 from ..models import Order, OrderPayment, Expense
 from rest_framework.views import APIView
-from django.db.models import Sum
+from decimal import Decimal
+from django.db.models import Count, DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from ..services.pagination_service import PaginationService
 
 
@@ -23,60 +25,62 @@ class COOrderReportView(APIView):
         co_orders = Order.objects.filter(
             co_order=True,
             order_date__range=(start_datetime, end_datetime)
-        ).select_related('customer', 'branch', 'invoice')
-        print(co_orders.query)
+        )
         if branch_id:
             co_orders = co_orders.filter(branch_id=branch_id)
 
+        # Summary totals, computed in the database over the whole range
+        summary = co_orders.aggregate(total_co_orders=Count('id'), total_amount=Sum('total_price'))
+        total_payment = OrderPayment.objects.filter(
+            order__in=co_orders, is_deleted=False
+        ).aggregate(total=Sum('amount'))['total'] or 0
+        total_expenses = Expense.objects.filter(
+            order_refund__in=co_orders
+        ).aggregate(total=Sum('amount'))['total'] or 0
+
+        # Per-order payment and refund-expense sums as subqueries, so only
+        # the requested page is loaded
+        payments = OrderPayment.objects.filter(
+            order=OuterRef('pk'), is_deleted=False
+        ).order_by().values('order').annotate(total=Sum('amount')).values('total')
+        expenses = Expense.objects.filter(
+            order_refund=OuterRef('pk')
+        ).order_by().values('order_refund').annotate(total=Sum('amount')).values('total')
+        money = DecimalField(max_digits=10, decimal_places=2)
+        rows = co_orders.select_related('customer', 'branch', 'invoice').annotate(
+            paid_total=Coalesce(Subquery(payments, output_field=money), Value(Decimal('0')), output_field=money),
+            refund_total=Coalesce(Subquery(expenses, output_field=money), Value(Decimal('0')), output_field=money),
+        ).order_by('id')
+
+        paginator = PaginationService()
+        page = paginator.paginate_queryset(rows, self.request, view=self)
+
         data = []
-        for order in co_orders:
-            # Calculate total payment
-            total_payment = OrderPayment.objects.filter(
-                order=order, 
-                is_deleted=False
-            ).aggregate(total=Sum('amount'))['total'] or 0
-            
-            # Calculate total expenses
-            total_expenses = Expense.objects.filter(
-                order_refund=order
-            ).aggregate(total=Sum('amount'))['total'] or 0
-            
-            # Calculate balance
-            balance = float(total_payment) - float(total_expenses)
-            
+        for order in page:
+            invoice = getattr(order, 'invoice', None)  # reverse one-to-one; may be missing
             data.append({
                 'id': order.id,
                 'order_number': str(order.id),
-                'invoice_number': order.invoice.invoice_number if order.invoice else None,
+                'invoice_number': invoice.invoice_number if invoice else None,
                 'customer_name': order.customer.name if order.customer else None,
                 'customer_mobile': order.customer.phone_number if order.customer else None,
                 'branch_name': order.branch.branch_name if order.branch else None,
                 'co_note': order.co_note,
                 'co_order': order.co_order,
                 'total_amount': float(order.total_price) if order.total_price else 0,
-                'total_payment': float(total_payment),
-                'total_expenses': float(total_expenses),
-                'balance': balance,
+                'total_payment': float(order.paid_total),
+                'total_expenses': float(order.refund_total),
+                'balance': float(order.paid_total) - float(order.refund_total),
                 'order_date': order.order_date.isoformat() if order.order_date else None,
             })
 
-        # Calculate summary totals
-        total_amount = sum(float(order.total_price) if order.total_price else 0 for order in co_orders)
-        total_payment = sum(float(OrderPayment.objects.filter(order=order, is_deleted=False).aggregate(total=Sum('amount'))['total'] or 0) for order in co_orders)
-        total_expenses = sum(float(Expense.objects.filter(order_refund=order).aggregate(total=Sum('amount'))['total'] or 0) for order in co_orders)
-        total_balance = total_payment - total_expenses
-
-        # Paginate the data
-        paginator = PaginationService()
-        paginated_data = paginator.paginate_queryset(data, self.request, view=self)
-
         response_data = {
-            'total_co_orders': co_orders.count(),
-            'total_amount': total_amount,
-            'total_payment': total_payment,
-            'total_expenses': total_expenses,
-            'total_balance': total_balance,
-            'co_orders': paginated_data
+            'total_co_orders': summary['total_co_orders'],
+            'total_amount': float(summary['total_amount'] or 0),
+            'total_payment': float(total_payment),
+            'total_expenses': float(total_expenses),
+            'total_balance': float(total_payment) - float(total_expenses),
+            'co_orders': data
         }
 
-        return paginator.get_paginated_response(response_data)
\ No newline at end of file
+        return paginator.get_paginated_response(response_data)
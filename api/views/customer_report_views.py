@@ -7,12 +7,13 @@ from django.utils import timezone
 
 from ..services.customer_report_service import CustomerReportService
 from ..services.customer_report_service import CustomerLocationReportService
+from ..db.replica import ReportReplicaMixin
 
 
 logger = logging.getLogger(__name__)
 
 
-class BestCustomersReportView(APIView):
+class BestCustomersReportView(ReportReplicaMixin, APIView):
     """
     API View for generating best customers report based on factory orders.
     
@@ -115,7 +116,7 @@ class BestCustomersReportView(APIView):
                 'details': 'An error occurred while generating the report'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             
-class CustomerLocationTableView(APIView):
+class CustomerLocationTableView(ReportReplicaMixin, APIView):
     """
     Simple API View for Customer Location Table data.
     Returns only the essential fields needed for table display.
@@ -193,7 +194,7 @@ class CustomerLocationTableView(APIView):
             )
 
 
-class CustomerLocationOptionsView(APIView):
+class CustomerLocationOptionsView(ReportReplicaMixin, APIView):
     """
     API View to get available location options for the map interface.
     Returns all available districts and towns from customer addresses.
@@ -240,7 +241,7 @@ class CustomerLocationOptionsView(APIView):
             )
 
 
-class CustomerLocationStatisticsView(APIView):
+class CustomerLocationStatisticsView(ReportReplicaMixin, APIView):
     """
     API View to get statistics for customers in a specific location.
     Provides summary data for dashboard and reporting purposes.
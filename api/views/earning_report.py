@@ -7,10 +7,11 @@ from django.db.models.functions import TruncYear, TruncMonth, TruncDate
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 from ..services.time_zone_convert_service import TimezoneConverterService
+from ..db.replica import ReportReplicaMixin
 from ..models import Invoice, Appointment, OrderPayment, ChannelPayment, Expense, ExpenseReturn, SolderingInvoice, SolderingPayment, BankDeposit
 
 
-class EarningReportView(APIView):
+class EarningReportView(ReportReplicaMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get_period_data(self, period_start, period_end, branch_id_int):
@@ -45,7 +46,7 @@ class EarningReportView(APIView):
         # Payment amounts - based on payment_date (when payment was actually made)
         factory_order_payment_total = OrderPayment.objects.filter(
             order__invoice__invoice_type='factory',
-            order__branch_id=branch_id_int,
+            branch_id=branch_id_int,
             order__invoice__is_deleted=False,
             payment_date__gte=period_start,
             payment_date__lt=period_end,
@@ -65,7 +66,7 @@ class EarningReportView(APIView):
 
         normal_order_payment_total = OrderPayment.objects.filter(
             order__invoice__invoice_type='normal',
-            order__branch_id=branch_id_int,
+            branch_id=branch_id_int,
             order__invoice__is_deleted=False,
             payment_date__gte=period_start,
             payment_date__lt=period_end,
@@ -85,7 +86,7 @@ class EarningReportView(APIView):
 
         hearing_order_payment_total = OrderPayment.objects.filter(
             order__invoice__invoice_type='hearing',
-            order__branch_id=branch_id_int,
+            branch_id=branch_id_int,
             order__invoice__is_deleted=False,
             payment_date__gte=period_start,
             payment_date__lt=period_end,
@@ -105,7 +106,7 @@ class EarningReportView(APIView):
 
         # Soldering payments based on payment_date
         soldering_order_amount = SolderingPayment.objects.filter(
-            order__branch_id=branch_id_int,
+            branch_id=branch_id_int,
             payment_date__gte=period_start,
             payment_date__lt=period_end,
             is_deleted=False
@@ -113,7 +114,7 @@ class EarningReportView(APIView):
 
         # Channel payments based on payment_date
         channel_amount = ChannelPayment.objects.filter(
-            appointment__branch_id=branch_id_int,
+            branch_id=branch_id_int,
             appointment__is_deleted=False,
             payment_date__gte=period_start,
             payment_date__lt=period_end,
@@ -6,12 +6,13 @@ from django.utils import timezone
 
 from api.services.employee_report_service import EmployeeReportService
 from api.services.time_zone_convert_service import TimezoneConverterService
+from api.db.replica import ReportReplicaMixin
 
 
 logger = logging.getLogger(__name__)
 
 
-class EmployeeHistoryReportView(APIView):
+class EmployeeHistoryReportView(ReportReplicaMixin, APIView):
     """
     API View for generating employee history reports based on sales performance.
     
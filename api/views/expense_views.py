@@ -43,24 +43,25 @@ class ExpenseCreateView(APIView):
             paid_source = serializer.validated_data.get("paid_source", "safe")
 
             try:
-                # Validate safe balance if paid from safe
-                if paid_source == "safe":
-                    SafeService.validate_sufficient_balance(branch_id, amount)
-                else:
-                    ExpenseValidationService.validate_expense_limit(branch_id, amount)
+                with transaction.atomic():
+                    # Validate safe balance if paid from safe
+                    if paid_source == "safe":
+                        SafeService.validate_sufficient_balance(branch_id, amount)
+                    else:
+                        ExpenseValidationService.validate_expense_limit(branch_id, amount)
 
-                expense = serializer.save()
+                    expense = serializer.save()
 
-                # Record safe transaction if needed
-                if paid_source == "safe":
-                    SafeService.record_transaction(
-                        branch=expense.branch,
-                        expense=expense,
-                        amount=expense.amount,
-                        transaction_type='expense',
-                        reason=f"{expense.main_category.name} - {expense.sub_category.name}",
-                        reference_id=f"expense-{expense.id}"
-                    )
+                    # Record safe transaction if needed
+                    if paid_source == "safe":
+                        SafeService.record_transaction(
+                            branch=expense.branch,
+                            expense=expense,
+                            amount=expense.amount,
+                            transaction_type='expense',
+                            reason=f"{expense.main_category.name} - {expense.sub_category.name}",
+                            reference_id=f"expense-{expense.id}"
+                        )
 
                 return Response(ExpenseSerializer(expense).data, status=status.HTTP_201_CREATED)
             except Exception as e:
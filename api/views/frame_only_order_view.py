@@ -10,7 +10,8 @@ from ..serializers import OrderSerializer  # Optional if you want to return full
 from decimal import Decimal
 from datetime import date
 from ..models import Order
-from ..services.send_sms_service import SMSService
+from ..services.sms_outbox_service import SMSOutboxService
+from ..services.order_read_service import OrderReadService
 
 class FrameOnlyOrderCreateView(APIView):
     """
@@ -54,39 +55,16 @@ class FrameOnlyOrderCreateView(APIView):
                         order.status = 'partially_paid'
                     order.save()
 
+                # Queued with the order; the outbox worker sends it after commit
+                SMSOutboxService.enqueue_order_create(order)
+
         except ValueError as e:
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"detail": f"An unexpected error occurred: {str(e)}"},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        # SMS is sent outside the transaction so a failure never rolls back the order
-        try:
-            patient = getattr(order, 'customer', None)
-            mobile = getattr(patient, 'phone_number', None)
-            print(f"[SMS DEBUG] patient={getattr(patient, 'id', None)}, mobile={mobile}")
-            if mobile:
-                invoice = getattr(order, 'invoice', None)
-                recipient = {
-                    "mobile": mobile,
-                    "customer_name": getattr(patient, 'name', ''),
-                    "branch_name": getattr(order.branch, 'branch_name', ''),
-                    "branch_address": getattr(order.branch, 'address', '') or '',
-                    "branch_contact_number": getattr(order.branch, 'contact_one', '') or '',
-                    "invoice_number": getattr(invoice, 'invoice_number', ''),
-                }
-                print(f"[SMS DEBUG] sending order_create SMS, recipient={recipient}")
-                result = SMSService.send_sms_by_template_type(
-                    template_type="order_create",
-                    recipients=[recipient],
-                )
-                print(f"[SMS DEBUG] result={result}")
-            else:
-                print("[SMS DEBUG] skipped — no phone number on patient")
-        except Exception as e:
-            print(f"[SMS DEBUG] exception: {e}")  # SMS failure must never affect order creation
-
-        output_serializer = OrderSerializer(order)
+        output_serializer = OrderSerializer(OrderReadService.get_order(order.pk))
         return Response(output_serializer.data, status=status.HTTP_201_CREATED)
     
 class FrameOnlyOrderUpdateView(APIView):
@@ -131,7 +109,7 @@ class FrameOnlyOrderUpdateView(APIView):
                     updated_order.status = "pending"
                 updated_order.save()
 
-            return Response(OrderSerializer(updated_order).data, status=status.HTTP_200_OK)
+            return Response(OrderSerializer(OrderReadService.get_order(updated_order.pk)).data, status=status.HTTP_200_OK)
 
         except Order.DoesNotExist:
             return Response({"error": "Order not found."}, status=404)
@@ -2,15 +2,17 @@ from rest_framework import generics, filters
 from rest_framework.response import Response
 from ..models import FrameStockHistory, FrameStock,OrderItem,Branch,Frame
 from ..serializers import FrameStockHistorySerializer
-from ..services.pagination_service import PaginationService
+from ..services.pagination_service import KeysetPaginationService
 from django.db.models import Sum, Q, Min, Max
 from datetime import datetime
 from django.utils import timezone
 from django.conf import settings
 from rest_framework.views import APIView
 from ..services.time_zone_convert_service import TimezoneConverterService
+from ..db.replica import ReportReplicaMixin
 class FrameHistoryReportView(generics.ListAPIView):
-    pagination_class = PaginationService
+    pagination_class = KeysetPaginationService
+    keyset_ordering = ('-timestamp', '-id')  # ?pagination=cursor
     serializer_class = FrameStockHistorySerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['frame__id', 'branch__id']  # Allow searching by frame ID and branch ID
@@ -76,7 +78,7 @@ class FrameHistoryReportView(generics.ListAPIView):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
-class FrameSaleReportView(APIView):
+class FrameSaleReportView(ReportReplicaMixin, APIView):
     def get(self, request, *args, **kwargs):
         store_branch_id = request.query_params.get('store_branch_id')
         date_start = request.query_params.get('date_start')
@@ -107,8 +107,8 @@ class StockAdjustmentView(generics.ListCreateAPIView):
         # Serialize inline to avoid serializer boilerplate (can optimize later)
         response_data = [
             {
-                "frame_id": stock.frame.id,
-                "branch_id": stock.branch.id,
+                "frame_id": stock.frame_id,
+                "branch_id": stock.branch_id,
                 "updated_qty": stock.qty
             } for stock in updated_stocks
         ]
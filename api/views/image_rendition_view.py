@@ -0,0 +1,73 @@
+import logging
+
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import permissions
+from rest_framework.exceptions import NotFound
+from rest_framework.views import APIView
+
+from ..models import FrameImage, OrderImage
+from ..services.image_uploard_service import FAILED, PENDING, ImageRenditionService
+
+logger = logging.getLogger(__name__)
+
+# One year; a replaced image is a new FrameImage/OrderImage with a new uuid
+RENDITION_MAX_AGE = 60 * 60 * 24 * 365
+
+
+class ImageRenditionView(APIView):
+    """
+    Serve a fixed-size rendition of a frame or order image.
+    GET /api/images/<kind>/<uuid>/<size>/   kind: frame | order, size: 128 | 512 | original
+
+    Renditions are generated on first request and cached on disk. Responses
+    carry a strong ETag and a long Cache-Control so POS screens only download
+    each tile once.
+    """
+    # Same exposure as the MEDIA_URL files these are derived from
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    MODELS = {
+        'frame': FrameImage,
+        'order': OrderImage,
+    }
+
+    def get(self, request, kind, uuid, size):
+        model = self.MODELS.get(kind)
+        if model is None or not ImageRenditionService.is_valid_size(size):
+            raise NotFound(detail="Unknown image rendition")
+
+        image = model.objects.filter(uuid=uuid).only('image', 'processing_status').first()
+        if image is None or not image.image:
+            raise NotFound(detail="Image not found")
+
+        if image.processing_status == FAILED:
+            # Background processing could not decode it either; serve the upload as is
+            size = 'original'
+
+        try:
+            name = ImageRenditionService.ensure_rendition(image.image, size)
+        except FileNotFoundError:
+            raise NotFound(detail="Image file not found")
+        except ImageRenditionService.DECODE_ERRORS as e:
+            logger.warning(f"Cannot render {kind} image {uuid} at {size}: {e}")
+            raise NotFound(detail="Image could not be decoded")
+
+        storage = image.image.storage
+        etag = ImageRenditionService.build_etag(storage, name)
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(storage.open(name, 'rb'))
+
+        response['ETag'] = etag
+        if image.processing_status == PENDING:
+            # The original is swapped for its WebP version once processed
+            patch_cache_control(response, no_cache=True)
+        else:
+            patch_cache_control(response, public=True, max_age=RENDITION_MAX_AGE, immutable=True)
+        return response
@@ -1,9 +1,11 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from api.models import Invoice, Order, OrderItemWhatsAppLog, OrderProgress
+from api.models import Invoice, Order, OrderItemWhatsAppLog
 from api.serializers import InvoiceSerializer, BulkWhatsAppLogCreateSerializer
-from api.services.send_sms_service import SMSService
+from api.services.sms_outbox_service import SMSOutboxService
+from api.services.order_progress_service import OrderProgressService
+from rest_framework.exceptions import ValidationError
 from django.utils import timezone
 from django.db import transaction
 
@@ -63,72 +65,47 @@ class BulkUpdateOrderProgressStatus(APIView):
         if not order_ids or not progress_status:
             return Response({"detail": "order_ids and progress_status required."}, status=400)
 
-        results = []
-        updated_orders = []
+        sms_outbox_ids = []
+        sms_results = []
 
         with transaction.atomic():
-            orders = (
-                Order.objects
-                .select_related('customer', 'branch')
-                .select_for_update()
-                .filter(id__in=order_ids, is_deleted=False)
-            )
-            for order in orders:
-                if progress_status == "issue_to_customer" and order.fitting_on_collection:
-                    order.fitting_on_collection = False
-                    order.save(update_fields=['fitting_on_collection'])
-
-                last_progress = (
-                    OrderProgress.objects
-                    .filter(order=order)
-                    .order_by('-changed_at')
-                    .first()
-                )
-                if last_progress and last_progress.progress_status == progress_status:
-                    results.append({"order_id": order.id, "status": "already_set"})
-                    continue
-
-                OrderProgress.objects.create(
-                    order=order,
-                    progress_status=progress_status,
-                    changed_at=timezone.now()
-                )
-                results.append({"order_id": order.id, "status": "created"})
-                updated_orders.append(order)
-
-        # SMS is sent outside the transaction so a failure never rolls back the progress update
-        sms_results = []
-        if progress_status == "received_from_factory" and updated_orders:
-            invoice_map = {
-                inv.order_id: inv
-                for inv in Invoice.objects.filter(order_id__in=[o.id for o in updated_orders])
-            }
-
-            recipients = []
-            for order in updated_orders:
-                mobile = getattr(order.customer, 'phone_number', None)
-                if not mobile:
-                    continue
-                invoice = invoice_map.get(order.id)
-                recipients.append({
-                    "mobile": mobile,
-                    "customer_name": getattr(order.customer, 'name', ''),
-                    "branch_name": getattr(order.branch, 'branch_name', ''),
-                    "branch_address": getattr(order.branch, 'address', '') or '',
-                    "branch_contact_number": getattr(order.branch, 'contact_one', '') or '',
-                    "invoice_number": getattr(invoice, 'invoice_number', ''),
-                })
-
-            if recipients:
-                try:
-                    sms_results = SMSService.send_sms_by_template_type(
-                        template_type="received_from_factory",
-                        recipients=recipients,
-                    )
-                except Exception as e:
-                    sms_results = [{"status": "error", "error": str(e)}]
+            results, updated_orders = OrderProgressService.bulk_transition(order_ids, progress_status)
+
+            # Queue the SMS with the progress rows; the outbox worker sends them after commit
+            if progress_status == "received_from_factory" and updated_orders:
+                invoice_map = {
+                    inv.order_id: inv
+                    for inv in Invoice.objects.filter(order_id__in=[o.id for o in updated_orders])
+                }
+
+                recipients = []
+                for order in updated_orders:
+                    mobile = getattr(order.customer, 'phone_number', None)
+                    if not mobile:
+                        continue
+                    invoice = invoice_map.get(order.id)
+                    recipients.append({
+                        "mobile": mobile,
+                        "customer_name": getattr(order.customer, 'name', ''),
+                        "branch_name": getattr(order.branch, 'branch_name', ''),
+                        "branch_address": getattr(order.branch, 'address', '') or '',
+                        "branch_contact_number": getattr(order.branch, 'contact_one', '') or '',
+                        "invoice_number": getattr(invoice, 'invoice_number', ''),
+                    })
+
+                if recipients:
+                    try:
+                        sms_outbox_ids = SMSOutboxService.enqueue_by_template_type(
+                            template_type="received_from_factory",
+                            recipients=recipients,
+                        )
+                    except ValidationError as e:
+                        # A missing template must never roll back the progress update
+                        sms_results = [{"status": "error", "error": str(e)}]
 
         response_data = {"results": results}
+        if sms_outbox_ids:
+            response_data["sms_outbox_ids"] = sms_outbox_ids
         if sms_results:
             response_data["sms_results"] = sms_results
 
@@ -11,9 +11,10 @@ from ..models import (
 )
 from ..services.time_zone_convert_service import TimezoneConverterService
 from ..services.pagination_service import PaginationService
+from ..db.replica import ReportReplicaMixin
 
 
-class InvoiceTrackingReportView(APIView):
+class InvoiceTrackingReportView(ReportReplicaMixin, APIView):
     """
     View to generate detailed invoice tracking report for factory orders.
     """
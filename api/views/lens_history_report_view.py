@@ -1,5 +1,5 @@
 from rest_framework import generics,filters
-from ..services.pagination_service import PaginationService
+from ..services.pagination_service import KeysetPaginationService
 from ..models import LensStockHistory
 from ..serializers import LensStockHistorySerializer
 from django.db.models import Q
@@ -8,7 +8,8 @@ from rest_framework.response import Response
 
 
 class LensHistoryReportView(generics.ListAPIView):
-    pagination_class = PaginationService
+    pagination_class = KeysetPaginationService
+    keyset_ordering = ('-timestamp', '-id')  # ?pagination=cursor
     serializer_class = LensStockHistorySerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['lens__id', 'branch__id']  # Allow searching by frame ID and branch ID
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from ..models import LensPower
 from ..serializers import LensPowerSerializer
+from ..services.lens_uniqueness_service import LensUniquenessService
 from django.db import transaction
 
 # List, Create, and Bulk Update Lens Powers
@@ -15,6 +16,7 @@ class LensPowerListCreateView(APIView):
         serializer = LensPowerSerializer(queryset, many=True)
         return Response(serializer.data)
 
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
         """
         Create one or more lens powers.
@@ -25,7 +27,9 @@ class LensPowerListCreateView(APIView):
             serializer = LensPowerSerializer(data=request.data)
 
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        saved = serializer.save()
+        saved = saved if isinstance(saved, list) else [saved]
+        LensUniquenessService.refresh_fingerprints(power.lens_id for power in saved)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @transaction.atomic
@@ -41,6 +45,7 @@ class LensPowerListCreateView(APIView):
 
         # Collect all updates
         response_data = []
+        lens_ids = set()
         for item in request.data:
             if 'id' not in item:
                 return Response(
@@ -56,11 +61,13 @@ class LensPowerListCreateView(APIView):
                     status=status.HTTP_404_NOT_FOUND,
                 )
 
+            lens_ids.add(instance.lens_id)
             serializer = LensPowerSerializer(instance, data=item, partial=True)
             serializer.is_valid(raise_exception=True)
-            serializer.save()
+            lens_ids.add(serializer.save().lens_id)
             response_data.append(serializer.data)
 
+        LensUniquenessService.refresh_fingerprints(lens_ids)
         return Response(response_data, status=status.HTTP_200_OK)
 
 
@@ -79,21 +86,25 @@ class LensPowerRetrieveUpdateDeleteView(APIView):
                 {"error": "LensPower not found."}, status=status.HTTP_404_NOT_FOUND
             )
 
+    @transaction.atomic
     def patch(self, request, pk, *args, **kwargs):
         """
         Update a single lens power.
         """
         try:
             instance = LensPower.objects.get(pk=pk)
+            old_lens_id = instance.lens_id
             serializer = LensPowerSerializer(instance, data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
             serializer.save()
+            LensUniquenessService.refresh_fingerprints({old_lens_id, instance.lens_id})
             return Response(serializer.data)
         except LensPower.DoesNotExist:
             return Response(
                 {"error": "LensPower not found."}, status=status.HTTP_404_NOT_FOUND
             )
 
+    @transaction.atomic
     def delete(self, request, pk, *args, **kwargs):
         """
         Delete a single lens power.
@@ -101,6 +112,7 @@ class LensPowerRetrieveUpdateDeleteView(APIView):
         try:
             instance = LensPower.objects.get(pk=pk)
             instance.delete()
+            LensUniquenessService.refresh_fingerprints([instance.lens_id])
             return Response(status=status.HTTP_204_NO_CONTENT)
         except LensPower.DoesNotExist:
             return Response(
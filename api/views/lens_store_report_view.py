@@ -9,6 +9,7 @@ from ..models import LensStockHistory, LensStock, OrderItem, Branch, Lens, Lense
 from ..serializers import LensStockHistorySerializer
 from ..services.pagination_service import PaginationService
 from ..services.time_zone_convert_service import TimezoneConverterService
+from ..db.replica import ReportReplicaMixin
 
 class LensHistoryReportView(generics.ListAPIView):
     pagination_class = PaginationService
@@ -61,7 +62,7 @@ class LensHistoryReportView(generics.ListAPIView):
         return Response(serializer.data)
 
 # Replace the existing LensSaleReportView class with this one
-class LensSaleReportView(APIView):
+class LensSaleReportView(ReportReplicaMixin, APIView):
     def get(self, request, *args, **kwargs):
         store_branch_id = request.query_params.get('store_branch_id')
         date_start = request.query_params.get('date_start')
@@ -119,12 +119,12 @@ class LensListCreateView(generics.ListCreateAPIView):
         brand_id = lens_data.get('brand')
 
         # 🔥 STEP 2: Check uniqueness
-        LensUniquenessService.check_lens_uniqueness(type_id, coating_id, brand_id, powers_data)
+        fingerprint = LensUniquenessService.check_lens_uniqueness(type_id, coating_id, brand_id, powers_data)
 
         # ✅ STEP 5: Save Lens
         lens_serializer = self.get_serializer(data=lens_data)
         lens_serializer.is_valid(raise_exception=True)
-        lens = lens_serializer.save()
+        lens = LensUniquenessService.save_lens(lens_serializer, power_fingerprint=fingerprint)
 
         # ✅ STEP 6: Save Stock
         created_stocks = []
@@ -209,24 +209,26 @@ class LensRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
         if not lens_data and not stock_data_list and not powers_data:
             return Response({"error": "No data provided for update."}, status=status.HTTP_400_BAD_REQUEST)
             
-        # If lens data is provided, validate it
-        if lens_data:
-            # Check for duplicate lens only if type, coating, or brand are being updated
-            type_id = lens_data.get('type', lens_instance.type_id)
-            coating_id = lens_data.get('coating', lens_instance.coating_id)
-            brand_id = lens_data.get('brand', lens_instance.brand_id)
-
-            # Check for duplicate lens (excluding current one) only if we have powers data
-            if powers_data:
-                LensUniquenessService.check_lens_uniqueness(type_id, coating_id, brand_id, powers_data, exclude_lens_id=lens_id)
+        # If powers are being replaced, check the new power set (excluding the current lens)
+        fingerprint_kwargs = {}
+        if powers_data:
+            type_id = (lens_data or {}).get('type', lens_instance.type_id)
+            coating_id = (lens_data or {}).get('coating', lens_instance.coating_id)
+            brand_id = (lens_data or {}).get('brand', lens_instance.brand_id)
+            fingerprint_kwargs['power_fingerprint'] = LensUniquenessService.check_lens_uniqueness(
+                type_id, coating_id, brand_id, powers_data, exclude_lens_id=lens_id
+            )
 
-        # If lens data is being updated, validate and save it
+        # If lens data is being updated, validate and save it. A type, coating or
+        # brand change onto another lens's power set is rejected by the unique constraint.
         if lens_data:
             lens_serializer = self.get_serializer(lens_instance, data=lens_data, partial=True)
             lens_serializer.is_valid(raise_exception=True)
-            lens = lens_serializer.save()
+            lens = LensUniquenessService.save_lens(lens_serializer, **fingerprint_kwargs)
         else:
             lens = lens_instance
+            if fingerprint_kwargs:
+                LensUniquenessService.set_fingerprint(lens, fingerprint_kwargs['power_fingerprint'])
 
         # ✅ Update/Create Stock if stock data is provided
         if not isinstance(stock_data_list, list):
@@ -7,6 +7,7 @@ from ..services.order_service import OrderService
 from ..services.stock_validation_service import StockValidationService
 from ..services.order_payment_service import OrderPaymentService
 from ..services.refraction_details_service import RefractionDetailsService
+from ..services.order_read_service import OrderReadService
 from ..serializers import OrderSerializer,OrderPaymentSerializer
 
 class ManualOrderCreateView(APIView):
@@ -52,7 +53,7 @@ class ManualOrderCreateView(APIView):
                 stock.save()
 
             # Step 7: Return Response
-            response_serializer = OrderSerializer(order)
+            response_serializer = OrderSerializer(OrderReadService.get_order(order.pk))
             return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
         except ValueError as e:
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework.exceptions import NotFound, PermissionDenied
 from ..models import Order, OrderImage
 from ..serializers import OrderImageSerializer
+from ..services.image_uploard_service import ImageRenditionService
 
 class OrderImageListCreateView(generics.ListCreateAPIView):
     """
@@ -147,6 +148,11 @@ class OrderImageDetailView(generics.RetrieveDestroyAPIView):
         
         # Store the file path before deletion
         file_path = instance.image.path if instance.image else None
+
+        # Remove the generated thumbnail and renditions so the folder can be cleaned up below
+        if instance.thumbnail:
+            instance.thumbnail.delete(save=False)
+        ImageRenditionService.delete_renditions(instance.image)
         
         # Delete the image file from storage
         if instance.image:
@@ -2,6 +2,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from ..models import OrderPayment, PaymentMethodBanks  # Adjust import paths as needed
 from django.db.models import Sum
+from ..services.reference_data_cache import ReferenceDataCache
 
 
 class OrderPaymentBankReportViewSet(APIView):
@@ -19,8 +20,8 @@ class OrderPaymentBankReportViewSet(APIView):
 
         # Optionally, include bank details
         bank_ids = [item['payment_method_bank'] for item in report]
-        banks = PaymentMethodBanks.objects.filter(id__in=bank_ids)
-        bank_map = {bank.id: bank.name for bank in banks}
+        all_banks = ReferenceDataCache.get_all(PaymentMethodBanks)
+        bank_map = {bank_id: all_banks[bank_id].name for bank_id in bank_ids if bank_id in all_banks}
 
         result = [
             {
@@ -11,6 +11,7 @@ from ..services.external_lens_service import ExternalLensService
 from rest_framework.exceptions import ValidationError
 from django.utils import timezone
 from ..services.mnt_order_service import MntOrderService
+from ..services.order_read_service import OrderReadService
 
 class OrderUpdateView(APIView):
     """
@@ -127,7 +128,7 @@ class OrderUpdateView(APIView):
 
 
             # Step 5: Return Updated Order Response
-            response_serializer = OrderSerializer(updated_order)
+            response_serializer = OrderSerializer(OrderReadService.get_order(updated_order.pk))
             return Response(response_serializer.data, status=status.HTTP_200_OK)
 
         except Order.DoesNotExist:
@@ -16,7 +16,8 @@ from ..services.soft_delete_service import OrderSoftDeleteService
 # from ..services.order_payment_service import refund_order  # adjust as needed
 from rest_framework.exceptions import ValidationError
 from decimal import Decimal
-from ..services.send_sms_service import SMSService
+from ..services.sms_outbox_service import SMSOutboxService
+from ..services.order_read_service import OrderReadService
 
 class OrderCreateView(APIView):
     def post(self, request, *args, **kwargs):
@@ -108,7 +109,10 @@ class OrderCreateView(APIView):
                 if total_payment > order.total_price:
                     raise ValueError("Total payments exceed the order total price.")
 
-                response_data = OrderSerializer(order).data
+                # Queued with the order; the outbox worker sends it after commit
+                SMSOutboxService.enqueue_order_create(order)
+
+                response_data = OrderSerializer(OrderReadService.get_order(order.pk)).data
 
         except ValueError as e:
             transaction.set_rollback(True)
@@ -117,31 +121,6 @@ class OrderCreateView(APIView):
             transaction.set_rollback(True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        # SMS is sent outside the transaction so a failure never rolls back the order
-        try:
-            mobile = getattr(patient, 'phone_number', None)
-            print(f"[SMS DEBUG] patient={patient.id}, mobile={mobile}")
-            if mobile:
-                invoice = getattr(order, 'invoice', None)
-                recipient = {
-                    "mobile": mobile,
-                    "customer_name": getattr(patient, 'name', ''),
-                    "branch_name": getattr(order.branch, 'branch_name', ''),
-                    "branch_address": getattr(order.branch, 'address', '') or '',
-                    "branch_contact_number": getattr(order.branch, 'contact_one', '') or '',
-                    "invoice_number": getattr(invoice, 'invoice_number', ''),
-                }
-                print(f"[SMS DEBUG] sending order_create SMS, recipient={recipient}")
-                result = SMSService.send_sms_by_template_type(
-                    template_type="order_create",
-                    recipients=[recipient],
-                )
-                print(f"[SMS DEBUG] result={result}")
-            else:
-                print("[SMS DEBUG] skipped — no phone number on patient")
-        except Exception as e:
-            print(f"[SMS DEBUG] exception: {e}")  # SMS failure must never affect order creation
-
         return Response(response_data, status=status.HTTP_201_CREATED)
         
 class OrderSoftDeleteView(APIView):
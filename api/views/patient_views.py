@@ -6,7 +6,7 @@ from rest_framework.filters import SearchFilter
 from ..models import Patient, PatientAuditLog,CustomUser
 from ..serializers import PatientSerializer
 from django_filters.rest_framework import DjangoFilterBackend
-from ..services.pagination_service import PaginationService
+from ..services.pagination_service import KeysetPaginationService, PaginationService
 from ..services.time_zone_convert_service import TimezoneConverterService
 from rest_framework.response import Response
 from rest_framework import status
@@ -45,7 +45,8 @@ class PatientListView(ListAPIView):
     queryset = Patient.objects.all().order_by('id')
     serializer_class = PatientSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = PaginationService
+    pagination_class = KeysetPaginationService
+    keyset_ordering = ('id',)  # ?pagination=cursor
     filter_backends = [DjangoFilterBackend]
     
     def get_queryset(self):
@@ -4,11 +4,12 @@ from rest_framework import status
 from django.db.models import Sum, Q, F
 from api.models import Branch, OrderPayment, ChannelPayment, SolderingPayment, OtherIncome
 from api.services.time_zone_convert_service import TimezoneConverterService
+from api.db.replica import ReportReplicaMixin
 from datetime import timedelta
 from datetime import datetime
 from django.utils import timezone
 
-class PaymentSummaryReportView(APIView):
+class PaymentSummaryReportView(ReportReplicaMixin, APIView):
     def get(self, request):
         if not request.user.is_superuser:
             return Response({"error": "Permission denied."}, status=status.HTTP_403_FORBIDDEN)
@@ -50,7 +51,7 @@ class PaymentSummaryReportView(APIView):
 
                     # OrderPayment
                     order_payments = OrderPayment.objects.filter(
-                        order__branch=branch,
+                        branch=branch,
                         payment_date__range=(day_start, day_end),
                         is_deleted=False,
                         transaction_status='success',
@@ -61,7 +62,7 @@ class PaymentSummaryReportView(APIView):
 
                     # ChannelPayment
                     channel_payments = ChannelPayment.objects.filter(
-                        appointment__branch=branch,
+                        branch=branch,
                         payment_date__range=(day_start, day_end),
                         is_deleted=False,
                         payment_method__in=payment_methods
@@ -71,7 +72,7 @@ class PaymentSummaryReportView(APIView):
 
                     # SolderingPayment
                     soldering_payments = SolderingPayment.objects.filter(
-                        order__branch=branch,
+                        branch=branch,
                         payment_date__range=(day_start, day_end),
                         is_deleted=False,
                         transaction_status='completed',
@@ -104,7 +105,7 @@ class PaymentSummaryReportView(APIView):
 
             # OrderPayment (sales)
             order_payments = OrderPayment.objects.filter(
-                order__branch=branch,
+                branch=branch,
                 payment_date__range=(start_datetime, end_datetime),
                 is_deleted=False,
                 transaction_status='success',
@@ -115,7 +116,7 @@ class PaymentSummaryReportView(APIView):
 
             # ChannelPayment (appointments)
             channel_payments = ChannelPayment.objects.filter(
-                appointment__branch=branch,
+                branch=branch,
                 payment_date__range=(start_datetime, end_datetime),
                 is_deleted=False,
                 payment_method__in=payment_methods
@@ -125,7 +126,7 @@ class PaymentSummaryReportView(APIView):
 
             # SolderingPayment (soldering orders)
             soldering_payments = SolderingPayment.objects.filter(
-                order__branch=branch,
+                branch=branch,
                 payment_date__range=(start_datetime, end_datetime),
                 is_deleted=False,
                 transaction_status='completed',
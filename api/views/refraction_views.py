@@ -5,7 +5,7 @@ from ..serializers import RefractionSerializer, PatientRefractionDetailOrderSeri
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.views import APIView
 from django.db.models import Q
-from ..services.pagination_service import PaginationService
+from ..services.pagination_service import KeysetPaginationService
 
 class RefractionCreateAPIView(generics.CreateAPIView):
     """
@@ -90,7 +90,8 @@ class RefractionListAPIView(generics.ListAPIView):
     """
     serializer_class = RefractionSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = PaginationService
+    pagination_class = KeysetPaginationService
+    keyset_ordering = ('-id',)  # ?pagination=cursor
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
 
     # Fields searchable via ?search=
@@ -9,6 +9,7 @@ from ..serializers import SolderingOrderSerializer, SolderingInvoiceSerializer,
 from ..services.soldering_order_service import SolderingOrderService
 from ..services.soldering_payment_service import SolderingPaymentService
 from ..services.soldering_invoice_service import SolderingInvoiceService
+from ..services.finance_summary_service import DailyFinanceSummaryService
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.generics import ListAPIView
@@ -168,6 +169,8 @@ class SolderingOrderEditView(APIView):
             if not branch:
                 return Response({"error": "Branch not found."}, status=400)
             order.branch = branch
+            # Payments keep a copy of the order's branch
+            DailyFinanceSummaryService.move_payments(SolderingPayment.all_objects.filter(order=order), branch.id)
 
         order.save()
 
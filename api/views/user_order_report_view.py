@@ -29,15 +29,12 @@ class GlassSenderReportView(ListAPIView):
             # Only get orders where issued_by is set (not null)
             queryset = queryset.exclude(issued_by__isnull=True)
 
-        if start_date and end_date:
-            queryset = queryset.filter(
-                issued_date__date__gte=parse_date(start_date),
-                issued_date__date__lte=parse_date(end_date)
+        if start_date or end_date:
+            queryset = queryset.in_local_range(
+                'issued_date',
+                parse_date(start_date) if start_date else None,
+                parse_date(end_date) if end_date else None,
             )
-        elif start_date:
-            queryset = queryset.filter(issued_date__date__gte=parse_date(start_date))
-        elif end_date:
-            queryset = queryset.filter(issued_date__date__lte=parse_date(end_date))
 
         if invoice_number:
             queryset = queryset.filter(invoice__invoice_number=invoice_number)
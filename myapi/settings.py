@@ -56,7 +56,8 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        # orjson-backed when orjson is installed, stock JSONRenderer output otherwise
+        'api.renderers.FastJSONRenderer',
     ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -76,6 +77,7 @@ SIMPLE_JWT = {
 AUTH_USER_MODEL = 'api.CustomUser'
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # MOVE THIS TO THE TOP
+    'api.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -83,16 +85,57 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.db.replica.ReplicaPinningMiddleware',
 ]
 
+# Responses of at least this many bytes are compressed: brotli when the
+# brotli package is installed and accepted by the client, gzip otherwise.
+# `manage.py benchmark_rendering` compares encoders and compressed sizes.
+RESPONSE_COMPRESSION_MIN_SIZE = config('RESPONSE_COMPRESSION_MIN_SIZE', default=1024, cast=int)
+RESPONSE_BROTLI_QUALITY = config('RESPONSE_BROTLI_QUALITY', default=5, cast=int)
+
 CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', default='localhost,127.0.0.1').split(',')
 
 CORS_ALLOW_ALL_ORIGINS = False
 
+# Uploaded FrameImage / OrderImage files are transcoded to WebP off-request
+IMAGE_PROCESSING_WORKERS = config('IMAGE_PROCESSING_WORKERS', default=2, cast=int)
+IMAGE_PROCESSING_SYNC = config('IMAGE_PROCESSING_SYNC', default=False, cast=bool)
+IMAGE_MAX_EDGE = config('IMAGE_MAX_EDGE', default=2048, cast=int)
+IMAGE_THUMBNAIL_EDGE = config('IMAGE_THUMBNAIL_EDGE', default=256, cast=int)
+
 SMS_USER = config('SMS_USER', default='')
 SMS_PASSWORD = config('SMS_PASSWORD', default='')
+# Dialog eSMS endpoints; point these at a local fake when testing
+SMS_LOGIN_URL = config('SMS_LOGIN_URL', default='https://esms.dialog.lk/api/v2/user/login')
+SMS_SEND_URL = config('SMS_SEND_URL', default='https://e-sms.dialog.lk/api/v2/sms')
+
+# Queued SMS are sent by `manage.py send_sms_outbox`
+SMS_OUTBOX_BATCH_SIZE = config('SMS_OUTBOX_BATCH_SIZE', default=50, cast=int)
+SMS_OUTBOX_CONCURRENCY = config('SMS_OUTBOX_CONCURRENCY', default=4, cast=int)
+SMS_OUTBOX_MAX_ATTEMPTS = config('SMS_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+SMS_OUTBOX_BACKOFF_SECONDS = config('SMS_OUTBOX_BACKOFF_SECONDS', default=30, cast=int)
+SMS_OUTBOX_MAX_BACKOFF_SECONDS = config('SMS_OUTBOX_MAX_BACKOFF_SECONDS', default=3600, cast=int)
 CORS_ALLOW_CREDENTIALS = True
 
+# Reference data (branches, banks, lens/frame lookups, SMS templates...) is
+# cached by api/services/reference_data_cache.py. locmem is per process:
+# with several workers use 'file' (CACHE_LOCATION = a shared directory) or
+# 'redis' (CACHE_LOCATION = redis://host:6379/0, needs the redis package).
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[config('CACHE_BACKEND', default='locmem')],
+        'LOCATION': config('CACHE_LOCATION', default='visionmain'),
+        'TIMEOUT': config('REFERENCE_CACHE_TIMEOUT', default=300, cast=int),
+        'KEY_PREFIX': config('CACHE_KEY_PREFIX', default='visionmain'),
+    }
+}
+
 ROOT_URLCONF = 'myapi.urls'
 
 TEMPLATES = [
@@ -117,19 +160,52 @@ WSGI_APPLICATION = 'myapi.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# DB_CONN_MAX_AGE keeps each worker's connection open across requests
+# (0 closes it after every request); health checks drop dead ones first.
+# DB_POOL switches to the pooled backend in api/db, which also reuses
+# connections closed by worker threads; see `manage.py benchmark_db_connections`.
+DB_OPTIONS = {
+    'charset': config('DB_CHARSET', default='utf8mb4'),
+    'isolation_level': config('DB_ISOLATION_LEVEL', default='read committed'),
+}
+if config('DB_INIT_COMMAND', default=''):
+    DB_OPTIONS['init_command'] = config('DB_INIT_COMMAND')
+
 DATABASES = {
     'default': {
         # 'ENGINE': 'django.db.backends.sqlite3',
         # 'NAME': BASE_DIR / 'db.sqlite3',
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'api.db.mysql_pool' if config('DB_POOL', default=False, cast=bool) else 'django.db.backends.mysql',
         'NAME': config('DB_NAME'),
         'USER': config('DB_USER'),
         'PASSWORD': config('DB_PASSWORD', default=''),
         'HOST': config('DB_HOST', default='127.0.0.1'),
         'PORT': config('DB_PORT', default='3306'), 
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        'OPTIONS': DB_OPTIONS,
+        'POOL': {
+            'MAX_SIZE': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'MAX_AGE': config('DB_POOL_MAX_AGE', default=1800, cast=int),
+        },
     }
 }
 
+# Optional read replica for report views (api/db/replica.py). After a client
+# writes, their reads stay on `default` for REPORTS_DB_LAG_TOLERANCE seconds.
+if config('DB_REPORTS_HOST', default=''):
+    DATABASES['reports'] = {
+        **DATABASES['default'],
+        'HOST': config('DB_REPORTS_HOST'),
+        'PORT': config('DB_REPORTS_PORT', default=DATABASES['default']['PORT']),
+        'NAME': config('DB_REPORTS_NAME', default=DATABASES['default']['NAME']),
+        'USER': config('DB_REPORTS_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPORTS_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['api.db.replica.ReportReplicaRouter']
+REPORTS_DB_LAG_TOLERANCE = config('REPORTS_DB_LAG_TOLERANCE', default=5, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators